@@ -1,35 +1,155 @@
 """Dyson IR integration."""
 import logging
-from typing import Final
+import time
+from functools import partial
+from typing import Final, Optional
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import CONF_ACTIONS, CONF_CLIMATE_MODEL, DOMAIN
 from .coordinator import DysonIRCoordinator
+from .hub import async_get_hub
+from .services import async_run_command, async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: Final = ["button"]
+PLATFORMS: Final = ["button", "climate", "fan", "sensor"]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Dyson IR services and scheduled jobs."""
+    async_setup_services(hass)
+
+    async def _async_start_jobs(_: HomeAssistant) -> None:
+        # Jobs that fell due while stopped run once entries have loaded
+        await async_get_hub(hass).jobs.async_start(partial(async_run_command, hass))
+
+    @callback
+    def _async_stop_jobs(_: Event) -> None:
+        async_get_hub(hass).jobs.async_stop()
+
+    async_at_started(hass, _async_start_jobs)
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop_jobs)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Dyson IR from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
+    started = time.perf_counter()
+    hub = async_get_hub(hass)
+    # Storage is loaded once and shared; later entries find it ready
+    await hub.library.async_load()
+    # Restore the estimated state before any entity reports it
+    await hub.state_store.async_load()
+    storage_loaded = time.perf_counter()
 
+    # State is local, so there is nothing to fetch before adding entities
     coordinator = DysonIRCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
-
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+    hub.async_add_coordinator(coordinator)
+    hub.jobs.async_entry_loaded(entry.entry_id)
+    coordinator.async_setup_feedback()
+    coordinator.async_setup_receiver()
+    coordinator.async_setup_tracing()
+    coordinator_ready = time.perf_counter()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    finished = time.perf_counter()
+
+    # Decode and convert codes once startup is over, ahead of the first press
+    entry.async_on_unload(
+        async_at_started(hass, callback(lambda _: coordinator.async_prepare_codes()))
+    )
+
+    # Later changes to the entry are applied in place rather than by a reload
+    entry.async_on_unload(entry.add_update_listener(_async_entry_updated))
+
+    hub.setup_timings[entry.entry_id] = timings = {
+        "storage_ms": (storage_loaded - started) * 1000,
+        "coordinator_ms": (coordinator_ready - storage_loaded) * 1000,
+        "platforms_ms": (finished - coordinator_ready) * 1000,
+        "total_ms": (finished - started) * 1000,
+    }
+    _LOGGER.debug("Set up %s: %s", entry.title, timings)
 
     return True
 
 
+async def _async_entry_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options or actions to the loaded entry."""
+    hub = async_get_hub(hass)
+    if (coordinator := hub.coordinators.get(entry.entry_id)) is None:
+        return
+    coordinator.async_reconfigure()
+    hub.library.async_prune(_referenced_codes(hass))
+    hub.climate_tables.async_prune(_referenced_models(hass))
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        hub = async_get_hub(hass)
+        if (coordinator := hub.coordinators.get(entry.entry_id)) is not None:
+            await coordinator.async_shutdown()
+        hub.async_remove_coordinator(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the state of the removed entry and IR codes only it used."""
+    hub = async_get_hub(hass)
+    await hub.state_store.async_load()
+    hub.state_store.async_remove(entry.entry_id)
+    await hub.jobs.async_load()
+    hub.jobs.async_cancel(entry.entry_id)
+    library = hub.library
+    await library.async_load()
+    library.async_prune(_referenced_codes(hass, entry.entry_id))
+    if entry.data.get(CONF_CLIMATE_MODEL) is not None:
+        await hub.climate_tables.async_load()
+        hub.climate_tables.async_prune(_referenced_models(hass, entry.entry_id))
+
+
+def _referenced_codes(hass: HomeAssistant, exclude: Optional[str] = None) -> set[str]:
+    """Return the refs of every IR code used by an entry other than exclude."""
+    library = async_get_hub(hass).library
+    return {
+        library.async_ref_for(action)
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != exclude
+        for action in entry.data.get(CONF_ACTIONS, [])
+    }
+
+
+def _referenced_models(hass: HomeAssistant, exclude: Optional[str] = None) -> set[str]:
+    """Return the AC code tables used by an entry other than exclude."""
+    return {
+        model_id
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != exclude
+        and (model_id := entry.data.get(CONF_CLIMATE_MODEL)) is not None
+    }
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an old config entry."""
+    _LOGGER.debug("Migrating %s from version %s", entry.title, entry.version)
+
+    if entry.version == 2:
+        # Version 3 keeps IR codes in the shared code library
+        library = async_get_hub(hass).library
+        await library.async_load()
+        actions = library.async_store_actions(entry.data.get(CONF_ACTIONS, []))
+        # The entry is saved within a second; the codes must be on disk first
+        await library.async_save()
+        data = {**entry.data, CONF_ACTIONS: actions}
+        hass.config_entries.async_update_entry(entry, data=data, version=3)
+
+    return entry.version == 3
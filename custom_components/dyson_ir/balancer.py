@@ -0,0 +1,117 @@
+"""Load balancing and failover across the blasters covering a device.
+
+An entry may name several blasters that reach the same room. Each press goes
+to the least-loaded healthy one, the queue depth divided by its weight, with
+ties going to the one configured first, and moves on to the next when a
+blaster fails. A blaster that fails FAILURES_UNHEALTHY times in a row is only
+tried after the healthy ones, until its retry time; then the next press that
+ranks it first probes it. A failed probe doubles the time to the next one.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Sequence
+
+# Consecutive failures after which a blaster is unhealthy
+FAILURES_UNHEALTHY = 2
+# Seconds before an unhealthy blaster is probed, doubled after each failed probe
+RETRY_AFTER = 30.0
+MAX_RETRY_AFTER = 600.0
+
+
+@dataclass
+class BlasterHealth:
+    """Failure tracking of one blaster."""
+
+    failures: int = 0
+    retry_at: float = 0.0  # monotonic
+    backoff: float = RETRY_AFTER
+    served: int = 0
+    failed: int = 0
+
+    @property
+    def healthy(self) -> bool:
+        """Return whether the blaster has not failed repeatedly."""
+        return self.failures < FAILURES_UNHEALTHY
+
+    def available(self, now: float) -> bool:
+        """Return whether the blaster may take a press now."""
+        return self.healthy or now >= self.retry_at
+
+    def claim(self, now: float) -> None:
+        """Take a press; an unhealthy blaster is probed by one press at a time."""
+        if not self.healthy:
+            self.retry_at = now + self.backoff
+
+    def record_success(self) -> None:
+        """Mark the blaster healthy again."""
+        self.failures = 0
+        self.backoff = RETRY_AFTER
+        self.served += 1
+
+    def record_failure(self, now: float) -> None:
+        """Count a failure, backing off further if it was a probe."""
+        self.failed += 1
+        self.failures += 1
+        if self.failures > FAILURES_UNHEALTHY:
+            self.backoff = min(self.backoff * 2, MAX_RETRY_AFTER)
+        if not self.healthy:
+            self.retry_at = now + self.backoff
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        """Return the health for diagnostics."""
+        return {
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "retry_in": max(0.0, round(self.retry_at - now, 1)),
+            "served": self.served,
+            "failed": self.failed,
+        }
+
+
+class BlasterBalancer:
+    """Health of every blaster, shared by the entries sending through them."""
+
+    def __init__(self) -> None:
+        """Initialize the balancer."""
+        self._health: Dict[Hashable, BlasterHealth] = {}
+
+    def health(self, key: Hashable) -> BlasterHealth:
+        """Return the health of a blaster, creating it on first use."""
+        if (health := self._health.get(key)) is None:
+            health = self._health[key] = BlasterHealth()
+        return health
+
+    def rank(self, candidates: Sequence[tuple[Hashable, int, int]]) -> list[int]:
+        """Return the order to try candidates in, as indices.
+
+        Each candidate is a blaster key, its weight and its current load.
+        Blasters that may not take a press are kept last, as a last resort.
+        """
+        now = time.monotonic()
+        return sorted(
+            range(len(candidates)),
+            key=lambda index: (
+                not self.health(candidates[index][0]).available(now),
+                candidates[index][2] / max(candidates[index][1], 1),
+                index,
+            ),
+        )
+
+    def claim(self, key: Hashable) -> None:
+        """Take a press on a blaster, probing it if it is unhealthy."""
+        self.health(key).claim(time.monotonic())
+
+    def record_success(self, key: Hashable) -> None:
+        """Record that a blaster sent a press."""
+        self.health(key).record_success()
+
+    def record_failure(self, key: Hashable) -> bool:
+        """Record that a blaster failed, returning whether it is now unhealthy."""
+        health = self.health(key)
+        was_healthy = health.healthy
+        health.record_failure(time.monotonic())
+        return was_healthy and not health.healthy
+
+    def as_dict(self, key: Hashable) -> Dict[str, Any]:
+        """Return the health of a blaster for diagnostics."""
+        return self.health(key).as_dict(time.monotonic())
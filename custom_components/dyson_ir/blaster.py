@@ -0,0 +1,150 @@
+"""Compiled blaster action plans for Dyson IR."""
+import logging
+from typing import Any, Optional
+
+from homeassistant.core import Context, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import script
+
+from .const import DOMAIN, IR_CODE_KEYS, IR_CODE_PLACEHOLDER
+
+_LOGGER = logging.getLogger(__name__)
+
+SlotPath = tuple[Any, ...]
+
+TARGET_KEYS = ("entity_id", "device_id", "area_id")
+
+
+def _find_slots(obj: Any, path: SlotPath, slots: list[tuple[SlotPath, bool]]) -> None:
+    """Record the path of every IR code placeholder below obj."""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in IR_CODE_KEYS and value == IR_CODE_PLACEHOLDER:
+                slots.append(((*path, key), key == "command"))
+            elif isinstance(value, (dict, list)):
+                _find_slots(value, (*path, key), slots)
+    elif isinstance(obj, list):
+        for index, item in enumerate(obj):
+            _find_slots(item, (*path, index), slots)
+
+
+def _target_key(blaster_actions: list[dict[str, Any]]) -> tuple[tuple[str, str], ...]:
+    """Identify the blaster(s) the actions transmit through.
+
+    The key is a sorted tuple of (kind, id) pairs. Actions without an entity,
+    device or area target are identified by the services they call.
+    """
+    targets: set[tuple[str, str]] = set()
+    for action in blaster_actions:
+        if not isinstance(action, dict):
+            continue
+        for section in ("target", "data"):
+            data = action.get(section)
+            if not isinstance(data, dict):
+                continue
+            for key in TARGET_KEYS:
+                value = data.get(key)
+                for item in value if isinstance(value, list) else [value]:
+                    if isinstance(item, str):
+                        targets.add((key, item))
+    if targets:
+        return tuple(sorted(targets))
+    return tuple(
+        sorted(
+            {
+                ("service", str(action.get("service") or action.get("action")))
+                for action in blaster_actions
+                if isinstance(action, dict)
+            }
+        )
+    )
+
+
+@callback
+def async_device_key(
+    hass: HomeAssistant, key: tuple[tuple[str, str], ...]
+) -> tuple[tuple[str, str], ...]:
+    """Return key with each entity target replaced by the device it belongs to.
+
+    Actions targeting a blaster's remote entity and those targeting its device
+    then share one transmit queue.
+    """
+    registry = er.async_get(hass)
+    resolved: set[tuple[str, str]] = set()
+    for kind, target in key:
+        if kind == "entity_id" and (entity := registry.async_get(target)) is not None:
+            if entity.device_id is not None:
+                resolved.add(("device_id", entity.device_id))
+                continue
+        resolved.add((kind, target))
+    return tuple(sorted(resolved))
+
+
+class BlasterPlan:
+    """Blaster actions with the IR code slots located once, up front.
+
+    Binding a code only copies the containers on the way to each slot; every
+    other part of the configured actions is shared between presses.
+    """
+
+    def __init__(self, blaster_actions: list[dict[str, Any]]) -> None:
+        """Compile the blaster actions."""
+        self.source = blaster_actions
+        self.target_key = _target_key(blaster_actions)
+        self._slots: list[tuple[SlotPath, bool]] = []
+        _find_slots(blaster_actions, (), self._slots)
+
+    def __bool__(self) -> bool:
+        """Return whether there is anything to run."""
+        return bool(self.source)
+
+    @property
+    def slot_count(self) -> int:
+        """Return the number of IR code slots in the actions."""
+        return len(self._slots)
+
+    @property
+    def batchable(self) -> bool:
+        """Return whether several codes can be packed into one blaster call.
+
+        Only the list form of ``command`` can carry more than one code.
+        """
+        return bool(self._slots) and all(as_list for _, as_list in self._slots)
+
+    def bind(self, code: str) -> list[dict[str, Any]]:
+        """Return the blaster actions with code filled into every slot."""
+        return self._bind([code], code)
+
+    def bind_batch(self, codes: list[str]) -> list[dict[str, Any]]:
+        """Return the blaster actions sending all codes in a single call."""
+        if not self.batchable:
+            raise ValueError("Blaster actions cannot send several codes at once")
+        return self._bind(list(codes), None)
+
+    def _bind(self, command: list[str], code: Any) -> list[dict[str, Any]]:
+        """Copy the paths to each slot and fill the slots in."""
+        root = list(self.source)
+        copied = {id(root)}
+        for path, as_list in self._slots:
+            container: Any = root
+            for key in path[:-1]:
+                child = container[key]
+                if id(child) not in copied:
+                    child = dict(child) if isinstance(child, dict) else list(child)
+                    copied.add(id(child))
+                    container[key] = child
+                container = child
+            container[path[-1]] = command if as_list else code
+        return root
+
+    async def async_run(
+        self,
+        hass: HomeAssistant,
+        actions: list[dict[str, Any]],
+        name: str,
+        context: Optional[Context] = None,
+    ) -> None:
+        """Run bound blaster actions through the script engine."""
+        script_obj = script.Script(hass, actions, name, DOMAIN)
+        await script_obj.async_run(context=context)
+        _LOGGER.debug("Executed blaster actions for %s", name)
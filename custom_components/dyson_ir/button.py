@@ -1,21 +1,21 @@
 """Button platform for Dyson IR."""
 import logging
-from typing import Any
+from typing import Dict
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import (
-    CONF_ACTION_CODE,
     CONF_ACTION_NAME,
     CONF_ACTIONS,
-    CONF_BLASTER_ACTION,
     DOMAIN,
 )
 from .coordinator import DysonIRCoordinator
 from .entity import DysonIREntity
+from .hub import async_get_hub
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,15 +25,40 @@ async def async_setup_entry(
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up button entities."""
-    coordinator: DysonIRCoordinator = hass.data[DOMAIN][config_entry.entry_id]
-    actions = config_entry.data.get(CONF_ACTIONS, [])
-
-    entities = [
-        DysonIRButton(coordinator, config_entry.entry_id, action) for action in actions
-    ]
-
-    async_add_entities(entities)
+    """Set up button entities, following later changes to the action list."""
+    coordinator = async_get_hub(hass).coordinators[config_entry.entry_id]
+    buttons: Dict[str, DysonIRButton] = {}
+
+    @callback
+    def async_sync_buttons() -> None:
+        """Add, update and remove only the buttons whose actions changed."""
+        actions = {
+            action[CONF_ACTION_NAME]: action
+            for action in config_entry.data.get(CONF_ACTIONS, [])
+        }
+        registry = er.async_get(hass)
+        for name in buttons.keys() - actions.keys():
+            button = buttons.pop(name)
+            if button.registry_entry is not None:
+                # Removing the registry entry removes the entity as well
+                registry.async_remove(button.entity_id)
+            else:
+                hass.async_create_task(button.async_remove(force_remove=True))
+        for name in buttons.keys() & actions.keys():
+            buttons[name].async_set_action(actions[name])
+        added = [
+            DysonIRButton(coordinator, config_entry.entry_id, actions[name])
+            for name in actions
+            if name not in buttons
+        ]
+        buttons.update((button.action_name, button) for button in added)
+        if added:
+            async_add_entities(added)
+
+    async_sync_buttons()
+    config_entry.async_on_unload(
+        coordinator.async_add_config_listener(async_sync_buttons)
+    )
 
 
 class DysonIRButton(DysonIREntity, ButtonEntity):
@@ -45,7 +70,7 @@ class DysonIRButton(DysonIREntity, ButtonEntity):
         """Initialize the button."""
         super().__init__(coordinator, entry_id)
         self._action_name = action[CONF_ACTION_NAME]
-        self._action_code = action[CONF_ACTION_CODE]
+        self.async_set_action(action)
 
         # Override unique_id and name for this specific button
         self._attr_name = (
@@ -55,54 +80,30 @@ class DysonIRButton(DysonIREntity, ButtonEntity):
             f"{DOMAIN}_{entry_id}_{self._action_name.lower().replace(' ', '_')}"
         )
 
-        # Load blaster config (now a list of actions from ActionSelector)
-        self._blaster_actions = coordinator.config_entry.data.get(
-            CONF_BLASTER_ACTION, []
-        )
+    @property
+    def action_name(self) -> str:
+        """Return the name of the action the button sends."""
+        return self._action_name
+
+    @callback
+    def async_set_action(self, action: dict[str, str]) -> None:
+        """Send the code of action from now on."""
+        self._code_ref = self.coordinator.library.async_ref_for(action)
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        if not self._blaster_actions:
-            _LOGGER.error("No blaster actions configured")
+        if self.coordinator.transport is None and not self.coordinator.blaster_plan:
+            _LOGGER.error("No blaster actions or transport configured")
             return
 
-        import copy
-
-        from homeassistant.helpers import script
-
-        # Deep copy to avoid mutating the original config
-        actions = copy.deepcopy(self._blaster_actions)
-
-        def inject_code(obj: Any) -> None:
-            """Recursively inject IR code into action data."""
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    if (
-                        key in ("command", "code", "value", "payload")
-                        and value == "IR_CODE"
-                    ):
-                        obj[key] = (
-                            [self._action_code]
-                            if key == "command"
-                            else self._action_code
-                        )
-                    elif isinstance(value, (dict, list)):
-                        inject_code(value)
-            elif isinstance(obj, list):
-                for item in obj:
-                    inject_code(item)
-
-        inject_code(actions)
-
         try:
-            script_obj = script.Script(
-                self.hass,
-                actions,
+            await self.coordinator.async_send_action(
+                self._action_name,
+                self.coordinator.library.resolve(self._code_ref),
                 self.name,
-                DOMAIN,
+                self._context,
+                self._priority,
             )
-            await script_obj.async_run(context=self._context)
-            _LOGGER.debug("Executed blaster actions for %s", self._action_name)
         except Exception as err:
             _LOGGER.error(
                 "Failed to execute blaster actions for %s: %s", self._action_name, err
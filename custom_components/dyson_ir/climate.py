@@ -0,0 +1,240 @@
+"""Climate platform for Dyson IR air conditioners."""
+import logging
+from typing import Any, Dict, Optional
+
+from homeassistant.components.climate import (
+    ATTR_HVAC_MODE,
+    ClimateEntity,
+    ClimateEntityFeature,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_TEMPERATURE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .climate_table import NO_MODE, ClimateCodeTable
+from .const import (
+    ATTR_FAN_MODE,
+    ATTR_MODE,
+    ATTR_SWING_MODE,
+    ATTR_TARGET_TEMPERATURE,
+    CONF_CLIMATE_MODEL,
+    CONF_DEVICE_TYPE,
+    DEVICE_TYPE_AC,
+    DOMAIN,
+)
+from .coordinator import DysonIRCoordinator
+from .entity import DysonIREntity
+from .hub import async_get_hub
+
+_LOGGER = logging.getLogger(__name__)
+
+_HVAC_MODES = {mode.value: mode for mode in HVACMode}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the climate entity of an AC from its code table."""
+    if config_entry.data.get(CONF_DEVICE_TYPE) != DEVICE_TYPE_AC:
+        return
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[config_entry.entry_id]
+    tables = hub.climate_tables
+    # Only entries with a climate entity ever read the tables
+    await tables.async_load()
+    try:
+        table = tables.get(config_entry.data[CONF_CLIMATE_MODEL])
+    except KeyError:
+        _LOGGER.error("The AC code table of %s is missing", config_entry.title)
+        return
+    climate = DysonIRClimate(coordinator, config_entry.entry_id, table)
+    async_add_entities([climate])
+
+    @callback
+    def async_update_table() -> None:
+        """Switch to the table of a reconfigured entry."""
+        model_id = coordinator.config_entry.data.get(CONF_CLIMATE_MODEL)
+        if model_id is None or climate.table is tables.get(model_id):
+            return
+        climate.table = tables.get(model_id)
+        if climate.hass is not None:
+            climate.async_write_ha_state()
+
+    config_entry.async_on_unload(
+        coordinator.async_add_config_listener(async_update_table)
+    )
+
+
+class DysonIRClimate(DysonIREntity, ClimateEntity):
+    """AC entity that sends the one code setting its whole state at once."""
+
+    _enable_turn_on_off_backwards_compatibility = False
+    _state_keys = (
+        "power",
+        ATTR_MODE,
+        ATTR_TARGET_TEMPERATURE,
+        ATTR_FAN_MODE,
+        ATTR_SWING_MODE,
+    )
+
+    def __init__(
+        self, coordinator: DysonIRCoordinator, entry_id: str, table: ClimateCodeTable
+    ) -> None:
+        """Initialize the climate entity."""
+        super().__init__(coordinator, entry_id)
+        self.table = table
+        self._attr_name = coordinator.config_entry.data.get("name")
+        self._attr_unique_id = f"{DOMAIN}_{entry_id}_climate"
+        self._attr_temperature_unit = coordinator.hass.config.units.temperature_unit
+
+    @property
+    def supported_features(self) -> ClimateEntityFeature:
+        """Return the features the code table can reach."""
+        features = (
+            ClimateEntityFeature.TARGET_TEMPERATURE | ClimateEntityFeature.TURN_ON
+        )
+        if self.table.off_code is not None:
+            features |= ClimateEntityFeature.TURN_OFF
+        if self.fan_modes:
+            features |= ClimateEntityFeature.FAN_MODE
+        if self.swing_modes:
+            features |= ClimateEntityFeature.SWING_MODE
+        return features
+
+    @property
+    def hvac_modes(self) -> list[HVACMode]:
+        """Return the modes of the code table Home Assistant knows."""
+        modes = [_HVAC_MODES[mode] for mode in self.table.modes if mode in _HVAC_MODES]
+        if self.table.off_code is not None:
+            modes.insert(0, HVACMode.OFF)
+        return modes
+
+    @property
+    def hvac_mode(self) -> Optional[HVACMode]:
+        """Return the current mode."""
+        if not self.coordinator.data.get("power"):
+            return HVACMode.OFF
+        return _HVAC_MODES.get(self._mode)
+
+    @property
+    def min_temp(self) -> float:
+        """Return the lowest temperature with codes."""
+        return self.table.min_temp
+
+    @property
+    def max_temp(self) -> float:
+        """Return the highest temperature with codes."""
+        return self.table.max_temp
+
+    @property
+    def target_temperature_step(self) -> float:
+        """Return the temperature step of the codes."""
+        return self.table.temp_step
+
+    @property
+    def target_temperature(self) -> Optional[float]:
+        """Return the temperature last set."""
+        return self.coordinator.data.get(ATTR_TARGET_TEMPERATURE)
+
+    @property
+    def fan_modes(self) -> Optional[list[str]]:
+        """Return the fan modes of the code table."""
+        if self.table.fan_modes == (NO_MODE,):
+            return None
+        return list(self.table.fan_modes)
+
+    @property
+    def fan_mode(self) -> Optional[str]:
+        """Return the fan mode last set."""
+        return self.coordinator.data.get(ATTR_FAN_MODE) if self.fan_modes else None
+
+    @property
+    def swing_modes(self) -> Optional[list[str]]:
+        """Return the swing modes of the code table."""
+        if self.table.swing_modes == (NO_MODE,):
+            return None
+        return list(self.table.swing_modes)
+
+    @property
+    def swing_mode(self) -> Optional[str]:
+        """Return the swing mode last set."""
+        return self.coordinator.data.get(ATTR_SWING_MODE) if self.swing_modes else None
+
+    @property
+    def _mode(self) -> str:
+        """Return the mode the AC runs in when on."""
+        mode = self.coordinator.data.get(ATTR_MODE)
+        return mode if mode in self.table.modes else self.table.modes[0]
+
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+        """Set the mode, turning the AC off for HVACMode.OFF."""
+        if hvac_mode == HVACMode.OFF:
+            await self._async_set_state({"power": False})
+            return
+        await self._async_set_state({"power": True, ATTR_MODE: hvac_mode.value})
+
+    async def async_set_temperature(self, **kwargs: Any) -> None:
+        """Set the temperature, and the mode if one is given."""
+        target: Dict[str, Any] = {}
+        if (temperature := kwargs.get(ATTR_TEMPERATURE)) is not None:
+            target[ATTR_TARGET_TEMPERATURE] = temperature
+        if (hvac_mode := kwargs.get(ATTR_HVAC_MODE)) is not None:
+            if hvac_mode == HVACMode.OFF:
+                target["power"] = False
+            else:
+                target.update({"power": True, ATTR_MODE: HVACMode(hvac_mode).value})
+        await self._async_set_state(target)
+
+    async def async_set_fan_mode(self, fan_mode: str) -> None:
+        """Set the fan mode."""
+        await self._async_set_state({ATTR_FAN_MODE: fan_mode})
+
+    async def async_set_swing_mode(self, swing_mode: str) -> None:
+        """Set the swing mode."""
+        await self._async_set_state({ATTR_SWING_MODE: swing_mode})
+
+    async def async_turn_on(self) -> None:
+        """Turn the AC on in the mode it was last in."""
+        await self._async_set_state({"power": True})
+
+    async def async_turn_off(self) -> None:
+        """Turn the AC off."""
+        await self._async_set_state({"power": False})
+
+    async def _async_set_state(self, target: Dict[str, Any]) -> None:
+        """Send the code of the AC state that applies target to the current one."""
+        table = self.table
+        data = self.coordinator.data
+        state = {
+            "power": data.get("power", False),
+            ATTR_MODE: self._mode,
+            ATTR_TARGET_TEMPERATURE: data.get(ATTR_TARGET_TEMPERATURE)
+            or table.min_temp,
+            ATTR_FAN_MODE: data.get(ATTR_FAN_MODE) or table.fan_modes[0],
+            ATTR_SWING_MODE: data.get(ATTR_SWING_MODE) or table.swing_modes[0],
+            **target,
+        }
+        if not state["power"] and "power" not in target:
+            # Settings changed while off are sent when the AC is turned on
+            self.coordinator.set_device_state(state)
+            return
+        if state["power"]:
+            code = table.lookup(
+                state[ATTR_MODE],
+                state[ATTR_TARGET_TEMPERATURE],
+                state[ATTR_FAN_MODE],
+                state[ATTR_SWING_MODE],
+            )
+        else:
+            code = table.off_code
+        if code is None:
+            raise HomeAssistantError(f"{self.name} has no IR code for {state}")
+        await self.coordinator.async_send(
+            code, self.name, self._context, self._priority
+        )
+        self.coordinator.set_device_state(state)
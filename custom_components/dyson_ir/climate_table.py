@@ -0,0 +1,246 @@
+"""Full-state IR code tables for air conditioners.
+
+AC remotes send the whole state in every frame, so an AC needs one code per
+(mode, temperature, fan mode, swing mode) rather than one per button. A
+:class:`ClimateCodeTable` keeps each distinct code once and a flat index of
+positions into them, so looking up the code of a state is a few dictionary
+lookups and one array access.
+
+Tables are read from SmartIR climate device files, whose ``commands`` are
+nested by mode, fan mode, optionally swing mode, and temperature, e.g.
+``{"off": "...", "cool": {"low": {"16": "...", "17": "..."}}}``. Modes whose
+codes do not depend on the temperature may leave that level out.
+"""
+import hashlib
+import json
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from .codec import InvalidIRCode, validate
+
+MODE_OFF = "off"
+# Stands in for a fan or swing mode when the remote has none
+NO_MODE = ""
+
+MAX_TABLE_SIZE = 100_000
+
+
+class InvalidClimateTable(ValueError):
+    """Raised when a climate code table cannot be read."""
+
+
+@dataclass
+class ClimateCodeTable:
+    """The codes of an AC model, indexed by the state they set."""
+
+    modes: tuple[str, ...]
+    fan_modes: tuple[str, ...]
+    swing_modes: tuple[str, ...]
+    min_temp: float
+    max_temp: float
+    temp_step: float
+    codes: list[str]
+    # Position in codes for each (mode, fan, swing, temperature), -1 if missing
+    index: array
+    off: int = -1
+    _positions: Dict[str, Dict[str, int]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Build the lookups from each mode to its place in the index."""
+        self._positions = {
+            "mode": {mode: pos for pos, mode in enumerate(self.modes)},
+            "fan": {mode: pos for pos, mode in enumerate(self.fan_modes)},
+            "swing": {mode: pos for pos, mode in enumerate(self.swing_modes)},
+        }
+        if len(self.index) != self.size:
+            raise InvalidClimateTable(
+                f"Index has {len(self.index)} entries, expected {self.size}"
+            )
+
+    @property
+    def temp_count(self) -> int:
+        """Return the number of temperatures in the range."""
+        return round((self.max_temp - self.min_temp) / self.temp_step) + 1
+
+    @property
+    def size(self) -> int:
+        """Return the number of states the index covers."""
+        return (
+            len(self.modes)
+            * len(self.fan_modes)
+            * len(self.swing_modes)
+            * self.temp_count
+        )
+
+    @property
+    def off_code(self) -> Optional[str]:
+        """Return the code that turns the AC off, if there is one."""
+        return self.codes[self.off] if self.off >= 0 else None
+
+    @property
+    def model_id(self) -> str:
+        """Return the content address of the table."""
+        text = json.dumps(self.as_dict(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(text.encode()).hexdigest()[:24]
+
+    def temp_position(self, temperature: float) -> Optional[int]:
+        """Return the position of the nearest temperature on the range."""
+        pos = round((temperature - self.min_temp) / self.temp_step)
+        return pos if 0 <= pos < self.temp_count else None
+
+    def row(self, mode_pos: int, fan_pos: int, swing_pos: int) -> int:
+        """Return where the temperatures of a mode, fan and swing start."""
+        row = (mode_pos * len(self.fan_modes) + fan_pos) * len(self.swing_modes)
+        return (row + swing_pos) * self.temp_count
+
+    def lookup(
+        self,
+        mode: str,
+        temperature: float,
+        fan_mode: Optional[str] = None,
+        swing_mode: Optional[str] = None,
+    ) -> Optional[str]:
+        """Return the code that sets a state, None if the table has none."""
+        if mode == MODE_OFF:
+            return self.off_code
+        positions = self._positions
+        mode_pos = positions["mode"].get(mode)
+        temp_pos = self.temp_position(temperature)
+        if mode_pos is None or temp_pos is None:
+            return None
+        fan_pos = positions["fan"].get(fan_mode or NO_MODE, 0)
+        swing_pos = positions["swing"].get(swing_mode or NO_MODE, 0)
+        code = self.index[self.row(mode_pos, fan_pos, swing_pos) + temp_pos]
+        return self.codes[code] if code >= 0 else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the table in its stored form."""
+        return {
+            "modes": list(self.modes),
+            "fan_modes": list(self.fan_modes),
+            "swing_modes": list(self.swing_modes),
+            "min_temp": self.min_temp,
+            "max_temp": self.max_temp,
+            "temp_step": self.temp_step,
+            "codes": self.codes,
+            "index": self.index.tolist(),
+            "off": self.off,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ClimateCodeTable":
+        """Return a table from its stored form."""
+        return cls(
+            modes=tuple(data["modes"]),
+            fan_modes=tuple(data["fan_modes"]),
+            swing_modes=tuple(data["swing_modes"]),
+            min_temp=data["min_temp"],
+            max_temp=data["max_temp"],
+            temp_step=data["temp_step"],
+            codes=data["codes"],
+            index=array("i", data["index"]),
+            off=data["off"],
+        )
+
+
+def is_climate_code_set(data: Any) -> bool:
+    """Return whether parsed JSON is a SmartIR climate device file."""
+    return (
+        isinstance(data, dict)
+        and isinstance(data.get("commands"), dict)
+        and isinstance(data.get("operationModes"), list)
+        and "minTemperature" in data
+    )
+
+
+def _as_float(value: Any) -> Optional[float]:
+    """Return value as a temperature, None if it is not one."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def from_smartir(data: Any) -> ClimateCodeTable:
+    """Build the table of a SmartIR climate device file.
+
+    Invalid codes and temperatures off the range are left out of the index.
+    """
+    if not is_climate_code_set(data):
+        raise InvalidClimateTable("Not a SmartIR climate device file")
+    min_temp = _as_float(data["minTemperature"])
+    max_temp = _as_float(data.get("maxTemperature"))
+    step = _as_float(data.get("precision", 1)) or 1.0
+    if min_temp is None or max_temp is None or max_temp < min_temp or step <= 0:
+        raise InvalidClimateTable("Invalid temperature range")
+    commands: Dict[str, Any] = data["commands"]
+    modes = tuple(
+        str(mode) for mode in data["operationModes"] if str(mode) in commands
+    )
+    fan_modes = tuple(str(mode) for mode in data.get("fanModes") or ()) or (NO_MODE,)
+    swing_modes = tuple(str(mode) for mode in data.get("swingModes") or ()) or (
+        NO_MODE,
+    )
+    if not modes:
+        raise InvalidClimateTable("No codes for any operation mode")
+
+    codes: list[str] = []
+    positions: Dict[str, int] = {}
+
+    def add(code: Any) -> int:
+        """Return the position of a code, adding it if new; -1 if invalid."""
+        if not isinstance(code, str) or not (code := code.strip()):
+            return -1
+        if (pos := positions.get(code)) is None:
+            try:
+                validate(code)
+            except InvalidIRCode:
+                return -1
+            pos = positions[code] = len(codes)
+            codes.append(code)
+        return pos
+
+    size = len(modes) * len(fan_modes) * len(swing_modes)
+    size *= round((max_temp - min_temp) / step) + 1
+    if size > MAX_TABLE_SIZE:
+        raise InvalidClimateTable(f"Table of {size} states is too large")
+    table = ClimateCodeTable(
+        modes=modes,
+        fan_modes=fan_modes,
+        swing_modes=swing_modes,
+        min_temp=min_temp,
+        max_temp=max_temp,
+        temp_step=step,
+        codes=codes,
+        index=array("i", [-1]) * size,
+    )
+
+    for mode_pos, mode in enumerate(modes):
+        for fan_pos, fan_mode in enumerate(fan_modes):
+            by_fan = commands[mode]
+            if fan_mode != NO_MODE and isinstance(by_fan, dict):
+                by_fan = by_fan.get(fan_mode)
+            for swing_pos, swing_mode in enumerate(swing_modes):
+                by_swing = by_fan
+                if swing_mode != NO_MODE and isinstance(by_swing, dict):
+                    by_swing = by_swing.get(swing_mode)
+                row = table.row(mode_pos, fan_pos, swing_pos)
+                if not isinstance(by_swing, dict):
+                    # The same code whatever the temperature
+                    pos = add(by_swing)
+                    for temp_pos in range(table.temp_count):
+                        table.index[row + temp_pos] = pos
+                    continue
+                for key, code in by_swing.items():
+                    if (temperature := _as_float(key)) is None:
+                        continue
+                    if (temp_pos := table.temp_position(temperature)) is not None:
+                        table.index[row + temp_pos] = add(code)
+
+    table.off = add(commands.get(MODE_OFF))
+    if not codes:
+        raise InvalidClimateTable("No valid codes")
+    return table
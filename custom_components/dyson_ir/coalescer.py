@@ -0,0 +1,89 @@
+"""Merging of fan changes made in quick succession for Dyson IR."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from homeassistant.core import Context, HomeAssistant
+
+from .transmit import PRIORITY_BULK
+
+FanApply = Callable[[Dict[str, Any], Optional[Context], int], Awaitable[None]]
+
+
+class FanCoalescer:
+    """Hold fan targets for a short window and send them as one change.
+
+    Targets set within the window are merged field by field, later ones
+    winning, and sent with the most urgent priority any of them asked for.
+    Targets keep merging while an earlier change is still being sent.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, apply: FanApply, window: Callable[[], float]
+    ) -> None:
+        """Initialize the coalescer.
+
+        apply sends a target; window returns the current window in seconds.
+        """
+        self.hass = hass
+        self._apply = apply
+        self._window = window
+        self._target: Dict[str, Any] = {}
+        self._context: Optional[Context] = None
+        self._priority = PRIORITY_BULK
+        self._waiters: list[asyncio.Future[None]] = []
+        self._flush: Optional[asyncio.Task[None]] = None
+        self._lock = asyncio.Lock()
+
+    async def async_set(
+        self,
+        target: Dict[str, Any],
+        context: Optional[Context],
+        priority: int,
+    ) -> None:
+        """Merge target into the held change; return once it has been sent."""
+        if not (window := self._window()) and self._flush is None:
+            async with self._lock:
+                await self._apply(target, context, priority)
+            return
+        self._target.update(target)
+        self._context = context
+        self._priority = min(self._priority, priority)
+        waiter = self.hass.loop.create_future()
+        self._waiters.append(waiter)
+        if self._flush is None:
+            self._flush = self.hass.async_create_task(self._async_coalesce(window))
+        await waiter
+
+    async def async_shutdown(self) -> None:
+        """Send the held change now."""
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+        async with self._lock:
+            await self._async_send()
+
+    async def _async_coalesce(self, window: float) -> None:
+        """Close the window and send what was merged within it."""
+        await asyncio.sleep(window)
+        async with self._lock:
+            self._flush = None
+            await self._async_send()
+
+    async def _async_send(self) -> None:
+        """Send the merged target and release everyone waiting on it."""
+        target, self._target = self._target, {}
+        waiters, self._waiters = self._waiters, []
+        context, priority = self._context, self._priority
+        self._context, self._priority = None, PRIORITY_BULK
+        if not waiters:
+            return
+        try:
+            await self._apply(target, context, priority)
+        except Exception as err:  # pylint: disable=broad-except
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(err)
+            return
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
@@ -0,0 +1,283 @@
+"""IR code formats for Dyson IR.
+
+Codes are decoded into an :class:`IRSignal`, a compact array of alternating
+pulse and space durations in microseconds, and can be encoded back into any of
+the supported formats:
+
+- ``broadlink``: Broadlink IR packets in base64, optionally prefixed ``b64:``
+- ``pronto``: Pronto hex (learned, ``0000`` type)
+- ``raw``: a list of timings, signed (``9000,-4500``) or alternating
+"""
+import base64
+import binascii
+import re
+from array import array
+from typing import Iterable, Optional
+
+FORMAT_BROADLINK = "broadlink"
+FORMAT_PRONTO = "pronto"
+FORMAT_RAW = "raw"
+
+FORMATS = [FORMAT_BROADLINK, FORMAT_PRONTO, FORMAT_RAW]
+
+BROADLINK_PREFIX = "b64:"
+BROADLINK_IR = 0x26
+BROADLINK_TICK = 269 / 8192 * 1000  # microseconds, ~32.84
+
+PRONTO_LEARNED = 0x0000
+PRONTO_CLOCK = 0.241246  # microseconds per Pronto frequency unit
+
+DEFAULT_FREQUENCY = 38000
+MAX_DURATION = 1_000_000
+# A space at least this long ends a frame, in microseconds
+FRAME_GAP = 20_000
+
+_PRONTO_RE = re.compile(
+    r"^(0000|0100|5000|5001|6000|6001|900A)(\s+[0-9A-F]{4}){3,}$", re.IGNORECASE
+)
+_RAW_RE = re.compile(r"^\[?\s*[+-]?\d+(\s*[,\s]\s*[+-]?\d+)+\s*,?\s*\]?$")
+_BASE64_RE = re.compile(r"^[A-Za-z0-9+/]+={0,2}$")
+
+
+class InvalidIRCode(ValueError):
+    """Raised when an IR code cannot be decoded."""
+
+
+class IRSignal:
+    """An IR frame as alternating pulse/space durations in microseconds."""
+
+    __slots__ = ("timings", "frequency")
+
+    def __init__(self, timings: array, frequency: int = DEFAULT_FREQUENCY) -> None:
+        """Initialize the signal."""
+        self.timings = timings
+        self.frequency = frequency
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether two signals have the same timings and carrier."""
+        if not isinstance(other, IRSignal):
+            return NotImplemented
+        return self.timings == other.timings and self.frequency == other.frequency
+
+    def __repr__(self) -> str:
+        """Return a short description of the signal."""
+        return (
+            f"IRSignal({len(self.timings)} timings, {self.frequency} Hz, "
+            f"{self.airtime} us)"
+        )
+
+    @property
+    def airtime(self) -> int:
+        """Return the total duration of the frame in microseconds."""
+        return sum(self.timings)
+
+
+def split_frames(timings: Iterable[int]) -> list[tuple[tuple[int, ...], int]]:
+    """Split timings into frames, each with the space that follows it.
+
+    Frames start and end with a pulse; the space after the last one is 0 if
+    the timings end with a pulse.
+    """
+    frames: list[tuple[tuple[int, ...], int]] = []
+    frame: list[int] = []
+    for index, duration in enumerate(timings):
+        if index % 2 and duration >= FRAME_GAP:
+            frames.append((tuple(frame), duration))
+            frame = []
+        else:
+            frame.append(duration)
+    if frame:
+        gap = frame.pop() if len(frame) % 2 == 0 else 0
+        frames.append((tuple(frame), gap))
+    return frames
+
+
+def _signal(durations: list[int], frequency: int = DEFAULT_FREQUENCY) -> IRSignal:
+    """Build a signal, validating the durations."""
+    if len(durations) < 2:
+        raise InvalidIRCode("IR code has fewer than two timings")
+    if any(d <= 0 or d > MAX_DURATION for d in durations):
+        raise InvalidIRCode("IR code has a timing out of range")
+    return IRSignal(array("I", durations), frequency)
+
+
+def detect_format(code: str) -> Optional[str]:
+    """Return the format of a code, or None if it is not a recognised format."""
+    code = code.strip()
+    if code.startswith(BROADLINK_PREFIX):
+        return FORMAT_BROADLINK
+    if _PRONTO_RE.match(code):
+        return FORMAT_PRONTO
+    if _RAW_RE.match(code):
+        return FORMAT_RAW
+    if len(code) >= 8 and len(code) % 4 == 0 and _BASE64_RE.match(code):
+        # Bare base64 is only taken for Broadlink if it is an IR packet, so
+        # that learned command names are not mistaken for codes; RF packets
+        # are not recognised either, and are sent as they are
+        try:
+            packet = base64.b64decode(code, validate=True)
+        except binascii.Error:
+            return None
+        if packet and packet[0] == BROADLINK_IR:
+            return FORMAT_BROADLINK
+    return None
+
+
+def _decode_broadlink(code: str) -> IRSignal:
+    """Decode a base64 Broadlink IR packet."""
+    code = code.strip().removeprefix(BROADLINK_PREFIX)
+    try:
+        packet = base64.b64decode(code, validate=True)
+    except binascii.Error as err:
+        raise InvalidIRCode(f"Invalid base64: {err}") from err
+    if len(packet) < 4:
+        raise InvalidIRCode("Broadlink packet is too short")
+    if packet[0] != BROADLINK_IR:
+        raise InvalidIRCode("Broadlink packet is not an IR code")
+
+    end = 4 + int.from_bytes(packet[2:4], "little")
+    if end > len(packet):
+        raise InvalidIRCode("Broadlink packet is truncated")
+
+    durations = []
+    index = 4
+    while index < end:
+        ticks = packet[index]
+        index += 1
+        if ticks == 0:
+            if index + 2 > end:
+                raise InvalidIRCode("Broadlink packet is truncated")
+            ticks = int.from_bytes(packet[index : index + 2], "big")
+            index += 2
+        durations.append(round(ticks * BROADLINK_TICK))
+    return _signal(durations)
+
+
+def _encode_broadlink(signal: IRSignal, repeat: int = 0) -> str:
+    """Encode a signal as a base64 Broadlink IR packet."""
+    data = bytearray()
+    for duration in signal.timings:
+        ticks = max(1, round(duration / BROADLINK_TICK))
+        if ticks < 256:
+            data.append(ticks)
+        else:
+            data.append(0)
+            data.extend(min(ticks, 0xFFFF).to_bytes(2, "big"))
+    packet = bytearray((BROADLINK_IR, repeat))
+    packet.extend(len(data).to_bytes(2, "little"))
+    packet.extend(data)
+    return BROADLINK_PREFIX + base64.b64encode(bytes(packet)).decode("ascii")
+
+
+def _decode_pronto(code: str) -> IRSignal:
+    """Decode a learned Pronto hex code."""
+    words = [int(word, 16) for word in code.split()]
+    kind, frequency_code, once, repeat = words[:4]
+    if kind != PRONTO_LEARNED:
+        raise InvalidIRCode(f"Unsupported Pronto code type {kind:04X}")
+    if frequency_code == 0:
+        raise InvalidIRCode("Pronto code has no carrier frequency")
+    if len(words) != 4 + 2 * (once + repeat):
+        raise InvalidIRCode("Pronto code length does not match its header")
+
+    unit = frequency_code * PRONTO_CLOCK
+    durations = [round(word * unit) for word in words[4:]]
+    return _signal(durations, round(1_000_000 / unit))
+
+
+def _encode_pronto(signal: IRSignal) -> str:
+    """Encode a signal as a learned Pronto hex code."""
+    frequency_code = round(1_000_000 / (signal.frequency * PRONTO_CLOCK))
+    unit = frequency_code * PRONTO_CLOCK
+    timings = list(signal.timings)
+    if len(timings) % 2:
+        timings.append(round(timings[-1] / 2) or 1)
+    words = [PRONTO_LEARNED, frequency_code, len(timings) // 2, 0]
+    words.extend(min(0xFFFF, max(1, round(duration / unit))) for duration in timings)
+    return " ".join(f"{word:04X}" for word in words)
+
+
+def _decode_raw(code: str) -> IRSignal:
+    """Decode a list of raw timings.
+
+    Signed lists mark spaces with a minus sign and may repeat a sign, which
+    is merged; unsigned lists simply alternate, starting with a pulse.
+    """
+    values = [int(value) for value in re.findall(r"[+-]?\d+", code)]
+    if not any(value < 0 for value in values):
+        return _signal(values)
+
+    durations: list[int] = []
+    pulse: Optional[bool] = None
+    for value in values:
+        if value == 0:
+            raise InvalidIRCode("IR code has a zero timing")
+        is_pulse = value > 0
+        if is_pulse == pulse:
+            durations[-1] += abs(value)
+        elif durations or is_pulse:
+            durations.append(abs(value))
+            pulse = is_pulse
+    return _signal(durations)
+
+
+def _encode_raw(signal: IRSignal) -> str:
+    """Encode a signal as signed raw timings."""
+    return ",".join(
+        str(duration if index % 2 == 0 else -duration)
+        for index, duration in enumerate(signal.timings)
+    )
+
+
+_DECODERS = {
+    FORMAT_BROADLINK: _decode_broadlink,
+    FORMAT_PRONTO: _decode_pronto,
+    FORMAT_RAW: _decode_raw,
+}
+
+_ENCODERS = {
+    FORMAT_BROADLINK: _encode_broadlink,
+    FORMAT_PRONTO: _encode_pronto,
+    FORMAT_RAW: _encode_raw,
+}
+
+
+def decode(code: str) -> IRSignal:
+    """Decode a code in any supported format."""
+    if (code_format := detect_format(code)) is None:
+        raise InvalidIRCode("Unrecognised IR code format")
+    return _DECODERS[code_format](code.strip())
+
+
+def encode(signal: IRSignal, code_format: str) -> str:
+    """Encode a signal in the given format."""
+    try:
+        encoder = _ENCODERS[code_format]
+    except KeyError as err:
+        raise InvalidIRCode(f"Unknown IR code format {code_format}") from err
+    return encoder(signal)
+
+
+def validate(code: str, allow_unrecognised: bool = False) -> Optional[str]:
+    """Check that a code decodes, returning its format.
+
+    Codes that match no known format, such as the names of commands learned
+    on the blaster itself, are only accepted when allow_unrecognised is set.
+    """
+    if (code_format := detect_format(code)) is None:
+        if allow_unrecognised and code.strip():
+            return None
+        raise InvalidIRCode("Unrecognised IR code format")
+    _DECODERS[code_format](code.strip())
+    return code_format
+
+
+def transcode(code: str, code_format: str) -> str:
+    """Return the code in the given format, untouched if it already is."""
+    if detect_format(code) == code_format:
+        code = code.strip()
+        if code_format == FORMAT_BROADLINK and not code.startswith(BROADLINK_PREFIX):
+            # remote.send_command only takes raw Broadlink codes with a prefix
+            code = BROADLINK_PREFIX + code
+        return code
+    return encode(decode(code), code_format)
@@ -1,5 +1,6 @@
 """Config flow for Dyson IR."""
 import logging
+import re
 from typing import Any, Dict, Optional
 
 import voluptuous as vol
@@ -7,29 +8,81 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.helpers import selector
 
+from .codec import FORMATS, InvalidIRCode, validate
 from .const import (
+    CODE_FORMAT_AS_IS,
     CONF_ACTION_CODE,
     CONF_ACTION_NAME,
     CONF_ACTIONS,
     CONF_BLASTER_ACTION,
+    CONF_BLASTER_WEIGHT,
+    CONF_CLIMATE_MODEL,
+    CONF_COALESCE_WINDOW,
+    CONF_CODE_FORMAT,
     CONF_DEVICE_TYPE,
+    CONF_EXTRA_BLASTERS,
+    CONF_FEEDBACK_ENTITY,
+    CONF_FEEDBACK_THRESHOLD,
+    CONF_MIN_GAP,
+    CONF_MORE_BLASTERS,
+    CONF_MQTT_PAYLOAD,
+    CONF_MQTT_TOPIC,
+    CONF_RECEIVER_EVENT,
+    CONF_SUPPRESS_TTL,
+    CONF_TRACE,
+    CONF_TRANSPORT,
+    CONF_TRANSPORT_HOST,
+    CONF_TRANSPORT_MAC,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_FEEDBACK_THRESHOLD,
+    DEFAULT_MIN_GAP,
+    DEFAULT_SUPPRESS_TTL,
+    DEVICE_TYPE_AC,
     DEVICE_TYPE_FAN,
     DEVICE_TYPES,
     DOMAIN,
+    IR_CODE_PLACEHOLDER,
+    MAX_BLASTER_WEIGHT,
+    TRANSPORT_BROADLINK,
+    TRANSPORT_BROADLINK_RM4,
+    TRANSPORT_MQTT,
+    TRANSPORT_SCRIPT,
+    TRANSPORTS,
 )
+from .hub import async_get_hub
+from .importer import (
+    ImportResult,
+    InvalidCodeSet,
+    load_climate_table,
+    load_code_set,
+)
+from .library import code_ref
+from .optimizer import optimize_codes
 
 _LOGGER = logging.getLogger(__name__)
 
+_MAC_RE = re.compile(r"^[0-9a-fA-F]{2}([:-]?[0-9a-fA-F]{2}){5}$")
+
+_WEIGHT = vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_BLASTER_WEIGHT))
+
 
 class DysonIRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle config flow for Dyson IR."""
 
-    VERSION = 2
+    VERSION = 3
 
     def __init__(self) -> None:
         """Initialize config flow."""
         self.config_data: Dict[str, Any] = {}
-        self.actions: list[Dict[str, str]] = []
+        # Keyed by name, so adding and removing never scans the list
+        self.actions: Dict[str, Dict[str, str]] = {}
+        self.reconfigure_entry: Optional[config_entries.ConfigEntry] = None
+        # Airtime saved on each optimized action, in milliseconds
+        self.saved_ms: Dict[str, float] = {}
+        # What importing left out, by the action it concerns
+        self.import_notes: Dict[str, list[str]] = {}
+        # Further blasters before this pass, offered again one by one
+        self.previous_blasters: list[Dict[str, Any]] = []
 
     async def async_step_user(
         self, user_input: Optional[Dict[str, Any]] = None
@@ -51,22 +104,181 @@ class DysonIRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
 
+    async def async_step_reconfigure(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Edit the blaster and actions of an entry, applied without a reload."""
+        entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        assert entry is not None
+        self.reconfigure_entry = entry
+        library = async_get_hub(self.hass).library
+        await library.async_load()
+        self.config_data = {
+            key: value for key, value in entry.data.items() if key != CONF_ACTIONS
+        }
+        self.actions = {}
+        for action in entry.data.get(CONF_ACTIONS, []):
+            name = action[CONF_ACTION_NAME]
+            try:
+                code = library.resolve(library.async_ref_for(action))
+            except KeyError:
+                _LOGGER.warning("Dropping %s, its IR code is missing", name)
+                continue
+            self.actions[name] = {CONF_ACTION_NAME: name, CONF_ACTION_CODE: code}
+        return await self.async_step_blaster()
+
     async def async_step_blaster(
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Step 2: Configure Blaster Action (using ActionSelector)."""
         if user_input is not None:
+            more = user_input.pop(CONF_MORE_BLASTERS, False)
+            # A cleared weight falls back to the default
+            self.config_data.pop(CONF_BLASTER_WEIGHT, None)
             self.config_data.update(user_input)
-            return await self.async_step_actions()
+            self.previous_blasters = self.config_data.pop(CONF_EXTRA_BLASTERS, [])
+            if more:
+                self.config_data[CONF_EXTRA_BLASTERS] = []
+                return await self.async_step_extra_blaster()
+            return await self._async_step_codes()
 
         schema = vol.Schema(
             {
-                vol.Required(CONF_BLASTER_ACTION): selector.ActionSelector(),
+                vol.Required(
+                    CONF_BLASTER_ACTION,
+                    description={
+                        "suggested_value": self.config_data.get(CONF_BLASTER_ACTION)
+                    },
+                ): selector.ActionSelector(),
+                vol.Optional(
+                    CONF_BLASTER_WEIGHT,
+                    description={
+                        "suggested_value": self.config_data.get(CONF_BLASTER_WEIGHT)
+                    },
+                ): _WEIGHT,
+                vol.Optional(
+                    CONF_MORE_BLASTERS,
+                    default=bool(self.config_data.get(CONF_EXTRA_BLASTERS)),
+                ): bool,
             }
         )
 
         return self.async_show_form(step_id="blaster", data_schema=schema)
 
+    async def async_step_extra_blaster(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Add a further blaster covering the same room."""
+        extras = self.config_data[CONF_EXTRA_BLASTERS]
+        if user_input is not None:
+            more = user_input.pop(CONF_MORE_BLASTERS, False)
+            extras.append(user_input)
+            if more:
+                return await self.async_step_extra_blaster()
+            return await self._async_step_codes()
+
+        # When reconfiguring, each pass starts from the blaster it replaces
+        previous = (
+            self.previous_blasters[len(extras)]
+            if len(extras) < len(self.previous_blasters)
+            else {}
+        )
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_BLASTER_ACTION,
+                    description={"suggested_value": previous.get(CONF_BLASTER_ACTION)},
+                ): selector.ActionSelector(),
+                vol.Optional(
+                    CONF_BLASTER_WEIGHT,
+                    description={"suggested_value": previous.get(CONF_BLASTER_WEIGHT)},
+                ): _WEIGHT,
+                vol.Optional(
+                    CONF_MORE_BLASTERS,
+                    default=len(extras) + 1 < len(self.previous_blasters),
+                ): bool,
+            }
+        )
+
+        return self.async_show_form(
+            step_id="extra_blaster",
+            data_schema=schema,
+            description_placeholders={"number": str(len(extras) + 2)},
+        )
+
+    async def _async_step_codes(self) -> Dict[str, Any]:
+        """Continue with the codes of the device."""
+        if self.config_data.get(CONF_DEVICE_TYPE) == DEVICE_TYPE_AC:
+            return await self.async_step_climate_codes()
+        return await self.async_step_actions()
+
+    async def async_step_climate_codes(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Step 3 for ACs: read the full-state code table from a SmartIR file."""
+        errors = {}
+        if user_input is not None:
+            path = user_input.get("path", "").strip()
+            if path:
+                path = self.hass.config.path(path)
+            text = user_input.get("json")
+            if (
+                not path
+                and not text
+                and self.config_data.get(CONF_CLIMATE_MODEL) is not None
+            ):
+                # Reconfiguring without a new file keeps the current table
+                return self._async_finish()
+            if path and not self.hass.config.is_allowed_path(path):
+                errors["path"] = "import_path_not_allowed"
+            else:
+                try:
+                    table = await self.hass.async_add_executor_job(
+                        load_climate_table, path, text
+                    )
+                except OSError as err:
+                    _LOGGER.debug("Cannot read climate code table: %s", err)
+                    errors["path"] = "import_not_found"
+                except InvalidCodeSet as err:
+                    _LOGGER.debug("Rejected climate code table: %s", err)
+                    errors["base"] = "invalid_climate_table"
+                else:
+                    tables = async_get_hub(self.hass).climate_tables
+                    await tables.async_load()
+                    self.config_data[CONF_CLIMATE_MODEL] = tables.async_add(table)
+                    await tables.async_save()
+                    self.config_data[CONF_ACTIONS] = []
+                    _LOGGER.debug(
+                        "Read %d codes for %d states", len(table.codes), table.size
+                    )
+                    return self._async_finish()
+
+        schema = vol.Schema(
+            {
+                vol.Optional("path"): str,
+                vol.Optional("json"): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+            }
+        )
+
+        return self.async_show_form(
+            step_id="climate_codes", data_schema=schema, errors=errors
+        )
+
+    @callback
+    def _async_finish(self) -> Dict[str, Any]:
+        """Create the entry, or update the one being reconfigured."""
+        if self.reconfigure_entry is not None:
+            # The update listener applies the change to the loaded entry
+            self.hass.config_entries.async_update_entry(
+                self.reconfigure_entry, data=self.config_data
+            )
+            return self.async_abort(reason="reconfigure_successful")
+        return self.async_create_entry(
+            title=self.config_data["name"], data=self.config_data
+        )
+
     async def async_step_actions(
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -75,43 +287,53 @@ class DysonIRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             # Handle removal first
             if remove_name := user_input.get("remove_action"):
-                self.actions = [
-                    a for a in self.actions if a[CONF_ACTION_NAME] != remove_name
-                ]
+                self.actions.pop(remove_name, None)
                 # Return the form again to show updated list
                 return await self.async_step_actions()
 
+            if user_input.get("import_codes"):
+                return await self.async_step_import_codes()
+
+            if user_input.get("optimize_codes"):
+                await self._async_optimize_actions()
+                return await self.async_step_actions()
+
             if user_input.get("add_more"):
                 return await self.async_step_add_action()
 
             if not self.actions:
                 errors["base"] = "no_actions"
             else:
-                self.config_data[CONF_ACTIONS] = self.actions
-                return self.async_create_entry(
-                    title=self.config_data["name"], data=self.config_data
+                library = async_get_hub(self.hass).library
+                await library.async_load()
+                self.config_data[CONF_ACTIONS] = library.async_store_actions(
+                    list(self.actions.values())
                 )
+                await library.async_save()
+                return self._async_finish()
 
         # Build description with current actions
-        actions_str = (
-            "\n".join([f"- {a[CONF_ACTION_NAME]}" for a in self.actions])
-            if self.actions
-            else "No actions added yet."
-        )
+        lines = []
+        for name in self.actions:
+            notes = list(self.import_notes.get(name, ()))
+            if name in self.saved_ms:
+                notes.insert(0, f"saved {self.saved_ms[name]} ms")
+            lines.append(f"- {name} ({'; '.join(notes)})" if notes else f"- {name}")
+        actions_str = "\n".join(lines) if lines else "No actions added yet."
 
         schema_dict = {
             vol.Optional("add_more", default=not bool(self.actions)): bool,
+            vol.Optional("import_codes", default=False): bool,
         }
+        if self.actions:
+            schema_dict[vol.Optional("optimize_codes", default=False)] = bool
 
         if self.actions:
             schema_dict[vol.Optional("remove_action")] = selector.SelectSelector(
                 selector.SelectSelectorConfig(
                     options=[
-                        {
-                            "label": f"Delete {a[CONF_ACTION_NAME]}",
-                            "value": a[CONF_ACTION_NAME],
-                        }
-                        for a in self.actions
+                        {"label": f"Delete {name}", "value": name}
+                        for name in self.actions
                     ],
                     mode=selector.SelectSelectorMode.DROPDOWN,
                 )
@@ -124,13 +346,42 @@ class DysonIRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def _async_optimize_actions(self) -> None:
+        """Shorten the codes of the actions, noting the airtime saved."""
+        results = await self.hass.async_add_executor_job(
+            optimize_codes,
+            {name: action[CONF_ACTION_CODE] for name, action in self.actions.items()},
+        )
+        for name, result in results.items():
+            if result.saved:
+                self.actions[name][CONF_ACTION_CODE] = result.code
+                self.saved_ms[name] = round(
+                    self.saved_ms.get(name, 0) + result.saved / 1000, 1
+                )
+
     async def async_step_add_action(
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Sub-step to add a single action."""
+        errors = {}
         if user_input is not None:
-            self.actions.append(user_input)
-            return await self.async_step_actions()
+            code = user_input[CONF_ACTION_CODE].strip()
+            if user_input[CONF_ACTION_NAME] in self.actions:
+                errors[CONF_ACTION_NAME] = "duplicate_action"
+            try:
+                # Learned command names are passed through to the blaster
+                validate(code, allow_unrecognised=True)
+            except InvalidIRCode as err:
+                _LOGGER.debug(
+                    "Rejected IR code for %s: %s", user_input[CONF_ACTION_NAME], err
+                )
+                errors[CONF_ACTION_CODE] = "invalid_ir_code"
+            if not errors:
+                self.actions[user_input[CONF_ACTION_NAME]] = {
+                    **user_input,
+                    CONF_ACTION_CODE: code,
+                }
+                return await self.async_step_actions()
 
         schema = vol.Schema(
             {
@@ -139,7 +390,95 @@ class DysonIRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
 
-        return self.async_show_form(step_id="add_action", data_schema=schema)
+        return self.async_show_form(
+            step_id="add_action", data_schema=schema, errors=errors
+        )
+
+    async def async_step_import_codes(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Sub-step to add every code of a SmartIR or Broadlink JSON file."""
+        errors = {}
+        if user_input is not None:
+            path = user_input.get("path", "").strip()
+            if path:
+                path = self.hass.config.path(path)
+            if path and not self.hass.config.is_allowed_path(path):
+                errors["path"] = "import_path_not_allowed"
+            else:
+                try:
+                    result = await self.hass.async_add_executor_job(
+                        load_code_set, path, user_input.get("json")
+                    )
+                except OSError as err:
+                    _LOGGER.debug("Cannot read code set: %s", err)
+                    errors["path"] = "import_not_found"
+                except InvalidCodeSet as err:
+                    _LOGGER.debug("Rejected code set: %s", err)
+                    errors["base"] = "invalid_import"
+                else:
+                    added = self._add_imported(result)
+                    _LOGGER.debug(
+                        "Imported %d actions, skipped %d duplicates and %d invalid"
+                        " codes: %s",
+                        added,
+                        result.duplicates + len(result.actions) - added,
+                        len(result.invalid),
+                        result.invalid,
+                    )
+                    if added:
+                        return await self.async_step_actions()
+                    errors["base"] = "import_empty"
+
+        schema = vol.Schema(
+            {
+                vol.Optional("path"): str,
+                vol.Optional("json"): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+            }
+        )
+
+        return self.async_show_form(
+            step_id="import_codes", data_schema=schema, errors=errors
+        )
+
+    def _add_imported(self, result: ImportResult) -> int:
+        """Add the imported actions, one per code, noting what was left out.
+
+        Codes are compared by their library ref, so a code that is already
+        an action is not added again under another name. A name that is
+        already taken by a different code keeps its code.
+        """
+        names = {
+            code_ref(action[CONF_ACTION_CODE]): name
+            for name, action in self.actions.items()
+        }
+        added = 0
+        for name, code in result.actions.items():
+            ref = code_ref(code)
+            aliases = [name, *result.aliases.get(name, ())]
+            if (action := self.actions.get(name)) is not None:
+                if code_ref(action[CONF_ACTION_CODE]) != ref:
+                    self._note(name, "a different imported code was not added")
+                continue
+            if (kept := names.get(ref)) is not None:
+                self._note(kept, f"also imported as {', '.join(aliases)}")
+                continue
+            self.actions[name] = {CONF_ACTION_NAME: name, CONF_ACTION_CODE: code}
+            names[ref] = name
+            if len(aliases) > 1:
+                self._note(name, f"also imported as {', '.join(aliases[1:])}")
+            added += 1
+        for name in result.conflicts:
+            self._note(name, "the file has other codes under this name")
+        return added
+
+    def _note(self, name: str, note: str) -> None:
+        """Show a note next to an action in the actions list."""
+        notes = self.import_notes.setdefault(name, [])
+        if note not in notes:
+            notes.append(note)
 
     @staticmethod
     @callback
@@ -159,16 +498,91 @@ class DysonIROptionsFlow(config_entries.OptionsFlow):
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Manage options."""
+        errors: Dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            errors = _validate_transport(user_input)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
 
+        options = self.config_entry.options if user_input is None else user_input
         options_schema = vol.Schema(
             {
                 vol.Optional(
-                    "update_interval",
-                    default=self.config_entry.options.get("update_interval", 300),
-                ): int,
+                    CONF_MIN_GAP,
+                    default=options.get(CONF_MIN_GAP, DEFAULT_MIN_GAP),
+                ): vol.All(int, vol.Range(min=0, max=5000)),
+                vol.Optional(
+                    CONF_COALESCE_WINDOW,
+                    default=options.get(
+                        CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW
+                    ),
+                ): vol.All(int, vol.Range(min=0, max=5000)),
+                vol.Optional(
+                    CONF_CODE_FORMAT,
+                    default=options.get(CONF_CODE_FORMAT, CODE_FORMAT_AS_IS),
+                ): vol.In([CODE_FORMAT_AS_IS, *FORMATS]),
+                vol.Optional(
+                    CONF_FEEDBACK_ENTITY,
+                    description={"suggested_value": options.get(CONF_FEEDBACK_ENTITY)},
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "binary_sensor", "switch"]
+                    )
+                ),
+                vol.Optional(
+                    CONF_FEEDBACK_THRESHOLD,
+                    default=options.get(
+                        CONF_FEEDBACK_THRESHOLD, DEFAULT_FEEDBACK_THRESHOLD
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_RECEIVER_EVENT,
+                    description={"suggested_value": options.get(CONF_RECEIVER_EVENT)},
+                ): str,
+                vol.Optional(
+                    CONF_SUPPRESS_TTL,
+                    default=options.get(CONF_SUPPRESS_TTL, DEFAULT_SUPPRESS_TTL),
+                ): vol.All(int, vol.Range(min=0, max=86400)),
+                vol.Optional(
+                    CONF_TRANSPORT,
+                    default=options.get(CONF_TRANSPORT, TRANSPORT_SCRIPT),
+                ): vol.In(TRANSPORTS),
+                vol.Optional(
+                    CONF_TRANSPORT_HOST,
+                    description={"suggested_value": options.get(CONF_TRANSPORT_HOST)},
+                ): str,
+                vol.Optional(
+                    CONF_TRANSPORT_MAC,
+                    description={"suggested_value": options.get(CONF_TRANSPORT_MAC)},
+                ): str,
+                vol.Optional(
+                    CONF_MQTT_TOPIC,
+                    description={"suggested_value": options.get(CONF_MQTT_TOPIC)},
+                ): str,
+                vol.Optional(
+                    CONF_MQTT_PAYLOAD,
+                    default=options.get(CONF_MQTT_PAYLOAD, IR_CODE_PLACEHOLDER),
+                ): str,
+                vol.Optional(CONF_TRACE, default=options.get(CONF_TRACE, False)): bool,
             }
         )
 
-        return self.async_show_form(step_id="init", data_schema=options_schema)
+        return self.async_show_form(
+            step_id="init", data_schema=options_schema, errors=errors
+        )
+
+
+def _validate_transport(options: Dict[str, Any]) -> Dict[str, str]:
+    """Return the errors of the transport settings in options."""
+    transport = options.get(CONF_TRANSPORT, TRANSPORT_SCRIPT)
+    errors: Dict[str, str] = {}
+    if transport in (TRANSPORT_BROADLINK, TRANSPORT_BROADLINK_RM4):
+        if not options.get(CONF_TRANSPORT_HOST):
+            errors[CONF_TRANSPORT_HOST] = "transport_host_required"
+        if not _MAC_RE.match(options.get(CONF_TRANSPORT_MAC, "")):
+            errors[CONF_TRANSPORT_MAC] = "invalid_mac"
+    elif transport == TRANSPORT_MQTT:
+        topic = options.get(CONF_MQTT_TOPIC, "")
+        if not topic or "+" in topic or "#" in topic:
+            errors[CONF_MQTT_TOPIC] = "invalid_mqtt_topic"
+    return errors
@@ -13,9 +13,20 @@ DEVICE_TYPES = [DEVICE_TYPE_FAN, DEVICE_TYPE_LIGHT, DEVICE_TYPE_AC]
 CONF_ACTIONS = "actions"
 CONF_ACTION_NAME = "name"
 CONF_ACTION_CODE = "ir_code"
+CONF_ACTION_CODE_REF = "ir_code_ref"
 CONF_DEVICE_ID = "device_id"
 CONF_BLASTER_ACTION = "blaster_action"
 CONF_DEVICE_TYPE = "device_type"
+# Content address of the code table an AC entry sends from
+CONF_CLIMATE_MODEL = "climate_model"
+
+# Format codes are converted to before they are sent, "as_is" sends them verbatim
+CONF_CODE_FORMAT = "code_format"
+CODE_FORMAT_AS_IS = "as_is"
+
+# Blaster action placeholder and the action data keys it may appear under
+IR_CODE_PLACEHOLDER = "IR_CODE"
+IR_CODE_KEYS = ("command", "code", "value", "payload")
 
 # Speed settings
 SPEED_OFF = 0
@@ -23,10 +34,59 @@ SPEED_LOW = 33
 SPEED_MEDIUM = 66
 SPEED_HIGH = 100
 
-# Update intervals (seconds)
-COORDINATOR_UPDATE_INTERVAL = 300
+# Transmit scheduling
+CONF_MIN_GAP = "min_frame_gap"
+DEFAULT_MIN_GAP = 150  # milliseconds between frames on one blaster
+MAX_QUEUE_DEPTH = 32
+
+# Further blasters covering the same room, each with its blaster actions and
+# weight; presses go to the least-loaded healthy one
+CONF_EXTRA_BLASTERS = "extra_blasters"
+CONF_BLASTER_WEIGHT = "blaster_weight"
+CONF_MORE_BLASTERS = "more_blasters"
+DEFAULT_BLASTER_WEIGHT = 1
+MAX_BLASTER_WEIGHT = 10
+
+# Fan targets set within this window are merged and sent as one net change
+CONF_COALESCE_WINDOW = "coalesce_window"
+DEFAULT_COALESCE_WINDOW = 250  # milliseconds
+
+# Optional entity reporting whether the device is powered, e.g. a power sensor
+CONF_FEEDBACK_ENTITY = "feedback_entity"
+CONF_FEEDBACK_THRESHOLD = "feedback_threshold"
+DEFAULT_FEEDBACK_THRESHOLD = 5.0  # watts above which the device counts as on
+
+# Optional direct transport, used instead of running the blaster actions
+CONF_TRANSPORT = "transport"
+CONF_TRANSPORT_HOST = "transport_host"
+CONF_TRANSPORT_MAC = "transport_mac"
+CONF_MQTT_TOPIC = "mqtt_topic"
+CONF_MQTT_PAYLOAD = "mqtt_payload"
+TRANSPORT_SCRIPT = "script"
+TRANSPORT_BROADLINK = "broadlink"
+TRANSPORT_BROADLINK_RM4 = "broadlink_rm4"
+TRANSPORT_MQTT = "mqtt"
+TRANSPORTS = [
+    TRANSPORT_SCRIPT,
+    TRANSPORT_BROADLINK,
+    TRANSPORT_BROADLINK_RM4,
+    TRANSPORT_MQTT,
+]
+
+# Skip actions that would not change the estimated state, while it is this fresh
+CONF_SUPPRESS_TTL = "suppress_ttl"
+DEFAULT_SUPPRESS_TTL = 0  # seconds, 0 always sends
+
+# Event fired by IR receivers with each code they hear, e.g. from ESPHome
+CONF_RECEIVER_EVENT = "receiver_event"
+
+# Keep a trace of the most recent presses of an entry, for profiling
+CONF_TRACE = "trace"
 
 # Device attributes
 ATTR_OSCILLATING = "oscillating"
 ATTR_SPEED = "speed"
 ATTR_MODE = "mode"
+ATTR_TARGET_TEMPERATURE = "target_temperature"
+ATTR_FAN_MODE = "fan_mode"
+ATTR_SWING_MODE = "swing_mode"
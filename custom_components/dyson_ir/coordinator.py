@@ -1,35 +1,752 @@
 """Data coordinator for Dyson IR devices."""
+import asyncio
 import logging
-from datetime import timedelta
-from typing import Any, Dict
+import math
+import time
+from typing import Any, Dict, Hashable, Iterable, Optional, Union
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .blaster import BlasterPlan, async_device_key
+from .coalescer import FanCoalescer
+from .codec import InvalidIRCode, decode, transcode
+from .const import (
+    CODE_FORMAT_AS_IS,
+    CONF_ACTION_NAME,
+    CONF_ACTIONS,
+    CONF_BLASTER_ACTION,
+    CONF_BLASTER_WEIGHT,
+    CONF_COALESCE_WINDOW,
+    CONF_CODE_FORMAT,
+    CONF_EXTRA_BLASTERS,
+    CONF_FEEDBACK_ENTITY,
+    CONF_FEEDBACK_THRESHOLD,
+    CONF_MIN_GAP,
+    CONF_MQTT_PAYLOAD,
+    CONF_MQTT_TOPIC,
+    CONF_RECEIVER_EVENT,
+    CONF_SUPPRESS_TTL,
+    CONF_TRACE,
+    CONF_TRANSPORT,
+    CONF_TRANSPORT_HOST,
+    CONF_TRANSPORT_MAC,
+    DEFAULT_BLASTER_WEIGHT,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_FEEDBACK_THRESHOLD,
+    DEFAULT_MIN_GAP,
+    DEFAULT_SUPPRESS_TTL,
+)
+from .feedback import MAX_ATTEMPTS, FeedbackSource, async_deliver
+from .hub import async_get_hub
+from .library import code_ref
+from .planner import (
+    DEFAULT_FRAME_COST,
+    KIND_FIELDS,
+    KIND_POWER,
+    FanPlanner,
+    FanState,
+    UnreachableState,
+)
+from .telemetry import PressSpan
+from .transmit import PRIORITY_BULK, Transmission, TransmitQueueFull
+from .transport import Transport, TransportError, create_transport
+
 _LOGGER = logging.getLogger(__name__)
 
+# A sequence step is either an IR code or a delay in seconds
+SequenceStep = Union[str, float]
+# A blaster an entry can send through: its key, weight, actions and transport
+BlasterRoute = tuple[Hashable, int, BlasterPlan, Optional[Transport]]
+
 
 class DysonIRCoordinator(DataUpdateCoordinator):
     """Data coordinator for Dyson IR devices."""
 
     def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
         """Initialize coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name="Dyson IR",
-            update_interval=timedelta(
-                seconds=config_entry.options.get("update_interval", 300)
-            ),
-        )
+        # IR is send-only, so the coordinator never polls: state is pushed in
+        # through set_device_state
+        super().__init__(hass, _LOGGER, name="Dyson IR", update_interval=None)
         self.config_entry = config_entry
-        self._device_state: Dict[str, Any] = {
-            "power": False,
-            "speed": 0,
-            "oscillating": False,
-            "heat": False,
-        }
+        hub = async_get_hub(hass)
+        self._device_state: Dict[str, Any] = hub.device_state(config_entry.entry_id)
+        self._state_store = hub.state_store
+        self.data = self._device_state
+        self._blaster_plan = BlasterPlan(
+            config_entry.data.get(CONF_BLASTER_ACTION, [])
+        )
+        self._extra_source: Optional[list] = None
+        self._extra_blasters: list[tuple[BlasterPlan, int]] = []
+        self._scheduler = hub.scheduler
+        self._balancer = hub.balancer
+        # The blaster that sent the last transmission of this entry
+        self.last_blaster: Optional[Hashable] = None
+        self._telemetry = hub.telemetry
+        self.library = hub.library
+        self._delivery = hub.delivery
+        self._transports = hub.transports
+        self._transport_source: Optional[tuple] = None
+        self._transport: Optional[Transport] = None
+        self.feedback: Optional[FeedbackSource] = None
+        self._feedback_unsub: Optional[CALLBACK_TYPE] = None
+        self._receivers = hub.receivers
+        self._receiver_unsub: Optional[CALLBACK_TYPE] = None
+        # When the blaster last finished sending for this entry, monotonic
+        self.transmitted_at = -math.inf
+        self._config_listeners: list[CALLBACK_TYPE] = []
+        self._state_listeners: Dict[str, list[CALLBACK_TYPE]] = {}
+        # When each state key was last set, to know how far to trust it
+        self._state_set_at: Dict[str, float] = {}
+        self._actions_source: Optional[list] = None
+        self._action_codes: Dict[str, str] = {}
+        self._native_source: tuple[Dict[str, str], str] = ({}, CODE_FORMAT_AS_IS)
+        self._native_codes: Dict[str, str] = {}
+        self._planner_source: tuple[Dict[str, str], float] = ({}, 0.0)
+        self._planner: Optional[FanPlanner] = None
+        self._fan = FanCoalescer(
+            hass, self._async_apply_fan_state, lambda: self.coalesce_window
+        )
+
+    @callback
+    def async_setup_feedback(self) -> None:
+        """Follow the feedback entity in the options, if it changed."""
+        options = self.config_entry.options
+        entity_id = options.get(CONF_FEEDBACK_ENTITY)
+        threshold = options.get(CONF_FEEDBACK_THRESHOLD, DEFAULT_FEEDBACK_THRESHOLD)
+        wanted = (entity_id, threshold) if entity_id else None
+        if (feedback := self.feedback) is not None:
+            if (feedback.entity_id, feedback.threshold) == wanted:
+                return
+        elif wanted is None:
+            return
+        if self._feedback_unsub is not None:
+            self._feedback_unsub()
+            self._feedback_unsub = None
+        self.feedback = None
+        if entity_id:
+            self.feedback = FeedbackSource(self.hass, entity_id, threshold)
+            self._feedback_unsub = self.feedback.async_listen(self.async_feedback_power)
+
+    @callback
+    def async_setup_receiver(self) -> None:
+        """Listen for the receiver event in the options, re-indexing the codes."""
+        if self._receiver_unsub is not None:
+            self._receiver_unsub()
+            self._receiver_unsub = None
+        if event_type := self.config_entry.options.get(CONF_RECEIVER_EVENT):
+            self._receiver_unsub = self._receivers.async_register(self, event_type)
+
+    @callback
+    def async_setup_tracing(self) -> None:
+        """Keep press traces of the entry if the options ask for it."""
+        self._telemetry.async_set_tracing(
+            self.config_entry.entry_id, self.config_entry.options.get(CONF_TRACE, False)
+        )
+
+    @callback
+    def async_add_config_listener(self, update: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call update whenever the entry is reconfigured in place."""
+        self._config_listeners.append(update)
+
+        @callback
+        def remove() -> None:
+            self._config_listeners.remove(update)
+
+        return remove
+
+    @callback
+    def async_reconfigure(self) -> None:
+        """Apply a changed entry without reloading it.
+
+        Blaster actions, transport, codes and planner are rebuilt on next use
+        since they track the entry; feedback, receivers and tracing are rewired
+        here, and the platforms add or remove only the entities that changed.
+        """
+        self.async_setup_feedback()
+        self.async_setup_receiver()
+        self.async_setup_tracing()
+        # Re-encode now rather than on the next press; unchanged codes are kept
+        self._encode_action_codes()
+        for update in list(self._config_listeners):
+            update()
+        self.async_update_listeners()
+
+    @property
+    def blaster_plan(self) -> BlasterPlan:
+        """Return the compiled blaster actions, recompiling if the entry changed."""
+        blaster_actions = self.config_entry.data.get(CONF_BLASTER_ACTION, [])
+        if self._blaster_plan.source is not blaster_actions:
+            self._blaster_plan = BlasterPlan(blaster_actions)
+        return self._blaster_plan
+
+    @property
+    def extra_blasters(self) -> list[tuple[BlasterPlan, int]]:
+        """Return the compiled further blasters of the entry, with their weights."""
+        extras = self.config_entry.data.get(CONF_EXTRA_BLASTERS, [])
+        if self._extra_source is not extras:
+            self._extra_source = extras
+            self._extra_blasters = [
+                (
+                    BlasterPlan(extra[CONF_BLASTER_ACTION]),
+                    extra.get(CONF_BLASTER_WEIGHT, DEFAULT_BLASTER_WEIGHT),
+                )
+                for extra in extras
+            ]
+        return self._extra_blasters
+
+    @property
+    def blaster_routes(self) -> list[BlasterRoute]:
+        """Return every blaster the entry can send through, in configured order.
+
+        The direct transport, if any, belongs to the first blaster.
+        """
+        weight = self.config_entry.data.get(
+            CONF_BLASTER_WEIGHT, DEFAULT_BLASTER_WEIGHT
+        )
+        routes: list[BlasterRoute] = [
+            (self.blaster_key, weight, self.blaster_plan, self.transport)
+        ]
+        for plan, extra_weight in self.extra_blasters:
+            key = async_device_key(self.hass, plan.target_key)
+            routes.append((key, extra_weight, plan, None))
+        return routes
+
+    @property
+    def transport(self) -> Optional[Transport]:
+        """Return the direct transport, or None to run the blaster actions."""
+        options = self.config_entry.options
+        source = tuple(
+            options.get(key)
+            for key in (
+                CONF_TRANSPORT,
+                CONF_TRANSPORT_HOST,
+                CONF_TRANSPORT_MAC,
+                CONF_MQTT_TOPIC,
+                CONF_MQTT_PAYLOAD,
+            )
+        )
+        if source != self._transport_source:
+            self._transport_source = source
+            self._transport = create_transport(self.hass, options, self._transports)
+        return self._transport
+
+    @property
+    def blaster_key(self) -> Hashable:
+        """Identify the blaster this entry transmits through.
+
+        Blasters known to the device registry are keyed by their device, so
+        entries reaching one through a transport and through blaster actions
+        share its transmit queue; so does the fallback to the blaster actions.
+        """
+        if (transport := self.transport) is not None:
+            if transport.connections and (
+                device := dr.async_get(self.hass).async_get_device(
+                    connections=transport.connections
+                )
+            ):
+                return (("device_id", device.id),)
+            return transport.key
+        return async_device_key(self.hass, self.blaster_plan.target_key)
+
+    @property
+    def action_codes(self) -> Dict[str, str]:
+        """Return the IR code of each configured action, keyed by name."""
+        actions = self.config_entry.data.get(CONF_ACTIONS, [])
+        if self._actions_source is not actions:
+            self._actions_source = actions
+            self._action_codes = {}
+            for action in actions:
+                try:
+                    self._action_codes[action[CONF_ACTION_NAME]] = (
+                        self.library.resolve(self.library.async_ref_for(action))
+                    )
+                except KeyError:
+                    _LOGGER.error(
+                        "IR code for %s of %s is missing from the code library",
+                        action[CONF_ACTION_NAME],
+                        self.config_entry.title,
+                    )
+        return self._action_codes
+
+    @property
+    def code_format(self) -> str:
+        """Return the format the blaster expects codes in."""
+        return self.config_entry.options.get(CONF_CODE_FORMAT, CODE_FORMAT_AS_IS)
+
+    @callback
+    def async_prepare_codes(self) -> None:
+        """Resolve and encode every action code ahead of the first press."""
+        self._encode_action_codes()
+
+    def _encode_action_codes(self) -> None:
+        """Encode every action code into the blaster's format, once."""
+        action_codes = self.action_codes
+        code_format = self.code_format
+        previous = self._native_codes if code_format == self._native_source[1] else {}
+        self._native_source = (action_codes, code_format)
+        self._native_codes = {}
+        for name, code in action_codes.items():
+            if (native := previous.get(code)) is not None:
+                self._native_codes[code] = native
+                continue
+            try:
+                self._native_codes[code] = self._encode(code, code_format)
+            except InvalidIRCode as err:
+                _LOGGER.warning(
+                    "Sending %s for %s as-is, it cannot be converted to %s: %s",
+                    name,
+                    self.config_entry.title,
+                    code_format,
+                    err,
+                )
+                self._native_codes[code] = code
+
+    @staticmethod
+    def _encode(code: str, code_format: str) -> str:
+        """Return code converted to code_format."""
+        if code_format == CODE_FORMAT_AS_IS:
+            return code
+        return transcode(code, code_format)
+
+    def native_code(self, code: str) -> str:
+        """Return the code in the format the blaster expects.
+
+        Action codes are served from the cache built at setup; anything else,
+        such as a raw code passed to a service, is converted on the fly.
+        """
+        action_codes, code_format = self._native_source
+        if action_codes is not self.action_codes or code_format != self.code_format:
+            self._encode_action_codes()
+        if (native := self._native_codes.get(code)) is not None:
+            return native
+        try:
+            return self._encode(code, self._native_source[1])
+        except InvalidIRCode as err:
+            raise HomeAssistantError(
+                f"Cannot convert IR code to {self._native_source[1]}: {err}"
+            ) from err
+
+    @property
+    def min_gap(self) -> float:
+        """Return the minimum gap between frames on the blaster, in seconds."""
+        return self.config_entry.options.get(CONF_MIN_GAP, DEFAULT_MIN_GAP) / 1000
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of transmissions waiting for this entry's blaster."""
+        return self._scheduler.queue(self.blaster_key).depth
+
+    @property
+    def planner(self) -> FanPlanner:
+        """Return the fan planner for the configured actions."""
+        action_codes, min_gap = self._planner_source
+        if (
+            self._planner is None
+            or action_codes is not self.action_codes
+            or min_gap != self.min_gap
+        ):
+            self._planner_source = (self.action_codes, self.min_gap)
+            self._planner = FanPlanner(self.action_codes, self._frame_cost)
+        return self._planner
+
+    def _frame_cost(self, name: str) -> float:
+        """Return how long an action holds the blaster, in milliseconds."""
+        try:
+            airtime = decode(self.action_codes[name]).airtime / 1000
+        except InvalidIRCode:
+            airtime = DEFAULT_FRAME_COST
+        return airtime + self.min_gap * 1000
+
+    @property
+    def coalesce_window(self) -> float:
+        """Return how long fan targets are held to be merged, in seconds."""
+        options = self.config_entry.options
+        return options.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW) / 1000
+
+    async def async_set_fan_state(
+        self,
+        target: Dict[str, Any],
+        context: Optional[Context] = None,
+        priority: int = PRIORITY_BULK,
+    ) -> None:
+        """Move the fan to target once the coalescing window closes.
+
+        Targets set within the window are merged field by field, later ones
+        winning, and only the net change from the current state is sent.
+        Returns once the merged target has been sent.
+        """
+        await self._fan.async_set(target, context, priority)
+
+    async def _async_apply_fan_state(
+        self,
+        target: Dict[str, Any],
+        context: Optional[Context],
+        priority: int,
+    ) -> None:
+        """Send the cheapest sequence of actions that reaches target."""
+        planner = self.planner
+        current = FanState.from_dict(self._device_state, planner.speed_count)
+        try:
+            plan = planner.plan(current, target)
+        except UnreachableState as err:
+            raise HomeAssistantError(
+                f"Cannot set {self.config_entry.title} to {target}: {err}"
+            ) from err
+        actions = plan.actions
+        if actions:
+            _LOGGER.debug(
+                "Sending %s to %s (%.0f ms)",
+                ", ".join(actions),
+                self.config_entry.title,
+                plan.cost,
+            )
+        action_codes = self.action_codes
+        power = self.expected_power(actions[0]) if actions else None
+        if self.feedback is not None and power is not None:
+            # Nothing after the power command takes effect unless it landed
+            confirmed, _ = await self._async_send_confirmed(
+                action_codes[actions[0]],
+                self.config_entry.title,
+                power,
+                context,
+                priority,
+            )
+            if not confirmed:
+                return
+            actions = actions[1:]
+        if actions:
+            await self.async_send_sequence(
+                [action_codes[name] for name in actions],
+                self.config_entry.title,
+                context,
+                priority,
+            )
+        self.set_device_state(plan.state.as_dict())
+
+    def expected_power(self, action: str) -> Optional[bool]:
+        """Return the power state an action sets outright, if it sets one."""
+        command = self.planner.commands.get(action)
+        if command is None or command[0] != KIND_POWER or command[1] == "toggle":
+            return None
+        return command[1] == "on"
+
+    @callback
+    def async_feedback_power(self, power: bool) -> None:
+        """Take the power reported by the feedback entity as the device state."""
+        self.set_device_state({"power": power})
+
+    @callback
+    def async_received_action(self, action: str) -> None:
+        """Apply an action an IR receiver heard, e.g. from the physical remote."""
+        planner = self.planner
+        state = FanState.from_dict(self._device_state, planner.speed_count)
+        if (predicted := planner.predict(state, action)) is None:
+            return
+        fields = KIND_FIELDS[planner.commands[action][0]]
+        self.set_device_state({field: getattr(predicted, field) for field in fields})
+
+    async def _async_send_confirmed(
+        self,
+        code: str,
+        name: str,
+        power: bool,
+        context: Optional[Context],
+        priority: int,
+        repeat: int = 1,
+    ) -> tuple[bool, int]:
+        """Send a power command until the feedback entity confirms it.
+
+        Returns whether it was confirmed and the blaster calls made.
+        """
+        assert self.feedback is not None
+        stats = self._delivery.get(self.blaster_key, code_ref(code))
+        calls = 0
+
+        async def send(repeats: int) -> None:
+            nonlocal calls
+            calls += await self.async_send_sequence(
+                [code] * max(repeats, repeat), name, context, priority
+            )
+
+        if await async_deliver(send, self.feedback, power, stats):
+            self.set_device_state({"power": power})
+            return True, calls
+        _LOGGER.warning(
+            "%s did not confirm %s turned %s after %d attempts",
+            self.feedback.entity_id,
+            self.config_entry.title,
+            "on" if power else "off",
+            MAX_ATTEMPTS,
+        )
+        if (reported := self.feedback.power) is not None:
+            self.set_device_state({"power": reported})
+        return False, calls
+
+    async def async_send_action(
+        self,
+        action: str,
+        code: str,
+        name: str,
+        context: Optional[Context] = None,
+        priority: int = PRIORITY_BULK,
+        force: bool = False,
+        repeat: int = 1,
+    ) -> Optional[int]:
+        """Transmit the code of an action, confirming power commands if possible.
+
+        Unless forced, the action is skipped when the device is believed to be
+        in the state it sets already. Returns the blaster calls made, None if
+        it was skipped.
+        """
+        if not force and self.async_suppress(action):
+            _LOGGER.debug("Not sending %s, it would change nothing", name)
+            return None
+        power = self.expected_power(action) if self.feedback is not None else None
+        if power is not None:
+            confirmed, calls = await self._async_send_confirmed(
+                code, name, power, context, priority, repeat
+            )
+            if not confirmed:
+                # Keep the state the feedback entity reported, so a retry is sent
+                return calls
+        elif repeat == 1:
+            await self.async_send(code, name, context, priority)
+            calls = 1
+        else:
+            calls = await self.async_send_sequence(
+                [code] * repeat, name, context, priority
+            )
+        self.async_assume(action)
+        return calls
+
+    @property
+    def suppress_ttl(self) -> float:
+        """Return how long the estimated state is trusted to skip commands, in s."""
+        return self.config_entry.options.get(CONF_SUPPRESS_TTL, DEFAULT_SUPPRESS_TTL)
+
+    @callback
+    def async_suppress(self, action: str) -> bool:
+        """Return whether to skip an action that would change nothing, counting it.
+
+        The estimate is only trusted for state set within the last
+        suppress_ttl seconds.
+        """
+        if not (ttl := self.suppress_ttl):
+            return False
+        planner = self.planner
+        if (command := planner.commands.get(action)) is None:
+            return False
+        now = time.monotonic()
+        for field in KIND_FIELDS[command[0]]:
+            if now - self._state_set_at.get(field, -ttl) >= ttl:
+                return False
+        state = FanState.from_dict(self._device_state, planner.speed_count)
+        if planner.predict(state, action) != state:
+            return False
+        self._telemetry.async_record_suppressed(self.config_entry.entry_id)
+        return True
+
+    @callback
+    def async_assume(self, action: str) -> None:
+        """Take the state an absolute action sets as the estimate, for suppression.
+
+        Stepping and toggling actions are left alone, their outcome is only as
+        good as the estimate they start from.
+        """
+        planner = self.planner
+        if not self.suppress_ttl or not planner.is_absolute(action):
+            return
+        state = FanState.from_dict(self._device_state, planner.speed_count)
+        if (predicted := planner.predict(state, action)) is None:
+            return
+        # Only the field the action sets; it says nothing new about power
+        field = KIND_FIELDS[planner.commands[action][0]][-1]
+        self.set_device_state({field: getattr(predicted, field)})
+
+    async def async_send(
+        self,
+        code: str,
+        name: str,
+        context: Optional[Context] = None,
+        priority: int = PRIORITY_BULK,
+    ) -> None:
+        """Transmit an IR code once the blaster is free."""
+        span = PressSpan()
+        code = self.native_code(code)
+        await self._async_transmit([code], name, context, priority, span)
+
+    async def async_send_sequence(
+        self,
+        steps: list[SequenceStep],
+        name: str,
+        context: Optional[Context] = None,
+        priority: int = PRIORITY_BULK,
+    ) -> int:
+        """Transmit IR codes and delays in order, in as few blaster calls as possible.
+
+        Consecutive codes share one blaster call when the blaster actions take
+        a list of commands. Returns the number of blaster calls made.
+        """
+        # Transports take any number of codes at once
+        batchable = self.transport is not None or self.blaster_plan.batchable
+        calls = 0
+        batch: list[str] = []
+
+        async def flush() -> None:
+            nonlocal calls
+            if not batch:
+                return
+            codes = batch.copy()
+            batch.clear()
+            groups = [codes] if batchable else [[code] for code in codes]
+            for group in groups:
+                await self._async_transmit(group, name, context, priority, PressSpan())
+                calls += 1
+
+        for step in steps:
+            if isinstance(step, str):
+                batch.append(self.native_code(step))
+                continue
+            await flush()
+            await asyncio.sleep(step)
+        await flush()
+        return calls
+
+    async def _async_transmit(
+        self,
+        codes: list[str],
+        name: str,
+        context: Optional[Context],
+        priority: int,
+        span: PressSpan,
+    ) -> None:
+        """Send native codes in one call, through the best blaster of the entry.
+
+        Blasters are tried least-loaded and healthy first, moving on to the
+        next when one fails. If the transport fails the codes are sent through
+        the blaster actions of the same blaster instead, when there are any.
+        """
+        routes = self.blaster_routes
+        if len(routes) == 1:
+            order = [0]
+        else:
+            loads = []
+            for key, weight, _, _ in routes:
+                queue = self._scheduler.queue(key)
+                loads.append((key, weight, queue.depth + queue.busy))
+            order = self._balancer.rank(loads)
+        # Binding is only needed when the blaster actions are run
+        key, _, plan, transport = routes[order[0]]
+        bound = None if transport is not None else self._bind(plan, codes)
+        span.prepared = time.perf_counter()
+        if context is None:
+            context = Context()
+        # Presses may share a context, e.g. the steps of one script, so each
+        # gets a child context to time the service call it makes
+        press_context = Context(user_id=context.user_id, parent_id=context.id)
+        self._telemetry.async_track(press_context.id, span)
+        try:
+            error: Optional[Exception] = None
+            for attempt, index in enumerate(order):
+                key, _, plan, transport = routes[index]
+                if attempt:
+                    bound = (
+                        None if transport is not None else self._bind(plan, codes)
+                    )
+                send = self._sender(
+                    codes, name, press_context, span, plan, transport, bound
+                )
+                self._balancer.claim(key)
+                try:
+                    await self._scheduler.async_transmit(
+                        key, send, priority, self.min_gap
+                    )
+                except TransmitQueueFull as err:
+                    # A full queue says nothing about the blaster's health
+                    error = err
+                except Exception as err:
+                    error = err
+                    if self._balancer.record_failure(key):
+                        _LOGGER.warning("Blaster %s is unhealthy: %s", key, err)
+                else:
+                    self._balancer.record_success(key)
+                    self.last_blaster = key
+                    self._telemetry.async_record(
+                        self.config_entry.entry_id,
+                        key,
+                        context.id,
+                        span,
+                        None,
+                        name,
+                        codes,
+                    )
+                    return
+                if attempt + 1 < len(order):
+                    _LOGGER.warning(
+                        "Failing over to the next blaster for %s: %s",
+                        self.config_entry.title,
+                        error,
+                    )
+            assert error is not None
+            self._telemetry.async_record(
+                self.config_entry.entry_id, key, context.id, span, error, name, codes
+            )
+            raise error
+        finally:
+            self._telemetry.async_untrack(press_context.id)
+
+    def _sender(
+        self,
+        codes: list[str],
+        name: str,
+        context: Context,
+        span: PressSpan,
+        plan: BlasterPlan,
+        transport: Optional[Transport],
+        bound: Optional[list[list[dict[str, Any]]]],
+    ) -> Transmission:
+        """Return the transmission sending codes through one blaster."""
+
+        async def send() -> None:
+            nonlocal bound
+            span.script_started = time.perf_counter()
+            try:
+                if transport is not None:
+                    try:
+                        await transport.async_send(codes, self.min_gap)
+                        return
+                    except TransportError as err:
+                        if not plan.source:
+                            raise
+                        _LOGGER.warning(
+                            "Falling back to the blaster actions for %s: %s",
+                            self.config_entry.title,
+                            err,
+                        )
+                    bound = self._bind(plan, codes)
+                assert bound is not None
+                for index, actions in enumerate(bound):
+                    if index:
+                        await asyncio.sleep(self.min_gap)
+                    await plan.async_run(self.hass, actions, name, context)
+            finally:
+                span.finished = time.perf_counter()
+                self.transmitted_at = time.monotonic()
+
+        return send
+
+    @staticmethod
+    def _bind(plan: BlasterPlan, codes: list[str]) -> list[list[dict[str, Any]]]:
+        """Return the blaster actions sending codes, in as few runs as possible."""
+        if len(codes) == 1:
+            return [plan.bind(codes[0])]
+        if plan.batchable:
+            return [plan.bind_batch(codes)]
+        return [plan.bind(code) for code in codes]
 
     async def _async_update_data(self) -> Dict[str, Any]:
         """Fetch data from device."""
@@ -40,6 +757,61 @@ class DysonIRCoordinator(DataUpdateCoordinator):
             raise UpdateFailed(f"Error updating Dyson IR: {err}") from err
 
     def set_device_state(self, state: Dict[str, Any]) -> None:
-        """Update internal device state."""
+        """Update internal device state, notifying only listeners of changed keys."""
+        now = time.monotonic()
+        for key in state:
+            self._state_set_at[key] = now
+        changed = [
+            key for key, value in state.items() if self._device_state.get(key) != value
+        ]
+        if not changed:
+            return
         self._device_state.update(state)
-        self.async_set_updated_data(self._device_state)
+        self._state_store.async_schedule_save()
+        self._async_notify_state(changed)
+
+    @callback
+    def async_add_state_listener(
+        self, keys: Iterable[str], update: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Call update whenever one of the device state keys changes."""
+        keys = tuple(keys)
+        for key in keys:
+            self._state_listeners.setdefault(key, []).append(update)
+
+        @callback
+        def remove() -> None:
+            for key in keys:
+                listeners = self._state_listeners[key]
+                listeners.remove(update)
+                if not listeners:
+                    del self._state_listeners[key]
+
+        return remove
+
+    @callback
+    def _async_notify_state(self, keys: Iterable[str]) -> None:
+        """Call each listener of the keys once."""
+        # A dict keeps the order listeners were added in, without repeats
+        updates: Dict[CALLBACK_TYPE, None] = {}
+        for key in keys:
+            updates.update(dict.fromkeys(self._state_listeners.get(key, ())))
+        for update in updates:
+            update()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify every listener, including those of state keys, e.g. after a poll."""
+        super().async_update_listeners()
+        self._async_notify_state(list(self._state_listeners))
+
+    async def async_shutdown(self) -> None:
+        """Send any held fan target before the entry goes away."""
+        await super().async_shutdown()
+        if self._feedback_unsub is not None:
+            self._feedback_unsub()
+            self._feedback_unsub = None
+        if self._receiver_unsub is not None:
+            self._receiver_unsub()
+            self._receiver_unsub = None
+        await self._fan.async_shutdown()
@@ -0,0 +1,85 @@
+"""Diagnostics support for Dyson IR."""
+from dataclasses import asdict
+from typing import Any, Iterable, Optional
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_MQTT_TOPIC,
+    CONF_TRANSPORT,
+    CONF_TRANSPORT_HOST,
+    CONF_TRANSPORT_MAC,
+    TRANSPORT_BROADLINK,
+    TRANSPORT_MQTT,
+    TRANSPORT_SCRIPT,
+)
+from .hub import async_get_hub
+
+TO_REDACT = {CONF_TRANSPORT_HOST, CONF_TRANSPORT_MAC, CONF_MQTT_TOPIC}
+# Blaster keys of direct transports carry the host or topic
+TRANSPORT_KINDS = {TRANSPORT_BROADLINK, TRANSPORT_MQTT}
+
+
+def _target(key: Iterable[Iterable[str]]) -> list[list[str]]:
+    """Return a blaster key as (kind, id) lists, without transport addresses."""
+    return [
+        [kind, REDACTED if kind in TRANSPORT_KINDS else value] for kind, value in key
+    ]
+
+
+def _traces(traces: Optional[list[dict[str, Any]]]) -> Optional[list[dict[str, Any]]]:
+    """Return traces with the blaster of each redacted."""
+    if traces is None:
+        return None
+    return [{**trace, "blaster": _target(trace["blaster"])} for trace in traces]
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[entry.entry_id]
+    plan = coordinator.blaster_plan
+    key = coordinator.blaster_key
+    telemetry = hub.telemetry
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "version": entry.version,
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "device_state": dict(coordinator.data),
+        "setup_timings_ms": hub.setup_timings.get(entry.entry_id),
+        "scheduled_jobs": [asdict(job) for job in hub.jobs.entry_jobs(entry.entry_id)],
+        "blaster": {
+            "target": _target(key),
+            "transport": entry.options.get(CONF_TRANSPORT, TRANSPORT_SCRIPT),
+            "code_slots": plan.slot_count,
+            "batchable": plan.batchable,
+            "code_format": coordinator.code_format,
+            "queue_depth": coordinator.queue_depth,
+            "telemetry": telemetry.blaster_stats(key).as_dict(),
+            "delivery": hub.delivery.blaster_stats(key),
+        },
+        "blasters": [
+            {
+                "target": _target(route_key),
+                "weight": weight,
+                "queue_depth": hub.scheduler.queue(route_key).depth,
+                "health": hub.balancer.as_dict(route_key),
+            }
+            for route_key, weight, _, _ in coordinator.blaster_routes
+        ],
+        "last_blaster": (
+            _target(last_blaster)
+            if (last_blaster := coordinator.last_blaster) is not None
+            else None
+        ),
+        "telemetry": telemetry.entry_stats(entry.entry_id).as_dict(),
+        "traces": _traces(telemetry.entry_traces(entry.entry_id)),
+    }
@@ -1,20 +1,51 @@
 """Base entity for Dyson IR devices."""
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo, Entity
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import DysonIRCoordinator
+from .transmit import PRIORITY_BULK, PRIORITY_INTERACTIVE
 
 
-class DysonIREntity(CoordinatorEntity[DysonIRCoordinator], Entity):
-    """Base entity for Dyson IR devices."""
+class DysonIREntity(Entity):
+    """Base entity for Dyson IR devices.
+
+    Entities only write state when a device state key they show changes,
+    rather than on every coordinator update.
+    """
+
+    _attr_should_poll = False
+    # Device state keys the entity shows
+    _state_keys: tuple[str, ...] = ()
 
     def __init__(self, coordinator: DysonIRCoordinator, entry_id: str) -> None:
         """Initialize entity."""
-        super().__init__(coordinator)
+        self.coordinator = coordinator
         self.entry_id = entry_id
         self._attr_unique_id = f"{DOMAIN}_{entry_id}"
 
+    async def async_added_to_hass(self) -> None:
+        """Listen to the state keys of the entity."""
+        await super().async_added_to_hass()
+        if self._state_keys:
+            self.async_on_remove(
+                self.coordinator.async_add_state_listener(
+                    self._state_keys, self._async_state_changed
+                )
+            )
+
+    @callback
+    def _async_state_changed(self) -> None:
+        """Write the changed device state to the state machine."""
+        self.async_write_ha_state()
+
+    @property
+    def _priority(self) -> int:
+        """Return the priority of the current change; a user's jumps ahead."""
+        if self._context is not None and self._context.user_id:
+            return PRIORITY_INTERACTIVE
+        return PRIORITY_BULK
+
     @property
     def device_info(self) -> DeviceInfo:
         """Return device info."""
@@ -0,0 +1,187 @@
+"""Fan platform for Dyson IR."""
+import logging
+from typing import Any, Dict, Optional
+
+from homeassistant.components.fan import FanEntity, FanEntityFeature
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util.percentage import (
+    percentage_to_ranged_value,
+    ranged_value_to_percentage,
+)
+
+from .const import (
+    ATTR_OSCILLATING,
+    ATTR_SPEED,
+    CONF_DEVICE_TYPE,
+    DEVICE_TYPE_FAN,
+    DOMAIN,
+)
+from .coordinator import DysonIRCoordinator
+from .entity import DysonIREntity
+from .hub import async_get_hub
+from .planner import SPEED_UNKNOWN
+
+_LOGGER = logging.getLogger(__name__)
+
+# TURN_ON and TURN_OFF only exist from Home Assistant 2024.8; before that
+# every fan can be turned on and off without declaring it
+TURN_ON_OFF = getattr(FanEntityFeature, "TURN_ON", 0) | getattr(
+    FanEntityFeature, "TURN_OFF", 0
+)
+
+PRESET_MODE_FAN = "fan"
+PRESET_MODE_HEAT = "heat"
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the fan entity, adding or removing it as power actions change."""
+    coordinator = async_get_hub(hass).coordinators[config_entry.entry_id]
+    if config_entry.data.get(CONF_DEVICE_TYPE, DEVICE_TYPE_FAN) != DEVICE_TYPE_FAN:
+        return
+    fans: list[DysonIRFan] = []
+
+    @callback
+    def async_sync_fan() -> None:
+        """Add the fan once it can be powered, remove it when it no longer can."""
+        if coordinator.planner.supports_power:
+            if not fans:
+                fan = DysonIRFan(coordinator, config_entry.entry_id)
+                fans.append(fan)
+                async_add_entities([fan])
+            return
+        if not fans:
+            _LOGGER.debug(
+                "Not adding a fan for %s, it has no power actions", config_entry.title
+            )
+            return
+        fan = fans.pop()
+        if fan.registry_entry is not None:
+            er.async_get(hass).async_remove(fan.entity_id)
+        else:
+            hass.async_create_task(fan.async_remove(force_remove=True))
+
+    async_sync_fan()
+    config_entry.async_on_unload(coordinator.async_add_config_listener(async_sync_fan))
+
+
+class DysonIRFan(DysonIREntity, FanEntity):
+    """Fan entity that reaches target states through the command planner."""
+
+    _enable_turn_on_off_backwards_compatibility = False
+    _state_keys = ("power", ATTR_SPEED, ATTR_OSCILLATING, "heat")
+
+    def __init__(self, coordinator: DysonIRCoordinator, entry_id: str) -> None:
+        """Initialize the fan."""
+        super().__init__(coordinator, entry_id)
+        self._attr_name = coordinator.config_entry.data.get("name")
+        self._attr_unique_id = f"{DOMAIN}_{entry_id}_fan"
+
+    @property
+    def supported_features(self) -> FanEntityFeature:
+        """Return the features the configured actions can reach."""
+        planner = self.coordinator.planner
+        features = FanEntityFeature(TURN_ON_OFF)
+        if planner.supports_speed:
+            features |= FanEntityFeature.SET_SPEED
+        if planner.supports_oscillation:
+            features |= FanEntityFeature.OSCILLATE
+        if planner.supports_heat:
+            features |= FanEntityFeature.PRESET_MODE
+        return features
+
+    @property
+    def speed_count(self) -> int:
+        """Return the number of speeds the fan has."""
+        return self.coordinator.planner.speed_count
+
+    @property
+    def is_on(self) -> bool:
+        """Return whether the fan is on."""
+        return bool(self.coordinator.data.get("power"))
+
+    @property
+    def percentage(self) -> Optional[int]:
+        """Return the speed as a percentage, if it is known."""
+        if not self.is_on:
+            return 0
+        speed = self.coordinator.data.get(ATTR_SPEED, SPEED_UNKNOWN)
+        if not 0 < speed <= self.speed_count:
+            return None
+        return ranged_value_to_percentage((1, self.speed_count), speed)
+
+    @property
+    def oscillating(self) -> bool:
+        """Return whether the fan is oscillating."""
+        return bool(self.coordinator.data.get(ATTR_OSCILLATING))
+
+    @property
+    def preset_modes(self) -> Optional[list[str]]:
+        """Return the modes the fan supports."""
+        if not self.coordinator.planner.supports_heat:
+            return None
+        return [PRESET_MODE_FAN, PRESET_MODE_HEAT]
+
+    @property
+    def preset_mode(self) -> Optional[str]:
+        """Return the current mode."""
+        if not self.coordinator.planner.supports_heat:
+            return None
+        if self.coordinator.data.get("heat"):
+            return PRESET_MODE_HEAT
+        return PRESET_MODE_FAN
+
+    async def async_turn_on(
+        self,
+        percentage: Optional[int] = None,
+        preset_mode: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Turn the fan on, optionally at a speed and mode."""
+        target: Dict[str, Any] = {"power": True}
+        if percentage:
+            target[ATTR_SPEED] = self._speed(percentage)
+        if preset_mode is not None:
+            target["heat"] = preset_mode == PRESET_MODE_HEAT
+        await self._async_set_state(target)
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Turn the fan off."""
+        await self._async_set_state({"power": False})
+
+    async def async_set_percentage(self, percentage: int) -> None:
+        """Set the speed, turning the fan off at 0%."""
+        if percentage == 0:
+            await self.async_turn_off()
+            return
+        await self._async_set_state(
+            {"power": True, ATTR_SPEED: self._speed(percentage)}
+        )
+
+    async def async_oscillate(self, oscillating: bool) -> None:
+        """Set oscillation."""
+        await self._async_set_state({"power": True, ATTR_OSCILLATING: oscillating})
+
+    async def async_set_preset_mode(self, preset_mode: str) -> None:
+        """Switch between fan and heat mode."""
+        await self._async_set_state(
+            {"power": True, "heat": preset_mode == PRESET_MODE_HEAT}
+        )
+
+    def _speed(self, percentage: int) -> int:
+        """Return the speed closest to a percentage."""
+        return max(
+            1, round(percentage_to_ranged_value((1, self.speed_count), percentage))
+        )
+
+    async def _async_set_state(self, target: Dict[str, Any]) -> None:
+        """Send the actions that take the fan to target."""
+        await self.coordinator.async_set_fan_state(
+            target, self._context, self._priority
+        )
@@ -0,0 +1,190 @@
+"""Delivery feedback for Dyson IR.
+
+A feedback entity, such as a smart plug's power sensor or a binary sensor,
+reports whether the device is actually powered. Power commands are confirmed
+against it, resent with backoff when confirmation is missing, and the number
+of frames each code needs on each blaster is learned from the outcome.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from homeassistant.const import STATE_ON, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+MAX_REPEATS = 4
+# First-try confirmations in a row before trying one frame fewer
+DECAY_AFTER = 5
+
+DEFAULT_CONFIRM_TIMEOUT = 5.0  # seconds, also the ceiling once learned
+MIN_CONFIRM_TIMEOUT = 0.5
+LATENCY_MARGIN = 2.0
+LATENCY_WEIGHT = 0.3
+
+
+class FeedbackSource:
+    """Read whether a device is powered from a feedback entity."""
+
+    def __init__(self, hass: HomeAssistant, entity_id: str, threshold: float) -> None:
+        """Initialize the source."""
+        self.hass = hass
+        self.entity_id = entity_id
+        self.threshold = threshold
+
+    @property
+    def power(self) -> Optional[bool]:
+        """Return whether the device is powered, or None if unknown."""
+        state = self.hass.states.get(self.entity_id)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return None
+        try:
+            return float(state.state) > self.threshold
+        except ValueError:
+            return state.state == STATE_ON
+
+    @callback
+    def async_listen(self, update: Callable[[bool], None]) -> CALLBACK_TYPE:
+        """Call update with the power reported whenever it changes."""
+
+        @callback
+        def _changed(event: Event) -> None:
+            if (power := self.power) is not None:
+                update(power)
+
+        return async_track_state_change_event(self.hass, [self.entity_id], _changed)
+
+    async def async_wait_for(self, power: bool, timeout: float) -> bool:
+        """Wait until the device reports power, returning whether it did."""
+        if self.power is power:
+            return True
+        confirmed = self.hass.loop.create_future()
+
+        @callback
+        def _changed(event: Event) -> None:
+            if self.power is power and not confirmed.done():
+                confirmed.set_result(True)
+
+        unsub = async_track_state_change_event(self.hass, [self.entity_id], _changed)
+        try:
+            return await asyncio.wait_for(confirmed, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            unsub()
+
+
+class DeliveryStats:
+    """What one code needs to be delivered reliably by one blaster."""
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.repeats = 1
+        self.latency: Optional[float] = None
+        self.sent = 0
+        self.confirmed = 0
+        self.retried = 0
+        self.missed = 0
+        self._streak = 0
+
+    @property
+    def timeout(self) -> float:
+        """Return how long to wait for confirmation before resending."""
+        if self.latency is None:
+            return DEFAULT_CONFIRM_TIMEOUT
+        return min(
+            DEFAULT_CONFIRM_TIMEOUT,
+            max(MIN_CONFIRM_TIMEOUT, self.latency * LATENCY_MARGIN),
+        )
+
+    def record(self, attempts: int, latency: Optional[float]) -> None:
+        """Record a delivery that took attempts tries, None latency if missed."""
+        self.sent += 1
+        if latency is None:
+            self.missed += 1
+        else:
+            self.confirmed += 1
+            self.latency = (
+                latency
+                if self.latency is None
+                else self.latency + LATENCY_WEIGHT * (latency - self.latency)
+            )
+        if attempts > 1:
+            self.retried += 1
+        if latency is not None and attempts == 1:
+            # Reliable so far, so try sending one frame fewer now and then
+            self._streak += 1
+            if self._streak >= DECAY_AFTER and self.repeats > 1:
+                self.repeats -= 1
+                self._streak = 0
+            return
+        self._streak = 0
+        self.repeats = min(MAX_REPEATS, self.repeats + 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats for diagnostics."""
+        return {
+            "repeats": self.repeats,
+            "latency_s": self.latency,
+            "timeout_s": self.timeout,
+            "sent": self.sent,
+            "confirmed": self.confirmed,
+            "retried": self.retried,
+            "missed": self.missed,
+        }
+
+
+class DeliveryLearner:
+    """Delivery stats per blaster and code, shared by every entry."""
+
+    def __init__(self) -> None:
+        """Initialize the learner."""
+        self.stats: Dict[tuple[Hashable, str], DeliveryStats] = {}
+
+    def get(self, blaster: Hashable, ref: str) -> DeliveryStats:
+        """Return the stats of a code on a blaster."""
+        if (stats := self.stats.get((blaster, ref))) is None:
+            stats = self.stats[(blaster, ref)] = DeliveryStats()
+        return stats
+
+    def blaster_stats(self, blaster: Hashable) -> Dict[str, Dict[str, Any]]:
+        """Return the stats of every code sent by a blaster."""
+        return {
+            ref: stats.as_dict()
+            for (key, ref), stats in self.stats.items()
+            if key == blaster
+        }
+
+
+async def async_deliver(
+    send: Callable[[int], Any],
+    source: FeedbackSource,
+    power: bool,
+    stats: DeliveryStats,
+) -> bool:
+    """Send until source confirms power, learning from the outcome.
+
+    send is called with the number of frames to transmit. Returns whether
+    the command was confirmed.
+    """
+    timeout = stats.timeout
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await send(stats.repeats)
+        sent = time.perf_counter()
+        if await source.async_wait_for(power, timeout):
+            stats.record(attempt, time.perf_counter() - sent)
+            return True
+        _LOGGER.debug(
+            "%s did not confirm power %s within %.1f s (attempt %d)",
+            source.entity_id,
+            power,
+            timeout,
+            attempt,
+        )
+        timeout *= 2
+    stats.record(MAX_ATTEMPTS, None)
+    return False
@@ -0,0 +1,86 @@
+"""Integration-wide hub shared by all Dyson IR entries."""
+import logging
+from typing import TYPE_CHECKING, Any, Dict
+
+from homeassistant.core import HomeAssistant, callback
+
+from .balancer import BlasterBalancer
+from .const import DOMAIN
+from .feedback import DeliveryLearner
+from .jobs import JobScheduler
+from .library import ClimateTableLibrary, CodeLibrary
+from .receiver import ReceiverSync
+from .state import DeviceStateStore
+from .telemetry import Telemetry
+from .transmit import TransmitScheduler
+from .transport import TransportPool
+
+if TYPE_CHECKING:
+    from .coordinator import DysonIRCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_DEVICE_STATE: Dict[str, Any] = {
+    "power": False,
+    "speed": 0,
+    "oscillating": False,
+    "heat": False,
+}
+
+
+class DysonIRHub:
+    """Own the state, coordinators, transmit queues and IR codes of every entry.
+
+    IR is send-only, so nothing here polls: each coordinator sets its device
+    state when a command is sent, feedback arrives or a receiver hears the
+    remote, and only then are listeners notified.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.coordinators: Dict[str, "DysonIRCoordinator"] = {}
+        self.state_store = DeviceStateStore(hass)
+        self.device_states = self.state_store.states
+        self.scheduler = TransmitScheduler(hass)
+        self.balancer = BlasterBalancer()
+        self.library = CodeLibrary(hass)
+        self.climate_tables = ClimateTableLibrary(hass)
+        self.telemetry = Telemetry(hass)
+        self.delivery = DeliveryLearner()
+        self.transports = TransportPool()
+        self.jobs = JobScheduler(hass)
+        self.receivers = ReceiverSync(hass)
+        self.setup_timings: Dict[str, Dict[str, float]] = {}
+
+    def device_state(self, entry_id: str) -> Dict[str, Any]:
+        """Return the estimated state of a device, creating it on first use."""
+        if (state := self.device_states.get(entry_id)) is None:
+            state = self.device_states[entry_id] = {}
+        # Restored states may predate fields added since
+        for key, value in DEFAULT_DEVICE_STATE.items():
+            state.setdefault(key, value)
+        return state
+
+    @callback
+    def async_add_coordinator(self, coordinator: "DysonIRCoordinator") -> None:
+        """Register the coordinator of a loaded entry."""
+        self.coordinators[coordinator.config_entry.entry_id] = coordinator
+
+    @callback
+    def async_remove_coordinator(self, entry_id: str) -> None:
+        """Forget an unloaded entry."""
+        self.coordinators.pop(entry_id, None)
+        self.telemetry.async_remove_entry(entry_id)
+        self.setup_timings.pop(entry_id, None)
+        if not self.coordinators:
+            self.telemetry.async_shutdown()
+            self.transports.async_close()
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> DysonIRHub:
+    """Return the hub, creating it on first use."""
+    if (hub := hass.data.get(DOMAIN)) is None:
+        hub = hass.data[DOMAIN] = DysonIRHub(hass)
+    return hub
@@ -0,0 +1,151 @@
+"""Import IR code sets for Dyson IR.
+
+Supported inputs are JSON documents in the common formats:
+
+- SmartIR device files, whose ``commands`` may be nested by mode, fan speed
+  and temperature, e.g. ``{"cool": {"low": {"16": "..."}}}``
+- Broadlink learned codes, either Home Assistant's stored dump
+  (``{"version": 1, "key": ..., "data": {device: {command: code}}}``) or
+  just the ``{device: {command: code}}`` part
+
+Nested keys become the action name ("Cool Low 16"); a toggle learned as a
+list of codes becomes one action per code ("Light 1", "Light 2"). A code
+found under several names becomes one action, under the first. SmartIR
+climate files can instead be read as one indexed code table for an AC.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from .climate_table import ClimateCodeTable, from_smartir
+from .codec import InvalidIRCode, validate
+
+MAX_IMPORT_SIZE = 5 * 1024 * 1024
+
+
+class InvalidCodeSet(ValueError):
+    """Raised when a code set cannot be read."""
+
+
+@dataclass
+class ImportResult:
+    """The actions read from a code set and what was left out."""
+
+    actions: Dict[str, str] = field(default_factory=dict)
+    invalid: list[str] = field(default_factory=list)
+    # Names repeated with the same code
+    duplicates: int = 0
+    # Further names of a code that was already read, keyed by the name it kept
+    aliases: Dict[str, list[str]] = field(default_factory=dict)
+    # Names repeated with a different code; the first code keeps the name
+    conflicts: list[str] = field(default_factory=list)
+
+
+def _name(path: tuple[str, ...]) -> str:
+    """Return the action name for a path of keys."""
+    return " ".join(str(part).replace("_", " ") for part in path).strip().title()
+
+
+def _walk(obj: Any, path: tuple[str, ...]) -> Iterator[tuple[str, Any]]:
+    """Yield (name, code) for every code below obj."""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from _walk(value, (*path, str(key)))
+    elif isinstance(obj, list) and obj and all(isinstance(v, int) for v in obj):
+        # Raw timings given as a JSON array
+        yield _name(path), ",".join(str(value) for value in obj)
+    elif isinstance(obj, list):
+        for index, value in enumerate(obj, 1):
+            yield from _walk(value, (*path, str(index)))
+    else:
+        yield _name(path), obj
+
+
+def iter_codes(data: Any) -> Iterator[tuple[str, Any]]:
+    """Yield (name, code) for every code in a parsed code set, in order."""
+    if not isinstance(data, dict):
+        raise InvalidCodeSet("Code set is not a JSON object")
+    if isinstance(data.get("commands"), dict):
+        # SmartIR device file
+        yield from _walk(data["commands"], ())
+        return
+    if {"version", "key"} <= data.keys() and isinstance(data.get("data"), dict):
+        # Home Assistant storage dump of Broadlink learned codes
+        data = data["data"]
+    if len(data) == 1 and isinstance(next(iter(data.values())), dict):
+        # A single device's codes need no device prefix
+        data = next(iter(data.values()))
+    yield from _walk(data, ())
+
+
+def parse_code_set(text: str) -> ImportResult:
+    """Parse, validate and dedupe the codes of a JSON code set."""
+    try:
+        data = json.loads(text)
+    except ValueError as err:
+        raise InvalidCodeSet(f"Code set is not valid JSON: {err}") from err
+
+    result = ImportResult()
+    # Codes are deduplicated by content, the same as the code library does
+    names: Dict[str, str] = {}
+    for name, code in iter_codes(data):
+        if not name or not isinstance(code, str) or not (code := code.strip()):
+            result.invalid.append(name)
+            continue
+        try:
+            validate(code)
+        except InvalidIRCode:
+            result.invalid.append(name)
+            continue
+        if (kept := result.actions.get(name)) is not None:
+            if kept == code:
+                result.duplicates += 1
+            elif name not in result.conflicts:
+                result.conflicts.append(name)
+            continue
+        if (first := names.get(code)) is not None:
+            result.aliases.setdefault(first, []).append(name)
+            continue
+        names[code] = name
+        result.actions[name] = code
+    return result
+
+
+def _read(path: Optional[str], text: Optional[str]) -> str:
+    """Return the text of a code set given as a file or pasted text."""
+    if path:
+        if os.path.getsize(path) > MAX_IMPORT_SIZE:
+            raise InvalidCodeSet(f"{path} is larger than {MAX_IMPORT_SIZE} bytes")
+        with open(path, encoding="utf-8") as file:
+            text = file.read()
+    if not text:
+        raise InvalidCodeSet("No code set given")
+    return text
+
+
+def load_code_set(
+    path: Optional[str] = None, text: Optional[str] = None
+) -> ImportResult:
+    """Read a code set from a file or pasted text.
+
+    This does blocking I/O and must run in the executor. Raises OSError if
+    the file cannot be read.
+    """
+    return parse_code_set(_read(path, text))
+
+
+def load_climate_table(
+    path: Optional[str] = None, text: Optional[str] = None
+) -> ClimateCodeTable:
+    """Read the code table of an AC from a SmartIR climate file or pasted text.
+
+    This does blocking I/O and must run in the executor. Raises OSError if
+    the file cannot be read.
+    """
+    text = _read(path, text)
+    try:
+        return from_smartir(json.loads(text))
+    except ValueError as err:
+        # Invalid JSON, or an InvalidClimateTable
+        raise InvalidCodeSet(f"Not a climate code table: {err}") from err
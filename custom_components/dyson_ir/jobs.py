@@ -0,0 +1,239 @@
+"""Integration-wide scheduler for timed Dyson IR commands."""
+import asyncio
+import heapq
+import itertools
+import logging
+import uuid
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.jobs"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+# Stale heap entries tolerated before the heap is rebuilt
+COMPACT_SLACK = 64
+# Tries of a failing job, and seconds before the first retry, doubled after each
+MAX_ATTEMPTS = 3
+RETRY_AFTER = 60
+
+JobRunner = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class EntryNotLoaded(HomeAssistantError):
+    """Raised by a job runner when the entry of the job is not loaded."""
+
+
+@dataclass
+class Job:
+    """A command to send to a device at a point in time."""
+
+    entry_id: str
+    job_id: str
+    due: float  # UTC timestamp
+    command: Dict[str, Any]
+    attempts: int = 0
+
+    @property
+    def key(self) -> tuple[str, str]:
+        """Return the key jobs are replaced and cancelled by."""
+        return (self.entry_id, self.job_id)
+
+
+class JobScheduler:
+    """Run the timed commands of every entry from one heap and one timer.
+
+    The timer is only ever set for the earliest job. Cancelled and replaced
+    jobs are left in the heap and skipped when they reach the top, so
+    scheduling and cancelling never scan the pending jobs. A job whose entry
+    is not loaded waits for it to load; a job that fails is retried with
+    backoff a few times, then dropped.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self.jobs: Dict[tuple[str, str], Job] = {}
+        self._heap: list[tuple[float, int, Job]] = []
+        self._order = itertools.count()
+        self._runner: Optional[JobRunner] = None
+        self._timer: Optional[CALLBACK_TYPE] = None
+        self._timer_due: Optional[float] = None
+        # Due jobs of entries that were not loaded, by entry id
+        self._waiting: Dict[str, list[Job]] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def async_load(self) -> None:
+        """Restore the saved jobs, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load() or {}
+            for saved in data.get("jobs", []):
+                job = Job(**saved)
+                # Jobs scheduled before loading finished win
+                if job.key not in self.jobs:
+                    self._push(job)
+            self._loaded = True
+            _LOGGER.debug("Restored %d scheduled jobs", len(self.jobs))
+
+    async def async_start(self, runner: JobRunner) -> None:
+        """Start running due jobs with runner, once startup is over."""
+        await self.async_load()
+        self._runner = runner
+        self._async_arm()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop the timer; pending jobs are kept."""
+        self._runner = None
+        self._async_cancel_timer()
+
+    @callback
+    def async_entry_loaded(self, entry_id: str) -> None:
+        """Run the due jobs that were waiting for an entry to load."""
+        waiting = self._waiting.pop(entry_id, [])
+        for job in waiting:
+            if self._pending(job):
+                heapq.heappush(self._heap, (job.due, next(self._order), job))
+        if waiting:
+            self._async_arm()
+
+    @callback
+    def async_schedule(
+        self,
+        entry_id: str,
+        command: Dict[str, Any],
+        due: datetime,
+        job_id: Optional[str] = None,
+    ) -> Job:
+        """Schedule command, replacing the pending job of the entry with job_id."""
+        job = Job(entry_id, job_id or uuid.uuid4().hex, due.timestamp(), command)
+        if job.key in self.jobs:
+            _LOGGER.debug("Replacing job %s of %s", job.job_id, entry_id)
+        self._push(job)
+        self._async_changed()
+        return job
+
+    @callback
+    def async_cancel(self, entry_id: str, job_id: Optional[str] = None) -> int:
+        """Cancel a pending job of an entry, or all of them; return how many."""
+        if job_id is not None:
+            keys = [(entry_id, job_id)] if (entry_id, job_id) in self.jobs else []
+        else:
+            keys = [key for key in self.jobs if key[0] == entry_id]
+        for key in keys:
+            del self.jobs[key]
+        if keys:
+            self._async_changed()
+        return len(keys)
+
+    def entry_jobs(self, entry_id: str) -> list[Job]:
+        """Return the pending jobs of an entry, soonest first."""
+        jobs = [job for key, job in self.jobs.items() if key[0] == entry_id]
+        return sorted(jobs, key=lambda job: job.due)
+
+    def _push(self, job: Job) -> None:
+        """Add a job, superseding any pending job with the same key."""
+        self.jobs[job.key] = job
+        heapq.heappush(self._heap, (job.due, next(self._order), job))
+
+    def _pending(self, job: Job) -> bool:
+        """Return whether a heap entry is still the job to run."""
+        return self.jobs.get(job.key) is job
+
+    @callback
+    def _async_changed(self) -> None:
+        """Save the jobs and move the timer to the earliest one."""
+        if len(self._heap) > 2 * len(self.jobs) + COMPACT_SLACK:
+            self._heap = [item for item in self._heap if self._pending(item[2])]
+            heapq.heapify(self._heap)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        self._async_arm()
+
+    @callback
+    def _async_arm(self) -> None:
+        """Set the one timer for the earliest pending job."""
+        while self._heap and not self._pending(self._heap[0][2]):
+            heapq.heappop(self._heap)
+        due = self._heap[0][0] if self._heap and self._runner else None
+        if due == self._timer_due:
+            return
+        self._async_cancel_timer()
+        if due is not None:
+            self._timer_due = due
+            self._timer = async_track_point_in_utc_time(
+                self.hass, self._async_fire, dt_util.utc_from_timestamp(due)
+            )
+
+    @callback
+    def _async_cancel_timer(self) -> None:
+        """Cancel the timer, if set."""
+        if self._timer is not None:
+            self._timer()
+        self._timer = None
+        self._timer_due = None
+
+    @callback
+    def _async_fire(self, now: datetime) -> None:
+        """Run every job that is due."""
+        self._timer = None
+        self._timer_due = None
+        now_ts = max(now.timestamp(), dt_util.utcnow().timestamp())
+        while self._heap and self._heap[0][0] <= now_ts:
+            _, _, job = heapq.heappop(self._heap)
+            if self._pending(job):
+                # The job stays pending, and saved, until it has run
+                self.hass.async_create_task(self._async_run(self._runner, job))
+        self._async_arm()
+
+    async def _async_run(self, runner: Optional[JobRunner], job: Job) -> None:
+        """Send the command of a job, dropping it once it has run."""
+        assert runner is not None
+        try:
+            await runner(job.command)
+        except EntryNotLoaded:
+            if self.hass.config_entries.async_get_entry(job.entry_id) is not None:
+                _LOGGER.debug("Job %s waits for %s to load", job.job_id, job.entry_id)
+                self._waiting.setdefault(job.entry_id, []).append(job)
+                return
+            _LOGGER.warning(
+                "Dropping job %s of removed entry %s", job.job_id, job.entry_id
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            if self._pending(job) and job.attempts + 1 < MAX_ATTEMPTS:
+                delay = RETRY_AFTER * 2**job.attempts
+                _LOGGER.warning(
+                    "Scheduled job %s of %s failed, retrying in %d s: %s",
+                    job.job_id,
+                    job.entry_id,
+                    delay,
+                    err,
+                )
+                due = dt_util.utcnow().timestamp() + delay
+                self._push(replace(job, due=due, attempts=job.attempts + 1))
+                self._async_changed()
+                return
+            _LOGGER.error(
+                "Scheduled job %s of %s failed: %s", job.job_id, job.entry_id, err
+            )
+        if self._pending(job):
+            del self.jobs[job.key]
+            self._async_changed()
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the pending jobs."""
+        return {"jobs": [asdict(job) for job in self.jobs.values()]}
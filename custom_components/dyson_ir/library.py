@@ -0,0 +1,203 @@
+"""Content-addressed IR code library shared by all Dyson IR entries."""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterable, Mapping
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .climate_table import ClimateCodeTable
+from .const import CONF_ACTION_CODE, CONF_ACTION_CODE_REF, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.codes"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+TABLES_STORAGE_KEY = f"{DOMAIN}.climate_tables"
+
+
+def code_ref(code: str) -> str:
+    """Return the content address of a code."""
+    return hashlib.sha256(code.encode()).hexdigest()[:24]
+
+
+def _pack(code: str) -> str:
+    """Compress a code for storage."""
+    return base64.b64encode(zlib.compress(code.encode(), 9)).decode("ascii")
+
+
+def _unpack(packed: str) -> str:
+    """Decompress a stored code."""
+    return zlib.decompress(base64.b64decode(packed)).decode()
+
+
+class CodeLibrary:
+    """Store each unique IR code once, addressed by the hash of its content.
+
+    Codes live compressed on disk and once in memory; every entity and entry
+    using the same code shares the same string.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the library."""
+        self.hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._codes: Dict[str, str] = {}
+        # Stored codes, kept compressed so saving does not re-compress them
+        self._persisted: Dict[str, str] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of unique codes known."""
+        return len(self._codes.keys() | self._persisted.keys())
+
+    async def async_load(self) -> None:
+        """Load the stored codes, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load() or {}
+            # Codes are decompressed on first use rather than all at startup
+            self._persisted.update(data.get("codes", {}))
+            self._loaded = True
+            _LOGGER.debug("Loaded %d IR codes", len(self._persisted))
+
+    def resolve(self, ref: str) -> str:
+        """Return the code stored under ref."""
+        if (code := self._codes.get(ref)) is None:
+            code = self._codes[ref] = _unpack(self._persisted[ref])
+        return code
+
+    @callback
+    def async_intern(self, code: str) -> str:
+        """Keep a code in memory only and return its ref."""
+        ref = code_ref(code)
+        if ref not in self._codes:
+            self._codes[ref] = code
+        return ref
+
+    @callback
+    def async_add(self, code: str) -> str:
+        """Add a code to the stored library and return its ref."""
+        ref = self.async_intern(code)
+        if ref not in self._persisted:
+            self._persisted[ref] = _pack(self._codes[ref])
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return ref
+
+    @callback
+    def async_ref_for(self, action: Mapping[str, Any]) -> str:
+        """Return the ref of an action, interning inline codes in memory."""
+        if (ref := action.get(CONF_ACTION_CODE_REF)) is not None:
+            return ref
+        return self.async_intern(action[CONF_ACTION_CODE])
+
+    @callback
+    def async_store_actions(
+        self, actions: Iterable[Mapping[str, Any]]
+    ) -> list[Dict[str, Any]]:
+        """Move inline codes into the library, returning actions with refs."""
+        stored = []
+        for action in actions:
+            action = dict(action)
+            if (code := action.pop(CONF_ACTION_CODE, None)) is not None:
+                action[CONF_ACTION_CODE_REF] = self.async_add(code)
+            stored.append(action)
+        return stored
+
+    async def async_save(self) -> None:
+        """Write the library now, before an entry is saved referring to it."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_prune(self, referenced: set[str]) -> None:
+        """Drop stored codes that no entry refers to any more."""
+        unused = self._persisted.keys() - referenced
+        if not unused:
+            return
+        for ref in unused:
+            self._codes.pop(ref, None)
+            del self._persisted[ref]
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the stored codes, compressed."""
+        return {"codes": dict(self._persisted)}
+
+
+class ClimateTableLibrary:
+    """Store the code table of each AC model once, whichever entries use it.
+
+    Tables are addressed by the hash of their content, so entries set up from
+    the same model share one stored table. Nothing is read until a climate
+    entity needs a table, and each table is unpacked once into an instance
+    shared by all its entries.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the library."""
+        self.hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, TABLES_STORAGE_KEY)
+        self._tables: Dict[str, ClimateCodeTable] = {}
+        self._persisted: Dict[str, str] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of tables known."""
+        return len(self._tables.keys() | self._persisted.keys())
+
+    async def async_load(self) -> None:
+        """Load the stored tables, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load() or {}
+            self._persisted.update(data.get("tables", {}))
+            self._loaded = True
+            _LOGGER.debug("Loaded %d climate code tables", len(self._persisted))
+
+    def get(self, model_id: str) -> ClimateCodeTable:
+        """Return the table stored under model_id."""
+        if (table := self._tables.get(model_id)) is None:
+            data = json.loads(_unpack(self._persisted[model_id]))
+            table = self._tables[model_id] = ClimateCodeTable.from_dict(data)
+        return table
+
+    @callback
+    def async_add(self, table: ClimateCodeTable) -> str:
+        """Add a table to the stored library and return its model id."""
+        model_id = table.model_id
+        self._tables.setdefault(model_id, table)
+        if model_id not in self._persisted:
+            text = json.dumps(table.as_dict(), separators=(",", ":"))
+            self._persisted[model_id] = _pack(text)
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return model_id
+
+    async def async_save(self) -> None:
+        """Write the tables now, before an entry is saved referring to them."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_prune(self, referenced: set[str]) -> None:
+        """Drop stored tables that no entry refers to any more."""
+        unused = self._persisted.keys() - referenced
+        if not self._loaded or not unused:
+            return
+        for model_id in unused:
+            self._tables.pop(model_id, None)
+            del self._persisted[model_id]
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the stored tables, compressed."""
+        return {"tables": dict(self._persisted)}
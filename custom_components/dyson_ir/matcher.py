@@ -0,0 +1,99 @@
+"""Match received IR frames to known codes, tolerating timing jitter.
+
+A receiver never reports the exact timings a code was learned with, so frames
+cannot be looked up by their text. Instead, each frame is reduced to a
+signature: its distinct durations are grouped into clusters of similar
+length, and every duration is replaced by the rank of its cluster. Jitter
+moves durations within their cluster, so a code and any reception of it
+share a signature, which is looked up in a dictionary. The few codes found
+are then checked duration by duration.
+
+Only the first frame of a code is indexed; repeat frames that follow it are
+often shared by every code of a protocol.
+"""
+from array import array
+from typing import Dict, Generic, Iterable, Optional, TypeVar
+
+from .codec import InvalidIRCode, decode, split_frames
+
+# Durations more than this factor apart fall into different clusters
+CLUSTER_RATIO = 1.4
+# Largest relative difference of a duration to still match
+TOLERANCE = 0.3
+# Received codes whose matches are remembered
+CACHE_SIZE = 256
+
+T = TypeVar("T")
+
+
+def first_frame(timings: Iterable[int]) -> tuple[int, ...]:
+    """Return the durations of the first frame, without its trailing space."""
+    frames = split_frames(timings)
+    return frames[0][0] if frames else ()
+
+
+def signature(frame: tuple[int, ...]) -> bytes:
+    """Return the cluster rank of every duration of a frame."""
+    ranks: Dict[int, int] = {}
+    rank = -1
+    previous = 0
+    for duration in sorted(set(frame)):
+        if duration > previous * CLUSTER_RATIO:
+            rank += 1
+        ranks[duration] = rank
+        previous = duration
+    return bytes(min(ranks[duration], 255) for duration in frame)
+
+
+def _close(frame: tuple[int, ...], other: array) -> bool:
+    """Return whether two frames of the same signature match within tolerance."""
+    return all(
+        abs(a - b) <= TOLERANCE * max(a, b)
+        for a, b in zip(frame, other, strict=True)
+    )
+
+
+class CodeMatcher(Generic[T]):
+    """Index of known codes, looked up by the frames a receiver reports."""
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._index: Dict[bytes, list[tuple[array, T]]] = {}
+        self._cache: Dict[str, list[T]] = {}
+        self.size = 0
+
+    def add(self, code: str, value: T) -> bool:
+        """Index a code, returning False if it cannot be decoded."""
+        try:
+            frame = first_frame(decode(code).timings)
+        except InvalidIRCode:
+            return False
+        if len(frame) < 3:
+            return False
+        self._index.setdefault(signature(frame), []).append(
+            (array("I", frame), value)
+        )
+        self._cache.clear()
+        self.size += 1
+        return True
+
+    def match(self, code: str) -> list[T]:
+        """Return the values of every indexed code matching a received one."""
+        if (matches := self._cache.get(code)) is not None:
+            return matches
+        matches = self._match(code) or []
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[code] = matches
+        return matches
+
+    def _match(self, code: str) -> Optional[list[T]]:
+        """Look up a received code."""
+        try:
+            frame = first_frame(decode(code).timings)
+        except InvalidIRCode:
+            return None
+        candidates = self._index.get(signature(frame))
+        if not candidates:
+            return None
+        return [value for known, value in candidates if _close(frame, known)]
@@ -0,0 +1,176 @@
+"""Shorten learned IR codes without changing what they send.
+
+Learning captures whatever the remote sent while the button was held, and
+the noise of the receiver with it:
+
+- a long space after the last frame, while the learner waited for more
+- timings scattered around the protocol's nominal values
+- repeats of the frame, and protocol repeat markers after it
+
+Each code is decoded, every duration moved to the nominal value of its
+cluster, the lead-out cut short, and the result encoded back in the format it
+came in. A code is only replaced if that saves airtime.
+
+Repeated frames are kept unless asked otherwise: some protocols need them,
+Sony devices for one only act on a frame received at least three times, and
+nothing resends them on the way out. Dropping them is only safe for devices
+known to act on a single frame.
+"""
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping
+
+from .codec import (
+    BROADLINK_PREFIX,
+    InvalidIRCode,
+    IRSignal,
+    decode,
+    detect_format,
+    encode,
+    split_frames,
+)
+
+# Durations within this factor of their neighbour belong to one cluster
+CLUSTER_RATIO = 1.3
+# Cluster medians this close to a well-known protocol timing snap to it
+NOMINAL_TOLERANCE = 0.1
+# Timings of the common consumer protocols (NEC, RC5, RC6, Sony), microseconds
+NOMINAL_TIMINGS = (444, 560, 600, 889, 1200, 1690, 2250, 2400, 4500, 9000)
+# Largest relative difference of a duration for two frames to be repeats
+REPEAT_TOLERANCE = 0.25
+# Frames this much shorter than the first are protocol repeat markers
+REPEAT_MARKER_RATIO = 4
+# Space kept after the last frame, microseconds; the transmit queue already
+# keeps the configured gap between frames
+LEAD_OUT = 10_000
+
+
+@dataclass
+class OptimizeResult:
+    """A code after optimizing, and how much airtime it saves."""
+
+    code: str
+    original_airtime: int  # microseconds
+    airtime: int  # microseconds
+    frames: int
+    frames_dropped: int
+
+    @property
+    def saved(self) -> int:
+        """Return the airtime saved, in microseconds."""
+        return self.original_airtime - self.airtime
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the result in milliseconds, for reports."""
+        return {
+            "original_ms": round(self.original_airtime / 1000, 1),
+            "airtime_ms": round(self.airtime / 1000, 1),
+            "saved_ms": round(self.saved / 1000, 1),
+            "frames_dropped": self.frames_dropped,
+        }
+
+
+def _is_repeat(frame: tuple[int, ...], other: tuple[int, ...]) -> bool:
+    """Return whether two frames are the same within tolerance."""
+    return len(frame) == len(other) and all(
+        abs(a - b) <= REPEAT_TOLERANCE * max(a, b)
+        for a, b in zip(frame, other, strict=True)
+    )
+
+
+def nominal_timings(durations: Iterable[int]) -> Dict[int, int]:
+    """Return the nominal value of each duration.
+
+    Sorted durations are split into clusters wherever one is more than
+    CLUSTER_RATIO longer than the one before, and each cluster takes its
+    median, or the closest well-known protocol timing if it is near one.
+    """
+    nominal: Dict[int, int] = {}
+    cluster: list[int] = []
+
+    def close() -> None:
+        median = cluster[len(cluster) // 2]
+        known = min(NOMINAL_TIMINGS, key=lambda known: abs(median - known))
+        if abs(median - known) <= NOMINAL_TOLERANCE * known:
+            median = known
+        for duration in cluster:
+            nominal[duration] = median
+
+    for duration in sorted(durations):
+        if cluster and duration > cluster[-1] * CLUSTER_RATIO:
+            close()
+            cluster = []
+        cluster.append(duration)
+    if cluster:
+        close()
+    return nominal
+
+
+def optimize(code: str, drop_repeats: bool = False) -> OptimizeResult:
+    """Return the shortest equivalent of a code, in the same format.
+
+    With drop_repeats, frames repeating an earlier one and repeat markers are
+    left out too. Raises InvalidIRCode for codes that cannot be decoded, such
+    as the names of commands learned on the blaster itself.
+    """
+    code_format = detect_format(code)
+    signal = decode(code)
+    original_airtime = signal.airtime
+    frames = split_frames(signal.timings)
+
+    kept: list[tuple[tuple[int, ...], int]] = []
+    for frame, gap in frames:
+        if drop_repeats and kept and (
+            any(_is_repeat(frame, other) for other, _ in kept)
+            or len(frame) * REPEAT_MARKER_RATIO <= len(kept[0][0])
+        ):
+            continue
+        kept.append((frame, gap))
+
+    nominal = nominal_timings(d for frame, _ in kept for d in frame)
+    timings: list[int] = []
+    for frame, gap in kept[:-1]:
+        timings.extend(nominal[duration] for duration in frame)
+        timings.append(gap)
+    frame, lead_out = kept[-1]
+    timings.extend(nominal[duration] for duration in frame)
+    if lead_out:
+        timings.append(min(lead_out, LEAD_OUT))
+
+    result = OptimizeResult(
+        code=code,
+        original_airtime=original_airtime,
+        airtime=original_airtime,
+        frames=len(frames),
+        frames_dropped=0,
+    )
+    optimized = IRSignal(array("I", timings), signal.frequency)
+    if optimized.airtime >= original_airtime:
+        return result
+    assert code_format is not None
+    encoded = encode(optimized, code_format)
+    if not code.strip().startswith(BROADLINK_PREFIX):
+        # Bare Broadlink codes stay bare
+        encoded = encoded.removeprefix(BROADLINK_PREFIX)
+    # Encoding rounds durations to the resolution of the format
+    if (airtime := decode(encoded).airtime) < original_airtime:
+        result.code = encoded
+        result.airtime = airtime
+        result.frames_dropped = len(frames) - len(kept)
+    return result
+
+
+def optimize_codes(
+    codes: Mapping[str, str], drop_repeats: bool = False
+) -> Dict[str, OptimizeResult]:
+    """Optimize the codes of several actions, leaving out undecodable ones.
+
+    This decodes every code and is meant to run in the executor.
+    """
+    results: Dict[str, OptimizeResult] = {}
+    for name, code in codes.items():
+        try:
+            results[name] = optimize(code, drop_repeats)
+        except InvalidIRCode:
+            continue
+    return results
@@ -0,0 +1,259 @@
+"""Shortest-path IR command planner for Dyson IR fans.
+
+The configured actions are read as transitions of a small state machine over
+(power, speed, oscillating, heat). Reaching a target state is a shortest path
+search over that machine, weighted by the airtime of every frame, so a direct
+"Speed 7" code wins over stepping with "Speed Up" whenever one is configured.
+
+Action names are matched loosely, e.g. "Power On", "power_toggle", "Speed 7",
+"Speed Up", "Oscillate Toggle" or "Heat Off". A bare "Power", "Oscillate" or
+"Heat" is taken to be a toggle.
+"""
+import heapq
+import itertools
+import re
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional
+
+DEFAULT_SPEED_COUNT = 10  # AM09
+DEFAULT_FRAME_COST = 100.0  # milliseconds, for frames of unknown airtime
+
+SPEED_UNKNOWN = 0
+
+KIND_POWER = "power"
+KIND_SPEED = "speed"
+KIND_OSCILLATE = "oscillate"
+KIND_HEAT = "heat"
+
+_SWITCH_FIELDS = {KIND_OSCILLATE: "oscillating", KIND_HEAT: "heat"}
+_SWITCH_VALUES = {"on": True, "off": False}
+# State fields the effect of each kind of command depends on
+KIND_FIELDS = {
+    KIND_POWER: ("power",),
+    KIND_SPEED: ("power", "speed"),
+    KIND_OSCILLATE: ("power", "oscillating"),
+    KIND_HEAT: ("power", "heat"),
+}
+
+_NAME_RE = re.compile(
+    r"^(?:fan )?(power|speed|oscillat(?:e|ion)|heat(?:er|ing)?)"
+    r"(?: (on|off|toggle|up|down|\d+))?$"
+)
+
+Command = tuple[str, str]
+
+
+class UnreachableState(ValueError):
+    """Raised when no sequence of configured actions reaches a target."""
+
+
+@dataclass(frozen=True)
+class FanState:
+    """The estimated state of a fan."""
+
+    power: bool = False
+    speed: int = SPEED_UNKNOWN
+    oscillating: bool = False
+    heat: bool = False
+
+    @classmethod
+    def from_dict(cls, state: Mapping[str, Any], speed_count: int) -> "FanState":
+        """Build a state from the device state, forgetting impossible speeds."""
+        speed = state.get("speed") or SPEED_UNKNOWN
+        if not 0 < speed <= speed_count:
+            speed = SPEED_UNKNOWN
+        return cls(
+            power=bool(state.get("power")),
+            speed=speed,
+            oscillating=bool(state.get("oscillating")),
+            heat=bool(state.get("heat")),
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the state as device state."""
+        return {
+            "power": self.power,
+            "speed": self.speed,
+            "oscillating": self.oscillating,
+            "heat": self.heat,
+        }
+
+    def matches(self, target: Mapping[str, Any]) -> bool:
+        """Return whether every field given in target has been reached."""
+        return all(getattr(self, field) == value for field, value in target.items())
+
+
+@dataclass(frozen=True)
+class FanPlan:
+    """The actions to send, in order, and the state they leave the fan in."""
+
+    actions: tuple[str, ...]
+    state: FanState
+    cost: float
+
+
+def parse_action(name: str) -> Optional[Command]:
+    """Return the command an action name stands for, if it is one."""
+    normalized = " ".join(re.sub(r"[_\-]+", " ", name).lower().split())
+    if (match := _NAME_RE.match(normalized)) is None:
+        return None
+    kind, arg = match.groups()
+    if kind.startswith("oscillat"):
+        kind = KIND_OSCILLATE
+    elif kind.startswith("heat"):
+        kind = KIND_HEAT
+    if kind == KIND_SPEED:
+        if arg is None or arg in _SWITCH_VALUES or arg == "toggle":
+            return None
+        if arg.isdigit() and int(arg) == 0:
+            return None
+    elif arg is None:
+        arg = "toggle"
+    elif arg not in _SWITCH_VALUES and arg != "toggle":
+        return None
+    return kind, arg
+
+
+class FanPlanner:
+    """Plan the cheapest sequence of actions from one fan state to another."""
+
+    def __init__(
+        self,
+        action_names: Iterable[str],
+        frame_cost: Callable[[str], float] = lambda name: DEFAULT_FRAME_COST,
+        speed_count: Optional[int] = None,
+    ) -> None:
+        """Initialize the planner from the configured action names."""
+        self.commands: Dict[str, Command] = {}
+        for name in action_names:
+            if (command := parse_action(name)) is not None:
+                self.commands[name] = command
+        direct = [
+            int(arg)
+            for kind, arg in self.commands.values()
+            if kind == KIND_SPEED and arg.isdigit()
+        ]
+        self.speed_count = speed_count or max([DEFAULT_SPEED_COUNT, *direct])
+        self._costs = {name: frame_cost(name) for name in self.commands}
+        self._kinds = {kind for kind, _ in self.commands.values()}
+
+    @property
+    def supports_power(self) -> bool:
+        """Return whether the fan can be turned on and off."""
+        return KIND_POWER in self._kinds
+
+    @property
+    def supports_speed(self) -> bool:
+        """Return whether the speed can be set."""
+        return KIND_SPEED in self._kinds
+
+    @property
+    def supports_oscillation(self) -> bool:
+        """Return whether oscillation can be set."""
+        return KIND_OSCILLATE in self._kinds
+
+    @property
+    def supports_heat(self) -> bool:
+        """Return whether heating can be set."""
+        return KIND_HEAT in self._kinds
+
+    def predict(self, state: FanState, action: str) -> Optional[FanState]:
+        """Return the state sending an action leads to, None if it cannot be told.
+
+        The effect of anything that is not a known command, and of speed steps
+        from an unknown speed, cannot be told.
+        """
+        if (command := self.commands.get(action)) is None:
+            return None
+        if command[0] == KIND_SPEED and state.power and state.speed == SPEED_UNKNOWN:
+            return None
+        return self._apply(state, command) or state
+
+    def is_absolute(self, action: str) -> bool:
+        """Return whether an action sets its state outright rather than stepping."""
+        command = self.commands.get(action)
+        return command is not None and command[1] not in ("toggle", "up", "down")
+
+    def _apply(self, state: FanState, command: Command) -> Optional[FanState]:
+        """Return the state a command leads to, or None if it changes nothing."""
+        kind, arg = command
+        if kind == KIND_POWER:
+            power = _SWITCH_VALUES.get(arg, not state.power)
+            return None if power == state.power else replace(state, power=power)
+        # Everything but power is ignored while the fan is off
+        if not state.power:
+            return None
+        if kind == KIND_SPEED:
+            if arg == "up":
+                if state.speed == SPEED_UNKNOWN:
+                    return None
+                speed = min(state.speed + 1, self.speed_count)
+            elif arg == "down":
+                if state.speed == SPEED_UNKNOWN:
+                    return None
+                speed = max(state.speed - 1, 1)
+            else:
+                speed = min(int(arg), self.speed_count)
+            return None if speed == state.speed else replace(state, speed=speed)
+        field = _SWITCH_FIELDS[kind]
+        value = _SWITCH_VALUES.get(arg, not getattr(state, field))
+        if value == getattr(state, field):
+            return None
+        return replace(state, **{field: value})
+
+    def _edges(
+        self, state: FanState
+    ) -> Iterator[tuple[tuple[str, ...], float, FanState]]:
+        """Yield every (actions, cost, next state) leaving state."""
+        for name, command in self.commands.items():
+            if (following := self._apply(state, command)) is not None:
+                yield (name,), self._costs[name], following
+            elif (
+                command[0] == KIND_SPEED
+                and command[1] in ("up", "down")
+                and state.power
+                and state.speed == SPEED_UNKNOWN
+            ):
+                # Stepping is only meaningful from a known speed, so find one
+                # by stepping into the end stop
+                steps = self.speed_count - 1
+                speed = self.speed_count if command[1] == "up" else 1
+                yield (
+                    (name,) * steps,
+                    self._costs[name] * steps,
+                    replace(state, speed=speed),
+                )
+
+    def plan(self, current: FanState, target: Mapping[str, Any]) -> FanPlan:
+        """Return the cheapest plan from current to a state matching target.
+
+        Fields missing from target are left as they are where possible. When
+        the target turns the fan off, only power is considered.
+        """
+        if target.get("power") is False:
+            target = {"power": False}
+        if "speed" in target and not 0 < target["speed"] <= self.speed_count:
+            raise UnreachableState(f"Speed {target['speed']} is out of range")
+
+        counter = itertools.count()
+        best: Dict[FanState, float] = {current: 0.0}
+        parents: Dict[FanState, tuple[FanState, tuple[str, ...]]] = {}
+        queue = [(0.0, next(counter), current)]
+        while queue:
+            cost, _, state = heapq.heappop(queue)
+            if cost > best[state]:
+                continue
+            if state.matches(target):
+                actions: list[str] = []
+                node = state
+                while node in parents:
+                    node, step = parents[node]
+                    actions[:0] = step
+                return FanPlan(tuple(actions), state, cost)
+            for step, step_cost, following in self._edges(state):
+                total = cost + step_cost
+                if total < best.get(following, float("inf")):
+                    best[following] = total
+                    parents[following] = (state, step)
+                    heapq.heappush(queue, (total, next(counter), following))
+        raise UnreachableState(f"No configured actions reach {dict(target)}")
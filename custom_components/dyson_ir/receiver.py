@@ -0,0 +1,107 @@
+"""Sync Dyson IR device state from codes heard by IR receivers."""
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+from .matcher import CodeMatcher
+
+if TYPE_CHECKING:
+    from .coordinator import DysonIRCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CODE = "code"
+# Frames heard this soon after a device was sent to are its own echo, seconds
+ECHO_WINDOW = 1.0
+# Matches of one action this close together are one press, seconds
+REPEAT_WINDOW = 0.3
+
+Match = tuple[str, str]  # entry_id, action name
+
+
+class ReceiverSync:
+    """Match the codes IR receivers hear to the actions of every entry.
+
+    Receivers, such as ESPHome remote_receiver nodes, fire an event with the
+    code they heard. There is one bus listener per event type and one index
+    of every configured code, shared by all of them. The index is built on
+    the first frame after an entry changed, so a burst of frames costs one
+    dictionary lookup each.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the receiver sync."""
+        self.hass = hass
+        self._entries: Dict[str, tuple[str, "DysonIRCoordinator"]] = {}
+        self._unsubs: Dict[str, CALLBACK_TYPE] = {}
+        self._matcher: Optional[CodeMatcher[Match]] = None
+        self._matched_at: Dict[Match, float] = {}
+
+    @callback
+    def async_register(
+        self, coordinator: "DysonIRCoordinator", event_type: str
+    ) -> CALLBACK_TYPE:
+        """Apply the actions heard in event_type events to a coordinator."""
+        entry_id = coordinator.config_entry.entry_id
+        self._entries[entry_id] = (event_type, coordinator)
+        self._matcher = None
+        if event_type not in self._unsubs:
+            self._unsubs[event_type] = self.hass.bus.async_listen(
+                event_type, self._async_received
+            )
+
+        @callback
+        def remove() -> None:
+            if self._entries.get(entry_id, (None, None))[1] is not coordinator:
+                return
+            del self._entries[entry_id]
+            self._matcher = None
+            if all(wanted != event_type for wanted, _ in self._entries.values()):
+                self._unsubs.pop(event_type)()
+
+        return remove
+
+    def _build(self) -> CodeMatcher[Match]:
+        """Index the action codes of every registered entry."""
+        started = time.perf_counter()
+        matcher: CodeMatcher[Match] = CodeMatcher()
+        for entry_id, (_, coordinator) in self._entries.items():
+            for name, code in coordinator.action_codes.items():
+                matcher.add(code, (entry_id, name))
+        self._matched_at.clear()
+        _LOGGER.debug(
+            "Indexed %d codes for IR receivers in %.1f ms",
+            matcher.size,
+            (time.perf_counter() - started) * 1000,
+        )
+        return matcher
+
+    @callback
+    def _async_received(self, event: Event) -> None:
+        """Apply the actions matching a received code."""
+        code: Any = event.data.get(ATTR_CODE)
+        if isinstance(code, list):
+            # ESPHome reports raw timings as a list of signed durations
+            code = ",".join(str(value) for value in code)
+        if not isinstance(code, str) or not code:
+            return
+        if self._matcher is None:
+            self._matcher = self._build()
+        now = time.monotonic()
+        for match in self._matcher.match(code):
+            entry_id, action = match
+            event_type, coordinator = self._entries[entry_id]
+            if event_type != event.event_type:
+                continue
+            if now - coordinator.transmitted_at < ECHO_WINDOW:
+                _LOGGER.debug("Ignoring the echo of %s", action)
+                continue
+            # Held buttons and several receivers report one press many times
+            last = self._matched_at.get(match)
+            self._matched_at[match] = now
+            if last is not None and now - last < REPEAT_WINDOW:
+                continue
+            _LOGGER.debug("Heard %s of %s", action, coordinator.config_entry.title)
+            coordinator.async_received_action(action)
@@ -0,0 +1,141 @@
+"""Diagnostic sensor platform for Dyson IR."""
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .coordinator import DysonIRCoordinator
+from .entity import DysonIREntity
+from .hub import async_get_hub
+from .telemetry import STAGES, TransmitStats
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DysonIRSensorEntityDescription(SensorEntityDescription):
+    """Describe a Dyson IR telemetry sensor."""
+
+    value_fn: Callable[[DysonIRCoordinator, TransmitStats], Any] = lambda c, s: None
+    attributes_fn: Optional[Callable[[TransmitStats], dict[str, Any]]] = None
+
+
+def _stage_attributes(stats: TransmitStats) -> dict[str, Any]:
+    """Return the p50/p99 of every press stage."""
+    attributes = {}
+    for stage in STAGES:
+        histogram = stats.stages[stage]
+        attributes[f"{stage}_p50"] = histogram.percentile(0.5)
+        attributes[f"{stage}_p99"] = histogram.percentile(0.99)
+    return attributes
+
+
+SENSORS = (
+    DysonIRSensorEntityDescription(
+        key="commands_sent",
+        name="Commands sent",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator, stats: stats.sent,
+    ),
+    DysonIRSensorEntityDescription(
+        key="commands_failed",
+        name="Commands failed",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator, stats: stats.failed,
+    ),
+    DysonIRSensorEntityDescription(
+        key="commands_suppressed",
+        name="Commands suppressed",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator, stats: stats.suppressed,
+    ),
+    DysonIRSensorEntityDescription(
+        key="press_latency",
+        name="Press latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator, stats: stats.stages["total"].percentile(0.5),
+        attributes_fn=_stage_attributes,
+    ),
+    DysonIRSensorEntityDescription(
+        key="queue_depth",
+        name="Blaster queue depth",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator, stats: coordinator.queue_depth,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up telemetry sensors."""
+    coordinator = async_get_hub(hass).coordinators[config_entry.entry_id]
+    async_add_entities(
+        DysonIRTelemetrySensor(coordinator, config_entry.entry_id, description)
+        for description in SENSORS
+    )
+
+
+class DysonIRTelemetrySensor(DysonIREntity, SensorEntity):
+    """Sensor exposing press path telemetry for one entry."""
+
+    entity_description: DysonIRSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: DysonIRCoordinator,
+        entry_id: str,
+        description: DysonIRSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry_id)
+        self.entity_description = description
+        self._telemetry = async_get_hub(coordinator.hass).telemetry
+        self._attr_name = (
+            f"{coordinator.config_entry.data.get('name')} {description.name}"
+        )
+        self._attr_unique_id = f"{DOMAIN}_{entry_id}_{description.key}"
+
+    async def async_added_to_hass(self) -> None:
+        """Update whenever a transmission of the entry is recorded."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._telemetry.async_add_listener(self.entry_id, self._async_recorded)
+        )
+
+    @callback
+    def _async_recorded(self) -> None:
+        """Write the new telemetry to the state machine."""
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> Any:
+        """Return the sensor value."""
+        stats = self._telemetry.entry_stats(self.entry_id)
+        return self.entity_description.value_fn(self.coordinator, stats)
+
+    @property
+    def extra_state_attributes(self) -> Optional[dict[str, Any]]:
+        """Return per-stage latencies where relevant."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        stats = self._telemetry.entry_stats(self.entry_id)
+        return self.entity_description.attributes_fn(stats)
@@ -0,0 +1,437 @@
+"""Services for Dyson IR."""
+import asyncio
+import logging
+import time
+from typing import Any, Hashable, Optional
+
+import voluptuous as vol
+from homeassistant.core import (
+    Context,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_ACTION_CODE,
+    CONF_ACTION_CODE_REF,
+    CONF_ACTION_NAME,
+    CONF_ACTIONS,
+    DOMAIN,
+)
+from .coordinator import DysonIRCoordinator, SequenceStep
+from .hub import async_get_hub
+from .jobs import EntryNotLoaded
+from .optimizer import optimize_codes
+from .transmit import PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SEND_SEQUENCE = "send_sequence"
+SERVICE_SEND_MANY = "send_many"
+SERVICE_SCHEDULE = "schedule"
+SERVICE_CANCEL_SCHEDULE = "cancel_schedule"
+SERVICE_GET_TRACES = "get_traces"
+SERVICE_OPTIMIZE_CODES = "optimize_codes"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_SEQUENCE = "sequence"
+ATTR_ACTION = "action"
+ATTR_CODE = "code"
+ATTR_DELAY = "delay"
+ATTR_REPEAT = "repeat"
+ATTR_COMMANDS = "commands"
+ATTR_AT = "at"
+ATTR_JOB_ID = "job_id"
+ATTR_FORCE = "force"
+ATTR_DRY_RUN = "dry_run"
+ATTR_DROP_REPEATS = "drop_repeats"
+
+REPEAT_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1, max=50))
+DELAY_SCHEMA = vol.All(vol.Coerce(float), vol.Range(min=0, max=300))
+
+SEQUENCE_STEP_SCHEMA = vol.Any(
+    cv.string,
+    vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): cv.string,
+            vol.Optional(ATTR_REPEAT, default=1): REPEAT_SCHEMA,
+        }
+    ),
+    vol.Schema(
+        {
+            vol.Required(ATTR_CODE): cv.string,
+            vol.Optional(ATTR_REPEAT, default=1): REPEAT_SCHEMA,
+        }
+    ),
+    vol.Schema({vol.Required(ATTR_DELAY): DELAY_SCHEMA}),
+)
+
+SEND_SEQUENCE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_SEQUENCE): vol.All(
+            cv.ensure_list, vol.Length(min=1), [SEQUENCE_STEP_SCHEMA]
+        ),
+    }
+)
+
+COMMAND_FIELDS = {
+    vol.Required(ATTR_ENTRY_ID): cv.string,
+    vol.Exclusive(ATTR_ACTION, "command"): cv.string,
+    vol.Exclusive(ATTR_CODE, "command"): cv.string,
+    vol.Exclusive(ATTR_SEQUENCE, "command"): vol.All(
+        cv.ensure_list, vol.Length(min=1), [SEQUENCE_STEP_SCHEMA]
+    ),
+    vol.Optional(ATTR_REPEAT, default=1): REPEAT_SCHEMA,
+    vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+}
+
+COMMAND_SCHEMA = vol.All(
+    vol.Schema(COMMAND_FIELDS),
+    cv.has_at_least_one_key(ATTR_ACTION, ATTR_CODE, ATTR_SEQUENCE),
+)
+
+SCHEDULE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            **COMMAND_FIELDS,
+            vol.Exclusive(ATTR_DELAY, "when"): cv.positive_time_period,
+            vol.Exclusive(ATTR_AT, "when"): cv.datetime,
+            vol.Optional(ATTR_JOB_ID): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ACTION, ATTR_CODE, ATTR_SEQUENCE),
+    cv.has_at_least_one_key(ATTR_DELAY, ATTR_AT),
+)
+
+GET_TRACES_SCHEMA = vol.Schema({vol.Required(ATTR_ENTRY_ID): cv.string})
+
+OPTIMIZE_CODES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+        vol.Optional(ATTR_DROP_REPEATS, default=False): cv.boolean,
+    }
+)
+
+CANCEL_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_JOB_ID): cv.string,
+    }
+)
+
+
+# Fields of a command, as kept by scheduled jobs
+COMMAND_KEYS = {
+    ATTR_ENTRY_ID,
+    ATTR_ACTION,
+    ATTR_CODE,
+    ATTR_SEQUENCE,
+    ATTR_REPEAT,
+    ATTR_FORCE,
+}
+
+
+def _action_for_entry_ids(data: dict[str, Any]) -> dict[str, Any]:
+    """Require the action to send when devices are given by entry_id."""
+    if ATTR_ENTRY_ID in data and ATTR_ACTION not in data:
+        raise vol.Invalid("action is required with entry_id")
+    return data
+
+
+SEND_MANY_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_ACTION): cv.string,
+            vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+            vol.Optional(ATTR_COMMANDS): vol.All(cv.ensure_list, [COMMAND_SCHEMA]),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ENTRY_ID, ATTR_COMMANDS),
+    _action_for_entry_ids,
+)
+
+
+def _get_coordinator(hass: HomeAssistant, entry_id: str) -> DysonIRCoordinator:
+    """Return the coordinator of a loaded entry."""
+    if (coordinator := async_get_hub(hass).coordinators.get(entry_id)) is None:
+        raise EntryNotLoaded(f"No loaded Dyson IR entry with id {entry_id}")
+    return coordinator
+
+
+def _expand_sequence(
+    coordinator: DysonIRCoordinator, sequence: list
+) -> list[SequenceStep]:
+    """Resolve action names and repeats into IR codes and delays."""
+    action_codes = coordinator.action_codes
+    steps: list[SequenceStep] = []
+    for item in sequence:
+        if isinstance(item, str):
+            # A bare string is an action name if one matches, otherwise a code
+            steps.append(action_codes.get(item, item))
+        elif ATTR_DELAY in item:
+            steps.append(item[ATTR_DELAY])
+        elif ATTR_ACTION in item:
+            if (code := action_codes.get(item[ATTR_ACTION])) is None:
+                raise HomeAssistantError(
+                    f"Unknown action {item[ATTR_ACTION]} for "
+                    f"{coordinator.config_entry.title}"
+                )
+            steps.extend([code] * item[ATTR_REPEAT])
+        else:
+            steps.extend([item[ATTR_CODE]] * item[ATTR_REPEAT])
+    return steps
+
+
+def _commands(data: dict[str, Any]) -> list[dict[str, Any]]:
+    """Return one command per device from the send_many service data."""
+    commands = [
+        {
+            ATTR_ENTRY_ID: entry_id,
+            ATTR_ACTION: data[ATTR_ACTION],
+            ATTR_REPEAT: 1,
+            ATTR_FORCE: data[ATTR_FORCE],
+        }
+        for entry_id in data.get(ATTR_ENTRY_ID, [])
+    ]
+    commands.extend(data.get(ATTR_COMMANDS, []))
+    return commands
+
+
+def _command_sequence(command: dict[str, Any]) -> list:
+    """Return the sequence a command stands for."""
+    if ATTR_SEQUENCE in command:
+        return command[ATTR_SEQUENCE]
+    key = ATTR_ACTION if ATTR_ACTION in command else ATTR_CODE
+    return [{key: command[key], ATTR_REPEAT: command[ATTR_REPEAT]}]
+
+
+async def _async_send_command(
+    coordinator: DysonIRCoordinator,
+    command: dict[str, Any],
+    steps: list[SequenceStep],
+    context: Optional[Context] = None,
+    priority: int = PRIORITY_BULK,
+) -> Optional[int]:
+    """Send a command; return the blaster calls made, None if it was suppressed.
+
+    A single action goes the way of a button press, so it is skipped when it
+    would change nothing and power commands are confirmed by feedback.
+    """
+    title = coordinator.config_entry.title
+    if (action := command.get(ATTR_ACTION)) is not None:
+        return await coordinator.async_send_action(
+            action,
+            coordinator.action_codes[action],
+            title,
+            context,
+            priority,
+            command.get(ATTR_FORCE, False),
+            command[ATTR_REPEAT],
+        )
+    return await coordinator.async_send_sequence(steps, title, context, priority)
+
+
+async def async_run_command(hass: HomeAssistant, command: dict[str, Any]) -> None:
+    """Send a command given as service data, such as a scheduled one."""
+    coordinator = _get_coordinator(hass, command[ATTR_ENTRY_ID])
+    steps = _expand_sequence(coordinator, _command_sequence(command))
+    await _async_send_command(coordinator, command, steps)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Dyson IR services."""
+
+    async def async_send_sequence(call: ServiceCall) -> None:
+        """Send an ordered list of actions, codes and delays to one device."""
+        coordinator = _get_coordinator(hass, call.data[ATTR_ENTRY_ID])
+        steps = _expand_sequence(coordinator, call.data[ATTR_SEQUENCE])
+        priority = PRIORITY_INTERACTIVE if call.context.user_id else PRIORITY_BULK
+        calls = await coordinator.async_send_sequence(
+            steps, coordinator.config_entry.title, call.context, priority
+        )
+        _LOGGER.debug(
+            "Sent %d sequence steps to %s in %d blaster calls",
+            len(steps),
+            coordinator.config_entry.title,
+            calls,
+        )
+
+    async def async_send_many(call: ServiceCall) -> ServiceResponse:
+        """Send commands to many devices, in parallel across blasters."""
+        started = time.perf_counter()
+        priority = PRIORITY_INTERACTIVE if call.context.user_id else PRIORITY_BULK
+        commands = _commands(call.data)
+        results: list[dict[str, Any]] = [
+            {ATTR_ENTRY_ID: command[ATTR_ENTRY_ID], "success": False}
+            for command in commands
+        ]
+
+        # One lane per blaster: lanes run concurrently, commands within a lane
+        # run in order so a busy blaster never overflows its transmit queue
+        lanes: dict[Hashable, list[tuple[int, DysonIRCoordinator, dict, list]]] = {}
+        for index, command in enumerate(commands):
+            try:
+                coordinator = _get_coordinator(hass, command[ATTR_ENTRY_ID])
+                steps = _expand_sequence(coordinator, _command_sequence(command))
+            except HomeAssistantError as err:
+                results[index]["error"] = str(err)
+                continue
+            key = coordinator.blaster_key
+            results[index]["title"] = coordinator.config_entry.title
+            results[index]["blaster"] = [list(target) for target in key]
+            lanes.setdefault(key, []).append((index, coordinator, command, steps))
+
+        async def run_lane(
+            lane: list[tuple[int, DysonIRCoordinator, dict, list]]
+        ) -> None:
+            for index, coordinator, command, steps in lane:
+                title = coordinator.config_entry.title
+                try:
+                    calls = await _async_send_command(
+                        coordinator, command, steps, call.context, priority
+                    )
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.error("Failed to send to %s: %s", title, err)
+                    results[index]["error"] = str(err)
+                else:
+                    results[index]["success"] = True
+                    if calls is None:
+                        results[index]["suppressed"] = True
+                        continue
+                    results[index]["blaster_calls"] = calls
+                    if (served := coordinator.last_blaster) is not None:
+                        # Another blaster of the entry may have taken over
+                        results[index]["blaster"] = [list(target) for target in served]
+
+        await asyncio.gather(*(run_lane(lane) for lane in lanes.values()))
+        elapsed = (time.perf_counter() - started) * 1000
+        _LOGGER.debug(
+            "Sent %d commands over %d blasters in %.0f ms",
+            len(commands),
+            len(lanes),
+            elapsed,
+        )
+        return {"results": results, "elapsed_ms": elapsed}
+
+    async def async_schedule(call: ServiceCall) -> ServiceResponse:
+        """Send a command to a device later, replacing a pending job of the same id."""
+        coordinator = _get_coordinator(hass, call.data[ATTR_ENTRY_ID])
+        command = {key: call.data[key] for key in COMMAND_KEYS if key in call.data}
+        # Resolve now, so a typo fails the call rather than the job
+        _expand_sequence(coordinator, _command_sequence(command))
+        if ATTR_AT in call.data:
+            due = dt_util.as_utc(call.data[ATTR_AT])
+        else:
+            due = dt_util.utcnow() + call.data[ATTR_DELAY]
+        job = async_get_hub(hass).jobs.async_schedule(
+            coordinator.config_entry.entry_id, command, due, call.data.get(ATTR_JOB_ID)
+        )
+        return {ATTR_JOB_ID: job.job_id, "due": due.isoformat()}
+
+    async def async_cancel_schedule(call: ServiceCall) -> ServiceResponse:
+        """Cancel a pending job of a device, or all of them."""
+        cancelled = async_get_hub(hass).jobs.async_cancel(
+            call.data[ATTR_ENTRY_ID], call.data.get(ATTR_JOB_ID)
+        )
+        return {"cancelled": cancelled}
+
+    async def async_get_traces(call: ServiceCall) -> ServiceResponse:
+        """Return the traced presses of a device, oldest first."""
+        coordinator = _get_coordinator(hass, call.data[ATTR_ENTRY_ID])
+        entry_id = coordinator.config_entry.entry_id
+        if (traces := async_get_hub(hass).telemetry.entry_traces(entry_id)) is None:
+            raise HomeAssistantError(
+                f"Tracing is not enabled for {coordinator.config_entry.title}"
+            )
+        return {"traces": traces}
+
+    async def async_optimize_codes(call: ServiceCall) -> ServiceResponse:
+        """Shorten the learned codes of devices, reporting the airtime saved."""
+        hub = async_get_hub(hass)
+        entry_ids = call.data.get(ATTR_ENTRY_ID) or list(hub.coordinators)
+        coordinators = [_get_coordinator(hass, entry_id) for entry_id in entry_ids]
+        report: dict[str, Any] = {}
+        for coordinator in coordinators:
+            entry = coordinator.config_entry
+            results = await hass.async_add_executor_job(
+                optimize_codes, coordinator.action_codes, call.data[ATTR_DROP_REPEATS]
+            )
+            saved = {name: result for name, result in results.items() if result.saved}
+            report[entry.entry_id] = {
+                "title": entry.title,
+                "codes": {name: result.as_dict() for name, result in results.items()},
+                "saved_ms": round(sum(r.saved for r in saved.values()) / 1000, 1),
+            }
+            if call.data[ATTR_DRY_RUN] or not saved:
+                continue
+            actions = []
+            for action in entry.data.get(CONF_ACTIONS, []):
+                if (result := saved.get(action[CONF_ACTION_NAME])) is not None:
+                    action = {
+                        key: value
+                        for key, value in action.items()
+                        if key != CONF_ACTION_CODE
+                    }
+                    action[CONF_ACTION_CODE_REF] = hub.library.async_add(result.code)
+                actions.append(action)
+            await hub.library.async_save()
+            # The update listener applies the codes and prunes the old ones
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_ACTIONS: actions}
+            )
+            _LOGGER.info(
+                "Optimized %d codes of %s, saving %s ms",
+                len(saved),
+                entry.title,
+                report[entry.entry_id]["saved_ms"],
+            )
+        return {"entries": report}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SEND_SEQUENCE, async_send_sequence, SEND_SEQUENCE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SCHEDULE,
+        async_schedule,
+        SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TRACES,
+        async_get_traces,
+        GET_TRACES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CANCEL_SCHEDULE,
+        async_cancel_schedule,
+        CANCEL_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_OPTIMIZE_CODES,
+        async_optimize_codes,
+        OPTIMIZE_CODES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_MANY,
+        async_send_many,
+        SEND_MANY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
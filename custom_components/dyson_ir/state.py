@@ -0,0 +1,77 @@
+"""Persisted estimated state of Dyson IR devices."""
+import asyncio
+import logging
+from typing import Any, Dict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.state"
+STORAGE_VERSION = 1
+STORAGE_MINOR_VERSION = 1
+# State changes in bursts, so writes wait for it to settle
+SAVE_DELAY = 30
+
+
+class _StateStore(Store):
+    """Store that migrates older schemas of the saved state."""
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: Dict
+    ) -> Dict[str, Any]:
+        """Migrate saved state to the current schema.
+
+        There is no older schema yet. Fields added later are filled in from
+        the defaults when an entry's state is restored.
+        """
+        return old_data
+
+
+class DeviceStateStore:
+    """Keep the estimated state of every entry across restarts.
+
+    States are kept for unloaded entries too, so a reload carries on from
+    where it left off, and only dropped when the entry is removed.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self._store: Store = _StateStore(
+            hass, STORAGE_VERSION, STORAGE_KEY, minor_version=STORAGE_MINOR_VERSION
+        )
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def async_load(self) -> None:
+        """Restore the saved states, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load() or {}
+            for entry_id, state in data.get("states", {}).items():
+                # Entries set up before loading finished keep their live state
+                self.states.setdefault(entry_id, state)
+            self._loaded = True
+            _LOGGER.debug("Restored the state of %d devices", len(self.states))
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the states once changes have settled."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Forget the state of a removed entry."""
+        if self.states.pop(entry_id, None) is not None:
+            self.async_schedule_save()
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the states to save."""
+        return {"states": {entry_id: dict(s) for entry_id, s in self.states.items()}}
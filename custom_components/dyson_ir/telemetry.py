@@ -0,0 +1,281 @@
+"""Press path telemetry for Dyson IR."""
+import logging
+import time
+from array import array
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+from homeassistant.const import EVENT_CALL_SERVICE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+from .library import code_ref
+
+_LOGGER = logging.getLogger(__name__)
+
+HISTOGRAM_SIZE = 256
+TRACE_SIZE = 100
+
+STAGES = ("prepare", "queue", "script", "service", "total")
+
+
+class RollingHistogram:
+    """The most recent samples in a fixed-size ring buffer."""
+
+    __slots__ = ("_samples", "_index", "_count")
+
+    def __init__(self, size: int = HISTOGRAM_SIZE) -> None:
+        """Initialize the histogram."""
+        self._samples = array("d", bytes(8 * size))
+        self._index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return min(self._count, len(self._samples))
+
+    def add(self, value: float) -> None:
+        """Add a sample, overwriting the oldest once full."""
+        self._samples[self._index] = value
+        self._index = (self._index + 1) % len(self._samples)
+        self._count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the nearest-rank percentile of the held samples."""
+        if not (held := len(self)):
+            return None
+        ordered = sorted(self._samples[:held])
+        return ordered[min(held - 1, int(fraction * held))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a summary of the held samples."""
+        held = len(self)
+        return {
+            "samples": held,
+            "mean": sum(self._samples[:held]) / held if held else None,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+        }
+
+
+class PressSpan:
+    """Timestamps of one transmission as it moves through the press path."""
+
+    __slots__ = (
+        "created",
+        "prepared",
+        "script_started",
+        "service_called",
+        "finished",
+    )
+
+    def __init__(self) -> None:
+        """Start the span."""
+        self.created = time.perf_counter()
+        self.prepared = self.created
+        self.script_started: Optional[float] = None
+        self.service_called: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def durations(self) -> Dict[str, float]:
+        """Return the time spent in each stage that was reached, in ms."""
+        durations = {"prepare": (self.prepared - self.created) * 1000}
+        if self.script_started is None:
+            return durations
+        durations["queue"] = (self.script_started - self.prepared) * 1000
+        if self.finished is None:
+            return durations
+        if self.service_called is not None:
+            durations["script"] = (self.service_called - self.script_started) * 1000
+            durations["service"] = (self.finished - self.service_called) * 1000
+        else:
+            durations["script"] = (self.finished - self.script_started) * 1000
+        durations["total"] = (self.finished - self.created) * 1000
+        return durations
+
+
+def _offset(start: float, mark: Optional[float]) -> Optional[float]:
+    """Return the ms from start to mark, if reached."""
+    return None if mark is None else round((mark - start) * 1000, 3)
+
+
+def trace_record(
+    entry_id: str,
+    blaster: Hashable,
+    context_id: str,
+    name: str,
+    codes: Sequence[str],
+    span: PressSpan,
+    error: Optional[BaseException],
+) -> Dict[str, Any]:
+    """Return the trace of one transmission, with stage marks in ms from its start."""
+    finished = span.finished if span.finished is not None else time.perf_counter()
+    return {
+        "at": time.time() - (finished - span.created),
+        "entry_id": entry_id,
+        "blaster": [list(target) for target in blaster],
+        "context_id": context_id,
+        "name": name,
+        "codes": [code_ref(code) for code in codes],
+        "prepared_ms": _offset(span.created, span.prepared),
+        "script_started_ms": _offset(span.created, span.script_started),
+        "service_called_ms": _offset(span.created, span.service_called),
+        "finished_ms": _offset(span.created, span.finished),
+        "error": None if error is None else repr(error),
+    }
+
+
+class TransmitStats:
+    """Rolling stage timings and outcome counters for an entry or blaster."""
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.stages = {stage: RollingHistogram() for stage in STAGES}
+        self.sent = 0
+        self.failed = 0
+        self.suppressed = 0
+        self.last_error: Optional[str] = None
+
+    def record(self, span: PressSpan, error: Optional[BaseException]) -> None:
+        """Record a finished transmission."""
+        for stage, duration in span.durations().items():
+            self.stages[stage].add(duration)
+        if error is None:
+            self.sent += 1
+        else:
+            self.failed += 1
+            self.last_error = repr(error)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats for diagnostics."""
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "suppressed": self.suppressed,
+            "last_error": self.last_error,
+            "latency_ms": {
+                stage: histogram.as_dict() for stage, histogram in self.stages.items()
+            },
+        }
+
+
+class Telemetry:
+    """Collect press path timings per entry and per blaster.
+
+    The downstream service call is timed from the call_service event that the
+    script engine fires with the transmission's context.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize telemetry."""
+        self.hass = hass
+        self.entries: Dict[str, TransmitStats] = {}
+        self.blasters: Dict[Hashable, TransmitStats] = {}
+        self._inflight: Dict[str, PressSpan] = {}
+        self._listeners: Dict[str, list[Callable[[], None]]] = {}
+        self._unsub_service: Optional[CALLBACK_TYPE] = None
+        # Only entries with tracing turned on have a buffer
+        self.traces: Dict[str, deque[Dict[str, Any]]] = {}
+
+    def entry_stats(self, entry_id: str) -> TransmitStats:
+        """Return the stats of an entry."""
+        if (stats := self.entries.get(entry_id)) is None:
+            stats = self.entries[entry_id] = TransmitStats()
+        return stats
+
+    def blaster_stats(self, key: Hashable) -> TransmitStats:
+        """Return the stats of a blaster."""
+        if (stats := self.blasters.get(key)) is None:
+            stats = self.blasters[key] = TransmitStats()
+        return stats
+
+    @callback
+    def async_track(self, context_id: str, span: PressSpan) -> None:
+        """Watch for the service call a transmission makes in its own context."""
+        if self._unsub_service is None:
+            self._unsub_service = self.hass.bus.async_listen(
+                EVENT_CALL_SERVICE, self._async_service_called
+            )
+        self._inflight[context_id] = span
+
+    @callback
+    def async_untrack(self, context_id: str) -> None:
+        """Stop watching a transmission, whether it finished or was cancelled."""
+        self._inflight.pop(context_id, None)
+
+    @callback
+    def _async_service_called(self, event: Event) -> None:
+        """Mark the start of the downstream service call."""
+        span = self._inflight.get(event.context.id)
+        if span is not None and span.service_called is None:
+            span.service_called = time.perf_counter()
+
+    @callback
+    def async_record(
+        self,
+        entry_id: str,
+        blaster: Hashable,
+        context_id: str,
+        span: PressSpan,
+        error: Optional[BaseException] = None,
+        name: str = "",
+        codes: Sequence[str] = (),
+    ) -> None:
+        """Record a finished transmission and notify listeners."""
+        self.entry_stats(entry_id).record(span, error)
+        self.blaster_stats(blaster).record(span, error)
+        if (trace := self.traces.get(entry_id)) is not None:
+            trace.append(
+                trace_record(entry_id, blaster, context_id, name, codes, span, error)
+            )
+        for update in self._listeners.get(entry_id, ()):
+            update()
+
+    @callback
+    def async_record_suppressed(self, entry_id: str) -> None:
+        """Count a command skipped because it would change nothing."""
+        self.entry_stats(entry_id).suppressed += 1
+        for update in self._listeners.get(entry_id, ()):
+            update()
+
+    @callback
+    def async_add_listener(
+        self, entry_id: str, update: Callable[[], None]
+    ) -> CALLBACK_TYPE:
+        """Call update whenever a transmission of the entry is recorded."""
+        listeners = self._listeners.setdefault(entry_id, [])
+        listeners.append(update)
+
+        @callback
+        def remove() -> None:
+            listeners.remove(update)
+            if not listeners:
+                self._listeners.pop(entry_id, None)
+
+        return remove
+
+    @callback
+    def async_set_tracing(self, entry_id: str, enabled: bool) -> None:
+        """Start or stop keeping the most recent transmissions of an entry."""
+        if not enabled:
+            self.traces.pop(entry_id, None)
+        elif entry_id not in self.traces:
+            self.traces[entry_id] = deque(maxlen=TRACE_SIZE)
+
+    def entry_traces(self, entry_id: str) -> Optional[list[Dict[str, Any]]]:
+        """Return the traced transmissions of an entry, None if not tracing."""
+        if (trace := self.traces.get(entry_id)) is None:
+            return None
+        return list(trace)
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        """Forget the stats of an unloaded entry."""
+        self.entries.pop(entry_id, None)
+        self.traces.pop(entry_id, None)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop timing service calls."""
+        if self._unsub_service is not None:
+            self._unsub_service()
+            self._unsub_service = None
@@ -0,0 +1,153 @@
+"""Per-blaster transmit scheduling for Dyson IR."""
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Hashable, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN, MAX_QUEUE_DEPTH
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+Transmission = Callable[[], Awaitable[None]]
+
+
+class TransmitQueueFull(HomeAssistantError):
+    """Raised when a blaster has too many transmissions waiting."""
+
+
+class _Job:
+    """A single queued transmission."""
+
+    __slots__ = ("send", "min_gap", "future")
+
+    def __init__(
+        self, send: Transmission, min_gap: float, future: asyncio.Future
+    ) -> None:
+        """Initialize the job."""
+        self.send = send
+        self.min_gap = min_gap
+        self.future = future
+
+
+class BlasterQueue:
+    """Serialize transmissions for one blaster.
+
+    Jobs wait in one lane per priority and are sent one at a time, with at
+    least the job's minimum gap between the end of one frame and the start of
+    the next. When the queue is full a new bulk job is rejected, while a new
+    interactive job evicts the most recently queued bulk job instead.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, key: Hashable, max_depth: int = MAX_QUEUE_DEPTH
+    ) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self.key = key
+        self.max_depth = max_depth
+        self._lanes: tuple[deque[_Job], deque[_Job]] = (deque(), deque())
+        self._worker: Optional[asyncio.Task] = None
+        self._last_sent = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Return the number of transmissions waiting."""
+        return sum(len(lane) for lane in self._lanes)
+
+    @property
+    def busy(self) -> bool:
+        """Return whether the blaster is transmitting or has work queued."""
+        return self._worker is not None
+
+    async def async_transmit(
+        self, send: Transmission, priority: int, min_gap: float
+    ) -> None:
+        """Queue a transmission and wait until it has been sent."""
+        if self.depth >= self.max_depth:
+            bulk = self._lanes[PRIORITY_BULK]
+            if priority != PRIORITY_INTERACTIVE or not bulk:
+                raise TransmitQueueFull(
+                    f"Transmit queue for blaster {self.key} is full"
+                )
+            evicted = bulk.pop()
+            _LOGGER.debug("Evicting a bulk transmission for blaster %s", self.key)
+            if not evicted.future.done():
+                evicted.future.set_exception(
+                    TransmitQueueFull(
+                        f"Evicted from the transmit queue for blaster {self.key}"
+                    )
+                )
+
+        job = _Job(send, min_gap, self.hass.loop.create_future())
+        self._lanes[priority].append(job)
+        if self._worker is None:
+            self._worker = self.hass.async_create_background_task(
+                self._async_drain(), f"{DOMAIN} transmit {self.key}"
+            )
+        await job.future
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pop the next job that still has a waiter, highest priority first."""
+        for lane in self._lanes:
+            while lane:
+                job = lane.popleft()
+                if not job.future.done():
+                    return job
+        return None
+
+    async def _async_drain(self) -> None:
+        """Send queued jobs until both lanes are empty."""
+        loop = self.hass.loop
+        try:
+            while (job := self._next_job()) is not None:
+                if (wait := self._last_sent + job.min_gap - loop.time()) > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    await job.send()
+                except Exception as err:
+                    if not job.future.done():
+                        job.future.set_exception(err)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(None)
+                finally:
+                    self._last_sent = loop.time()
+        finally:
+            self._worker = None
+            for lane in self._lanes:
+                while lane:
+                    job = lane.popleft()
+                    if not job.future.done():
+                        job.future.cancel()
+
+
+class TransmitScheduler:
+    """Shared transmit queues keyed by blaster target."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._queues: dict[Hashable, BlasterQueue] = {}
+
+    def queue(self, key: Hashable) -> BlasterQueue:
+        """Return the queue for a blaster, creating it on first use."""
+        if (blaster_queue := self._queues.get(key)) is None:
+            blaster_queue = self._queues[key] = BlasterQueue(self.hass, key)
+        return blaster_queue
+
+    async def async_transmit(
+        self,
+        key: Hashable,
+        send: Transmission,
+        priority: int = PRIORITY_BULK,
+        min_gap: float = 0.0,
+    ) -> None:
+        """Send through the blaster identified by key, waiting for its turn."""
+        await self.queue(key).async_transmit(send, priority, min_gap)
+
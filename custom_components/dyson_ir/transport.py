@@ -0,0 +1,340 @@
+"""Direct IR transports for Dyson IR.
+
+By default codes are sent by running the blaster actions through the script
+engine, which in turn calls another integration's service. A transport skips
+all of that and puts the code on the network itself:
+
+- ``broadlink``/``broadlink_rm4``: an authenticated UDP session with a
+  Broadlink RM device, kept open and shared by every entry using the device
+- ``mqtt``: a publish to an ESPHome or Tasmota blaster's command topic
+
+Whenever a transport fails the blaster actions are run instead.
+"""
+import asyncio
+import base64
+import logging
+import random
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Mapping, Optional
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC, format_mac
+
+from .codec import BROADLINK_PREFIX, FORMAT_BROADLINK, InvalidIRCode, transcode
+from .const import (
+    CONF_MQTT_PAYLOAD,
+    CONF_MQTT_TOPIC,
+    CONF_TRANSPORT,
+    CONF_TRANSPORT_HOST,
+    CONF_TRANSPORT_MAC,
+    IR_CODE_PLACEHOLDER,
+    TRANSPORT_BROADLINK,
+    TRANSPORT_BROADLINK_RM4,
+    TRANSPORT_MQTT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+BROADLINK_PORT = 80
+BROADLINK_TIMEOUT = 2.0  # seconds per request
+BROADLINK_RETRIES = 2
+
+BROADLINK_MAGIC = bytes.fromhex("5aa5aa555aa5aa55")
+BROADLINK_KEY = bytes.fromhex("097628343fe99e23765c1513accf8b02")
+BROADLINK_IV = bytes.fromhex("562e17996d093d28ddb3ba695a2e6f58")
+BROADLINK_AUTH = 0x65
+BROADLINK_COMMAND = 0x6A
+BROADLINK_SEND_DATA = 0x02
+# Errors after which the session has to authenticate again
+BROADLINK_AUTH_ERRORS = (-1, -2, -7)
+# Device types put in the header; devices answer regardless of the exact model
+BROADLINK_DEVTYPE_RM = 0x2737
+BROADLINK_DEVTYPE_RM4 = 0x51DA
+
+
+class TransportError(HomeAssistantError):
+    """Raised when a transport cannot deliver a code."""
+
+
+class _BroadlinkAuthError(TransportError):
+    """Raised when a Broadlink device no longer accepts the session."""
+
+
+class _BroadlinkProtocol(asyncio.DatagramProtocol):
+    """Match responses from a Broadlink device to the requests waiting on them."""
+
+    def __init__(self) -> None:
+        """Initialize the protocol."""
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.pending: Dict[int, asyncio.Future[bytes]] = {}
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Keep the transport."""
+        self.transport = transport  # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        """Resolve the request a response belongs to."""
+        if len(data) < 0x38 or data[:8] != BROADLINK_MAGIC:
+            return
+        count = int.from_bytes(data[0x28:0x2A], "little")
+        if (future := self.pending.pop(count, None)) is not None and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        """Fail every waiting request."""
+        self._fail(exc)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """Fail every waiting request and forget the transport."""
+        self.transport = None
+        self._fail(exc or ConnectionError("Connection closed"))
+
+    def _fail(self, exc: Exception) -> None:
+        """Fail every waiting request with exc."""
+        pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+
+class BroadlinkSession:
+    """A persistent, authenticated session with one Broadlink RM device."""
+
+    def __init__(
+        self, host: str, mac: str, rm4: bool, port: int = BROADLINK_PORT
+    ) -> None:
+        """Initialize the session."""
+        self.host = host
+        self.port = port
+        self.mac = bytes.fromhex(mac.replace(":", "").replace("-", ""))
+        self.rm4 = rm4
+        self.devtype = BROADLINK_DEVTYPE_RM4 if rm4 else BROADLINK_DEVTYPE_RM
+        self._count = random.randrange(0x8000)
+        self._id = 0
+        self._key = BROADLINK_KEY
+        self._authenticated = False
+        self._protocol: Optional[_BroadlinkProtocol] = None
+        self._lock = asyncio.Lock()
+
+    def _cipher(self) -> Cipher:
+        """Return the cipher of the current session key."""
+        return Cipher(algorithms.AES(self._key), modes.CBC(BROADLINK_IV))
+
+    def _encrypt(self, payload: bytes) -> bytes:
+        """Encrypt a payload, padded to the block size."""
+        encryptor = self._cipher().encryptor()
+        padded = payload + bytes((16 - len(payload)) % 16)
+        return encryptor.update(padded) + encryptor.finalize()
+
+    def _decrypt(self, payload: bytes) -> bytes:
+        """Decrypt a payload."""
+        decryptor = self._cipher().decryptor()
+        return decryptor.update(payload) + decryptor.finalize()
+
+    def _packet(self, packet_type: int, payload: bytes) -> tuple[int, bytes]:
+        """Return the request count and the packet carrying payload."""
+        self._count = ((self._count + 1) | 0x8000) & 0xFFFF
+        packet = bytearray(0x38)
+        packet[0x00:0x08] = BROADLINK_MAGIC
+        packet[0x24:0x26] = self.devtype.to_bytes(2, "little")
+        packet[0x26:0x28] = packet_type.to_bytes(2, "little")
+        packet[0x28:0x2A] = self._count.to_bytes(2, "little")
+        packet[0x2A:0x30] = self.mac[::-1]
+        packet[0x30:0x34] = self._id.to_bytes(4, "little")
+        packet[0x34:0x36] = (sum(payload, 0xBEAF) & 0xFFFF).to_bytes(2, "little")
+        packet.extend(self._encrypt(payload))
+        packet[0x20:0x22] = (sum(packet, 0xBEAF) & 0xFFFF).to_bytes(2, "little")
+        return self._count, bytes(packet)
+
+    async def _async_connect(self) -> _BroadlinkProtocol:
+        """Return the open socket to the device, opening it if needed."""
+        if self._protocol is None or self._protocol.transport is None:
+            loop = asyncio.get_running_loop()
+            _, self._protocol = await loop.create_datagram_endpoint(
+                _BroadlinkProtocol, remote_addr=(self.host, self.port)
+            )
+        return self._protocol
+
+    async def _async_request(self, packet_type: int, payload: bytes) -> bytes:
+        """Send a request and return the decrypted response payload."""
+        protocol = await self._async_connect()
+        count, packet = self._packet(packet_type, payload)
+        response = protocol.pending[count] = asyncio.get_running_loop().create_future()
+        assert protocol.transport is not None
+        protocol.transport.sendto(packet)
+        try:
+            data = await asyncio.wait_for(response, BROADLINK_TIMEOUT)
+        finally:
+            protocol.pending.pop(count, None)
+        error = int.from_bytes(data[0x22:0x24], "little", signed=True)
+        if error in BROADLINK_AUTH_ERRORS:
+            raise _BroadlinkAuthError(f"{self.host} rejected the session ({error})")
+        if error:
+            raise TransportError(f"{self.host} returned error {error}")
+        return self._decrypt(data[0x38:])
+
+    async def _async_auth(self) -> None:
+        """Authenticate and switch to the session key."""
+        self._id = 0
+        self._key = BROADLINK_KEY
+        payload = bytearray(0x50)
+        payload[0x04:0x14] = bytes([0x31] * 16)
+        payload[0x1E] = 0x01
+        payload[0x2D] = 0x01
+        payload[0x30:0x36] = b"Test 1"
+        data = await self._async_request(BROADLINK_AUTH, bytes(payload))
+        self._id = int.from_bytes(data[:0x04], "little")
+        self._key = bytes(data[0x04:0x14])
+        self._authenticated = True
+        _LOGGER.debug("Authenticated with Broadlink device %s", self.host)
+
+    def _send_data_payload(self, data: bytes) -> bytes:
+        """Return the command payload that transmits an IR packet."""
+        if self.rm4:
+            return struct.pack("<HI", len(data) + 4, BROADLINK_SEND_DATA) + data
+        return struct.pack("<I", BROADLINK_SEND_DATA) + data
+
+    async def _async_send_data(self, data: bytes) -> None:
+        """Transmit one IR packet, authenticating and retrying as needed."""
+        error: Exception = TransportError(f"Cannot reach {self.host}")
+        for _ in range(BROADLINK_RETRIES + 1):
+            try:
+                if not self._authenticated:
+                    await self._async_auth()
+                await self._async_request(
+                    BROADLINK_COMMAND, self._send_data_payload(data)
+                )
+                return
+            except _BroadlinkAuthError as err:
+                self._authenticated = False
+                error = err
+            except (asyncio.TimeoutError, OSError, TransportError) as err:
+                error = err
+        raise TransportError(f"Cannot send to {self.host}: {error!r}") from error
+
+    async def async_send(self, packets: list[bytes], gap: float) -> None:
+        """Transmit IR packets in order, gap seconds apart."""
+        async with self._lock:
+            for index, data in enumerate(packets):
+                if index and gap:
+                    await asyncio.sleep(gap)
+                await self._async_send_data(data)
+
+    @callback
+    def async_close(self) -> None:
+        """Close the socket; the next send reconnects and authenticates."""
+        if self._protocol is not None and self._protocol.transport is not None:
+            self._protocol.transport.close()
+        self._protocol = None
+        self._authenticated = False
+
+
+def _broadlink_packet(code: str) -> bytes:
+    """Return the Broadlink IR packet of a code in any supported format."""
+    code = transcode(code, FORMAT_BROADLINK)
+    return base64.b64decode(code[len(BROADLINK_PREFIX) :])
+
+
+class Transport(ABC):
+    """Send IR codes to a blaster directly."""
+
+    key: Hashable
+    # Device registry connections of the blaster, where it has any
+    connections: frozenset[tuple[str, str]] = frozenset()
+
+    @abstractmethod
+    async def async_send(self, codes: list[str], gap: float) -> None:
+        """Transmit codes in order, gap seconds apart."""
+
+
+class BroadlinkTransport(Transport):
+    """Send codes over a shared Broadlink session."""
+
+    def __init__(self, session: BroadlinkSession) -> None:
+        """Initialize the transport."""
+        self.session = session
+        self.key = ((TRANSPORT_BROADLINK, session.host),)
+        self.connections = frozenset(
+            {(CONNECTION_NETWORK_MAC, format_mac(session.mac.hex()))}
+        )
+
+    async def async_send(self, codes: list[str], gap: float) -> None:
+        """Transmit codes in order, gap seconds apart."""
+        try:
+            packets = [_broadlink_packet(code) for code in codes]
+        except InvalidIRCode as err:
+            raise TransportError(f"Cannot send over Broadlink: {err}") from err
+        await self.session.async_send(packets, gap)
+
+
+class MqttTransport(Transport):
+    """Publish codes to an MQTT blaster, e.g. ESPHome or Tasmota."""
+
+    def __init__(self, hass: HomeAssistant, topic: str, payload: str) -> None:
+        """Initialize the transport."""
+        self.hass = hass
+        self.topic = topic
+        self.payload = payload
+        self.key = ((TRANSPORT_MQTT, topic),)
+
+    async def async_send(self, codes: list[str], gap: float) -> None:
+        """Publish codes in order, gap seconds apart."""
+        # MQTT is only loaded for entries that publish through it
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components import mqtt
+
+        for index, code in enumerate(codes):
+            if index and gap:
+                await asyncio.sleep(gap)
+            try:
+                payload = self.payload.replace(IR_CODE_PLACEHOLDER, code)
+                await mqtt.async_publish(self.hass, self.topic, payload)
+            except HomeAssistantError as err:
+                raise TransportError(f"Cannot publish to {self.topic}: {err}") from err
+
+
+class TransportPool:
+    """Broadlink sessions shared by every entry sending through the same device."""
+
+    def __init__(self) -> None:
+        """Initialize the pool."""
+        self._sessions: Dict[tuple[str, str, bool], BroadlinkSession] = {}
+
+    def broadlink(self, host: str, mac: str, rm4: bool) -> BroadlinkSession:
+        """Return the session with a device, creating it on first use."""
+        key = (host, mac.lower(), rm4)
+        if (session := self._sessions.get(key)) is None:
+            session = self._sessions[key] = BroadlinkSession(host, mac, rm4)
+        return session
+
+    @callback
+    def async_close(self) -> None:
+        """Close every session."""
+        for session in self._sessions.values():
+            session.async_close()
+        self._sessions.clear()
+
+
+def create_transport(
+    hass: HomeAssistant, options: Mapping[str, Any], pool: TransportPool
+) -> Optional[Transport]:
+    """Return the transport configured in options, None for the script engine."""
+    transport = options.get(CONF_TRANSPORT)
+    if transport in (TRANSPORT_BROADLINK, TRANSPORT_BROADLINK_RM4):
+        return BroadlinkTransport(
+            pool.broadlink(
+                options[CONF_TRANSPORT_HOST],
+                options[CONF_TRANSPORT_MAC],
+                transport == TRANSPORT_BROADLINK_RM4,
+            )
+        )
+    if transport == TRANSPORT_MQTT:
+        return MqttTransport(
+            hass,
+            options[CONF_MQTT_TOPIC],
+            options.get(CONF_MQTT_PAYLOAD) or IR_CODE_PLACEHOLDER,
+        )
+    return None
@@ -0,0 +1,92 @@
+"""Simulated Broadlink RM device for dyson_ir transport tests."""
+import asyncio
+import os
+import struct
+from typing import Any, Optional
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from custom_components.dyson_ir.transport import (
+    BROADLINK_AUTH,
+    BROADLINK_IV,
+    BROADLINK_KEY,
+    BROADLINK_MAGIC,
+)
+
+SESSION_ID = 0x1234
+
+
+def _cipher(key: bytes) -> Cipher:
+    """Return the cipher of a key."""
+    return Cipher(algorithms.AES(key), modes.CBC(BROADLINK_IV))
+
+
+class FakeBroadlink(asyncio.DatagramProtocol):
+    """A Broadlink RM that authenticates sessions and records the IR it sends.
+
+    Set ``expire`` to reject the next command as if the device had rebooted,
+    forcing the client to authenticate again.
+    """
+
+    def __init__(self, rm4: bool = False) -> None:
+        """Initialize the device."""
+        self.rm4 = rm4
+        self.key = os.urandom(16)
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.auths = 0
+        self.sent: list[bytes] = []
+        self.expire = False
+
+    @property
+    def port(self) -> int:
+        """Return the port the device listens on."""
+        assert self.transport is not None
+        return self.transport.get_extra_info("sockname")[1]
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Keep the transport."""
+        self.transport = transport  # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        """Answer an authentication or command request."""
+        assert data[:8] == BROADLINK_MAGIC
+        command = int.from_bytes(data[0x26:0x28], "little")
+        if command == BROADLINK_AUTH:
+            self.auths += 1
+            payload = SESSION_ID.to_bytes(4, "little") + self.key
+            self._reply(data, addr, 0, payload, BROADLINK_KEY)
+            return
+        if self.expire or int.from_bytes(data[0x30:0x34], "little") != SESSION_ID:
+            self.expire = False
+            self._reply(data, addr, -7, b"", self.key)
+            return
+        decryptor = _cipher(self.key).decryptor()
+        payload = decryptor.update(data[0x38:]) + decryptor.finalize()
+        if self.rm4:
+            length, _ = struct.unpack("<HI", payload[:6])
+            self.sent.append(payload[6 : length + 2])
+        else:
+            # RM payloads carry no length, so the zero padding stays on
+            self.sent.append(payload[4:].rstrip(b"\0"))
+        self._reply(data, addr, 0, b"", self.key)
+
+    def _reply(
+        self, request: bytes, addr: Any, error: int, payload: bytes, key: bytes
+    ) -> None:
+        """Send a response to request."""
+        packet = bytearray(request[:0x38])
+        packet[0x22:0x24] = error.to_bytes(2, "little", signed=True)
+        encryptor = _cipher(key).encryptor()
+        padded = payload + bytes((16 - len(payload)) % 16)
+        packet.extend(encryptor.update(padded) + encryptor.finalize())
+        assert self.transport is not None
+        self.transport.sendto(bytes(packet), addr)
+
+
+async def async_start_fake_broadlink(rm4: bool = False) -> FakeBroadlink:
+    """Start a fake device listening on a free local port."""
+    loop = asyncio.get_running_loop()
+    _, device = await loop.create_datagram_endpoint(
+        lambda: FakeBroadlink(rm4), local_addr=("127.0.0.1", 0)
+    )
+    return device
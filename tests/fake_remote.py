@@ -0,0 +1,70 @@
+"""Simulated IR blaster for dyson_ir tests and benchmarks."""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+
+
+@dataclass
+class FakeRemote:
+    """A remote.send_command handler with configurable latency and loss.
+
+    Every call is recorded with the time the handler was entered, so callers
+    can measure how long a press took to reach the blaster. Dropped frames are
+    accepted silently, like a real IR blaster would; the first `failures`
+    calls raise, like a blaster that is offline.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    drop_rate: float = 0.0
+    failures: int = 0
+    seed: Optional[int] = 0
+    calls: list[dict[str, Any]] = field(default_factory=list)
+    received_at: list[float] = field(default_factory=list)
+    dropped: int = 0
+
+    def __post_init__(self) -> None:
+        """Seed the random source."""
+        self._random = random.Random(self.seed)
+
+    async def async_handle(self, call: ServiceCall) -> None:
+        """Handle one remote.send_command call."""
+        self.received_at.append(time.perf_counter())
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.failures:
+            self.failures -= 1
+            raise HomeAssistantError("Blaster is offline")
+        if self._random.random() < self.drop_rate:
+            self.dropped += 1
+            return
+        self.calls.append(dict(call.data))
+
+    def register(self, hass: HomeAssistant) -> "FakeRemote":
+        """Register the handler as remote.send_command."""
+        hass.services.async_register("remote", "send_command", self.async_handle)
+        return self
+
+
+def blaster_action(device_id: str = "blaster_device") -> list[dict[str, Any]]:
+    """Return blaster actions that send through the fake remote."""
+    return [
+        {
+            "service": "remote.send_command",
+            "data": {"device_id": device_id, "command": "IR_CODE"},
+        }
+    ]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
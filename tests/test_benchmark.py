@@ -0,0 +1,145 @@
+"""Benchmarks for the dyson_ir press and setup paths.
+
+The defaults keep these fast enough for every test run. Set
+DYSON_IR_BENCHMARK_SCALE to multiply the workload and
+DYSON_IR_BENCHMARK_OUTPUT to a file path to get the results as JSON.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.const import CONF_ACTIONS, CONF_BLASTER_ACTION, DOMAIN
+from custom_components.dyson_ir.hub import async_get_hub
+
+from .fake_remote import FakeRemote, blaster_action, percentile
+
+SCALE = int(os.environ.get("DYSON_IR_BENCHMARK_SCALE", "1"))
+OUTPUT = os.environ.get("DYSON_IR_BENCHMARK_OUTPUT")
+
+RESULTS: dict[str, Any] = {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def write_results():
+    """Write the collected results once the module has run."""
+    yield
+    if OUTPUT:
+        with open(OUTPUT, "w", encoding="utf-8") as file:
+            json.dump({"scale": SCALE, **RESULTS}, file, indent=2, sort_keys=True)
+
+
+async def _setup_entry(
+    hass: HomeAssistant, name: str, actions: int, device_id: str = "blaster_device"
+) -> MockConfigEntry:
+    """Add and set up an entry with the given number of actions."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title=name,
+        data={
+            "name": name,
+            CONF_BLASTER_ACTION: blaster_action(device_id),
+            CONF_ACTIONS: [
+                {"name": f"Action {index}", "ir_code": f"{name}_code_{index}"}
+                for index in range(actions)
+            ],
+        },
+        options={"min_frame_gap": 0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    return entry
+
+
+def _button(hass: HomeAssistant, entry: MockConfigEntry, index: int) -> str:
+    """Return the entity id of an entry's button."""
+    unique_id = f"{DOMAIN}_{entry.entry_id}_action_{index}"
+    entity_id = er.async_get(hass).async_get_entity_id("button", DOMAIN, unique_id)
+    assert entity_id is not None
+    return entity_id
+
+
+async def _press(hass: HomeAssistant, entity_id: str) -> None:
+    """Press a button through the service layer, like an automation would."""
+    await hass.services.async_call(
+        "button", "press", {"entity_id": entity_id}, blocking=True
+    )
+
+
+async def test_press_latency(hass: HomeAssistant):
+    """Measure press-to-service-call latency through the whole press path."""
+    remote = FakeRemote().register(hass)
+    entry = await _setup_entry(hass, "Latency", 4)
+    entity_id = _button(hass, entry, 0)
+    presses = 200 * SCALE
+
+    latencies = []
+    for _ in range(presses):
+        started = time.perf_counter()
+        await _press(hass, entity_id)
+        latencies.append((remote.received_at[-1] - started) * 1000)
+
+    assert len(remote.calls) == presses
+    RESULTS["press_latency_ms"] = {
+        "presses": presses,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+async def test_presses_per_second_per_blaster(hass: HomeAssistant):
+    """Measure sustained presses per second on one blaster with latency."""
+    remote = FakeRemote(latency=0.002, jitter=0.001, drop_rate=0.05).register(hass)
+    entry = await _setup_entry(hass, "Throughput", 8)
+    entity_ids = [_button(hass, entry, index) for index in range(8)]
+    waves = 10 * SCALE
+
+    started = time.perf_counter()
+    for _ in range(waves):
+        # Stay under the transmit queue depth so nothing is rejected
+        await asyncio.gather(*(_press(hass, entity_id) for entity_id in entity_ids))
+    elapsed = time.perf_counter() - started
+
+    presses = waves * len(entity_ids)
+    assert len(remote.calls) + remote.dropped == presses
+    RESULTS["throughput"] = {
+        "presses": presses,
+        "presses_per_second": presses / elapsed,
+        "dropped": remote.dropped,
+    }
+
+
+async def test_setup_scaling(hass: HomeAssistant):
+    """Measure setup time for N entries with M actions each."""
+    FakeRemote().register(hass)
+    entries, actions = 20 * SCALE, 10
+
+    per_entry = []
+    started = time.perf_counter()
+    for index in range(entries):
+        entry_started = time.perf_counter()
+        await _setup_entry(hass, f"Setup {index}", actions, f"blaster_{index % 4}")
+        per_entry.append((time.perf_counter() - entry_started) * 1000)
+    await hass.async_block_till_done()
+    total = (time.perf_counter() - started) * 1000
+
+    assert len(hass.states.async_entity_ids("button")) == entries * actions
+    timings = list(async_get_hub(hass).setup_timings.values())
+    RESULTS["setup"] = {
+        "entries": entries,
+        "actions_per_entry": actions,
+        "total_ms": total,
+        "per_entry_ms_p50": percentile(per_entry, 0.5),
+        "per_entry_ms_p99": percentile(per_entry, 0.99),
+        "stages_ms_p50": {
+            stage: percentile([timing[stage] for timing in timings], 0.5)
+            for stage in ("storage_ms", "coordinator_ms", "platforms_ms")
+        },
+    }
@@ -1,13 +1,15 @@
 """Test dyson_ir button platform."""
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 from homeassistant.core import HomeAssistant
 
 from custom_components.dyson_ir.const import (
     CONF_ACTIONS,
     CONF_BLASTER_ACTION,
-    DOMAIN,
 )
+from custom_components.dyson_ir.hub import async_get_hub
+
+from .fake_remote import FakeRemote
 
 
 async def test_button_creation_and_press(hass: HomeAssistant):
@@ -15,6 +17,7 @@ async def test_button_creation_and_press(hass: HomeAssistant):
     # Mock config entry
     config_entry = MagicMock()
     config_entry.entry_id = "test_entry_id"
+    config_entry.options = {}
     config_entry.data = {
         "name": "Test Device",
         CONF_BLASTER_ACTION: [
@@ -30,13 +33,10 @@ async def test_button_creation_and_press(hass: HomeAssistant):
     }
 
     # Setup coordinator
-    with patch(
-        "custom_components.dyson_ir.coordinator.DysonIRCoordinator.async_config_entry_first_refresh"
-    ):
-        from custom_components.dyson_ir.coordinator import DysonIRCoordinator
+    from custom_components.dyson_ir.coordinator import DysonIRCoordinator
 
-        coordinator = DysonIRCoordinator(hass, config_entry)
-        hass.data[DOMAIN] = {config_entry.entry_id: coordinator}
+    coordinator = DysonIRCoordinator(hass, config_entry)
+    async_get_hub(hass).async_add_coordinator(coordinator)
 
     # Setup button platform
     from custom_components.dyson_ir.button import async_setup_entry
@@ -54,14 +54,28 @@ async def test_button_creation_and_press(hass: HomeAssistant):
     assert "power_on" in button_on.unique_id
 
     # Test pressing the button
-    with patch.object(hass.services, "async_call") as mock_call:
-        await button_on.async_press()
+    remote = FakeRemote().register(hass)
+    await button_on.async_press()
+    assert remote.calls == [{"device_id": "blaster_device_id", "command": ["code_on"]}]
 
-        mock_call.assert_called_once_with(
-            "remote",
-            "send_command",
-            {
-                "device_id": "blaster_device_id",
-                "command": ["code_on"],
-            },
-        )
+
+async def test_blaster_plan_binds_without_mutating_config(hass: HomeAssistant):
+    """Test that the compiled blaster plan leaves the configured actions intact."""
+    from custom_components.dyson_ir.blaster import BlasterPlan
+
+    blaster_actions = [
+        {
+            "service": "remote.send_command",
+            "data": {"device_id": "blaster_device_id", "command": "IR_CODE"},
+        },
+        {"service": "esphome.send_ir", "data": {"code": "IR_CODE", "repeat": 1}},
+    ]
+    plan = BlasterPlan(blaster_actions)
+    assert plan.slot_count == 2
+
+    bound = plan.bind("code_on")
+    assert bound[0]["data"]["command"] == ["code_on"]
+    assert bound[1]["data"] == {"code": "code_on", "repeat": 1}
+    assert blaster_actions[0]["data"]["command"] == "IR_CODE"
+    assert blaster_actions[1]["data"]["code"] == "IR_CODE"
+    assert plan.bind("code_off")[0]["data"]["command"] == ["code_off"]
@@ -0,0 +1,126 @@
+"""Test dyson_ir climate platform."""
+import json
+
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.components.climate import HVACMode
+from homeassistant.core import HomeAssistant
+
+from custom_components.dyson_ir.climate_table import from_smartir
+from custom_components.dyson_ir.const import (
+    CONF_BLASTER_ACTION,
+    CONF_CLIMATE_MODEL,
+    CONF_DEVICE_TYPE,
+    DEVICE_TYPE_AC,
+    DOMAIN,
+)
+from custom_components.dyson_ir.hub import async_get_hub
+
+from .fake_remote import FakeRemote, blaster_action
+
+
+def _code(number: int) -> str:
+    """Return a distinct valid raw IR code."""
+    return f"9000,-4500,560,-560,{560 + number},-1690"
+
+
+SMARTIR_AC = {
+    "manufacturer": "Test",
+    "minTemperature": 16,
+    "maxTemperature": 18,
+    "precision": 1,
+    "operationModes": ["cool", "fan_only"],
+    "fanModes": ["low", "high"],
+    "commands": {
+        "off": _code(0),
+        "cool": {
+            "low": {"16": _code(1), "17": _code(2), "18": _code(3)},
+            "high": {"16": _code(4), "17": _code(5), "18": _code(1)},
+        },
+        # Fan only codes do not depend on the temperature
+        "fan_only": {"low": _code(6), "high": _code(7)},
+    },
+}
+
+
+def test_table_lookup():
+    """Test that every state resolves to its code and codes are stored once."""
+    table = from_smartir(SMARTIR_AC)
+    assert table.modes == ("cool", "fan_only")
+    assert table.size == 2 * 2 * 1 * 3
+    assert len(table.codes) == 8
+    assert table.lookup("cool", 17, "low") == _code(2)
+    assert table.lookup("cool", 18, "high") == _code(1)
+    assert table.lookup("fan_only", 16.4, "high") == _code(7)
+    assert table.lookup("cool", 25, "low") is None
+    assert table.lookup("off", 16) == _code(0)
+    assert from_smartir(json.loads(json.dumps(SMARTIR_AC))).model_id == table.model_id
+
+
+async def _async_add_ac(hass: HomeAssistant, name: str) -> config_entries.ConfigEntry:
+    """Add an AC entry through the config flow."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={"name": name, CONF_DEVICE_TYPE: DEVICE_TYPE_AC},
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={CONF_BLASTER_ACTION: blaster_action()}
+    )
+    assert result["step_id"] == "climate_codes"
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"json": json.dumps(SMARTIR_AC)}
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    await hass.async_block_till_done()
+    return result["result"]
+
+
+async def test_climate_sends_full_state(hass: HomeAssistant):
+    """Test that an AC is one entity sending one code per change."""
+    remote = FakeRemote().register(hass)
+    entry = await _async_add_ac(hass, "Bedroom AC")
+    other = await _async_add_ac(hass, "Office AC")
+
+    # Both entries use the one stored table
+    assert entry.data[CONF_CLIMATE_MODEL] == other.data[CONF_CLIMATE_MODEL]
+    assert len(async_get_hub(hass).climate_tables) == 1
+    assert hass.states.async_entity_ids("button") == []
+
+    state = hass.states.get("climate.bedroom_ac")
+    assert state.state == HVACMode.OFF
+    assert state.attributes["hvac_modes"] == ["off", "cool", "fan_only"]
+
+    await hass.services.async_call(
+        "climate",
+        "set_temperature",
+        {
+            "entity_id": "climate.bedroom_ac",
+            "temperature": 17,
+            "hvac_mode": HVACMode.COOL,
+        },
+        blocking=True,
+    )
+    await hass.services.async_call(
+        "climate",
+        "set_fan_mode",
+        {"entity_id": "climate.bedroom_ac", "fan_mode": "high"},
+        blocking=True,
+    )
+    await hass.services.async_call(
+        "climate",
+        "turn_off",
+        {"entity_id": "climate.bedroom_ac"},
+        blocking=True,
+    )
+
+    assert [call["command"] for call in remote.calls] == [
+        [_code(2)],
+        [_code(5)],
+        [_code(0)],
+    ]
+    state = hass.states.get("climate.bedroom_ac")
+    assert state.state == HVACMode.OFF
+    assert state.attributes["temperature"] == 17
+    assert state.attributes["fan_mode"] == "high"
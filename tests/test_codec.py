@@ -0,0 +1,72 @@
+"""Test dyson_ir IR code formats."""
+import base64
+from array import array
+
+import pytest
+
+from custom_components.dyson_ir.codec import (
+    FORMAT_BROADLINK,
+    FORMAT_PRONTO,
+    FORMAT_RAW,
+    InvalidIRCode,
+    IRSignal,
+    decode,
+    detect_format,
+    encode,
+    transcode,
+    validate,
+)
+
+NEC_TIMINGS = [9000, 4500] + [560, 560, 560, 1690] * 16 + [560, 40000]
+
+
+def test_round_trip_all_formats():
+    """Test that a signal survives every format within encoding precision."""
+    signal = IRSignal(array("I", NEC_TIMINGS))
+    for code_format in (FORMAT_BROADLINK, FORMAT_PRONTO, FORMAT_RAW):
+        code = encode(signal, code_format)
+        assert detect_format(code) == code_format
+        decoded = decode(code)
+        assert len(decoded.timings) == len(NEC_TIMINGS)
+        assert all(
+            abs(got - want) <= max(35, want * 0.01)
+            for got, want in zip(decoded.timings, NEC_TIMINGS, strict=True)
+        )
+
+
+def test_raw_signed_timings_are_merged():
+    """Test that signed raw codes merge repeated signs and drop a lead-in gap."""
+    signal = decode("-100, +9000, -4500, -100, 560")
+    assert list(signal.timings) == [9000, 4600, 560]
+
+
+def test_transcode_adds_broadlink_prefix():
+    """Test that bare Broadlink base64 gains the prefix remote.send_command needs."""
+    code = encode(IRSignal(array("I", NEC_TIMINGS)), FORMAT_BROADLINK)
+    assert transcode(code.removeprefix("b64:"), FORMAT_BROADLINK) == code
+    assert detect_format(transcode(code, FORMAT_PRONTO)) == FORMAT_PRONTO
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "b64:JgAB",
+        "0000 006D 0002 0000 0010",
+        "0100 006D 0001 0000 0010 0010",
+        "9000,0,560",
+    ],
+)
+def test_malformed_codes_are_rejected(code):
+    """Test that codes in a known format must decode."""
+    with pytest.raises(InvalidIRCode):
+        validate(code, allow_unrecognised=True)
+
+
+def test_unrecognised_codes():
+    """Test that learned command names and RF codes pass only when allowed."""
+    rf = base64.b64encode(bytes([0xB2, 0x00, 0x04, 0x00, 10, 20, 10, 20])).decode()
+    for code in ("power_on", rf):
+        assert detect_format(code) is None
+        assert validate(code, allow_unrecognised=True) is None
+        with pytest.raises(InvalidIRCode):
+            validate(code)
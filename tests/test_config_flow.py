@@ -3,14 +3,18 @@ from unittest.mock import patch
 
 from homeassistant import config_entries, data_entry_flow
 from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.dyson_ir.const import (
+    CONF_ACTION_CODE_REF,
     CONF_ACTIONS,
     CONF_BLASTER_ACTION,
     CONF_DEVICE_TYPE,
     DEVICE_TYPE_FAN,
     DOMAIN,
 )
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.library import code_ref
 
 
 async def test_full_config_flow(hass: HomeAssistant):
@@ -79,8 +83,13 @@ async def test_full_config_flow(hass: HomeAssistant):
         "name": "Test Fan",
         CONF_DEVICE_TYPE: DEVICE_TYPE_FAN,
         CONF_BLASTER_ACTION: action_list,
-        CONF_ACTIONS: [{"name": "Power On", "ir_code": "dummy_code_1"}],
+        CONF_ACTIONS: [
+            {"name": "Power On", CONF_ACTION_CODE_REF: code_ref("dummy_code_1")}
+        ],
     }
+    assert async_get_hub(hass).library.resolve(code_ref("dummy_code_1")) == (
+        "dummy_code_1"
+    )
     assert len(mock_setup.mock_calls) == 1
 
 
@@ -106,3 +115,150 @@ async def test_no_actions_error(hass: HomeAssistant):
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["step_id"] == "actions"
     assert result["errors"] == {"base": "no_actions"}
+
+
+async def test_invalid_ir_code_error(hass: HomeAssistant):
+    """Test that a malformed code is rejected before it is stored."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={"name": "Test", CONF_DEVICE_TYPE: DEVICE_TYPE_FAN},
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={CONF_BLASTER_ACTION: [{"service": "remote.send_command"}]},
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"add_more": True}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={"name": "Power On", "ir_code": "0000 006D 0002 0000 0010"},
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "add_action"
+    assert result["errors"] == {"ir_code": "invalid_ir_code"}
+
+
+async def test_import_codes(hass: HomeAssistant):
+    """Test that a pasted code set adds all of its valid actions at once."""
+    on_code = "0000 006D 0002 0000 0156 00AB 0015 0040"
+    off_code = "0000 006D 0002 0000 0156 00AB 0015 0015"
+    heat_code = "0000 006D 0002 0000 0156 00AB 0015 0030"
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={"name": "Test", CONF_DEVICE_TYPE: DEVICE_TYPE_FAN},
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={CONF_BLASTER_ACTION: [{"service": "remote.send_command"}]},
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"add_more": False, "import_codes": True}
+    )
+    assert result["step_id"] == "import_codes"
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"json": "[]"}
+    )
+    assert result["errors"] == {"base": "invalid_import"}
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={
+            "json": (
+                '{"commands": {"power_on": "%s", "power_off": "%s", "bad": "x"}}'
+                % (on_code, off_code)
+            )
+        },
+    )
+    assert result["step_id"] == "actions"
+
+    # Known codes are not added again, and taken names keep their code
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"add_more": False, "import_codes": True}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={
+            "json": '{"power_on": "%s", "toggle": "%s", "heat": "%s"}'
+            % (off_code, on_code, heat_code)
+        },
+    )
+    assert result["step_id"] == "actions"
+    assert result["description_placeholders"]["actions"] == (
+        "- Power On (a different imported code was not added; "
+        "also imported as Toggle)\n- Power Off\n- Heat"
+    )
+
+    with patch("custom_components.dyson_ir.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input={"add_more": False}
+        )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["data"][CONF_ACTIONS] == [
+        {"name": "Power On", CONF_ACTION_CODE_REF: code_ref(on_code)},
+        {"name": "Power Off", CONF_ACTION_CODE_REF: code_ref(off_code)},
+        {"name": "Heat", CONF_ACTION_CODE_REF: code_ref(heat_code)},
+    ]
+
+
+async def test_reconfigure_updates_entry(hass: HomeAssistant):
+    """Test that reconfiguring edits the entry's blaster and actions in place."""
+    library = async_get_hub(hass).library
+    await library.async_load()
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_DEVICE_TYPE: DEVICE_TYPE_FAN,
+            CONF_BLASTER_ACTION: [{"service": "remote.send_command"}],
+            CONF_ACTIONS: library.async_store_actions(
+                [{"name": "Power On", "ir_code": "code_on"}]
+            ),
+        },
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={
+            # config_entries.SOURCE_RECONFIGURE, from Home Assistant 2024.4
+            "source": "reconfigure",
+            "entry_id": entry.entry_id,
+        },
+    )
+    assert result["step_id"] == "blaster"
+    blaster = [{"service": "remote.send_command", "data": {"command": "IR_CODE"}}]
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={CONF_BLASTER_ACTION: blaster}
+    )
+    assert result["step_id"] == "actions"
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"add_more": False, "remove_action": "Power On"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"add_more": True}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"name": "Power Off", "ir_code": "code_off"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={"add_more": False}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert result["reason"] == "reconfigure_successful"
+    assert entry.data[CONF_BLASTER_ACTION] == blaster
+    assert entry.data[CONF_ACTIONS] == [
+        {"name": "Power Off", CONF_ACTION_CODE_REF: code_ref("code_off")}
+    ]
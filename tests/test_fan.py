@@ -0,0 +1,136 @@
+"""Test dyson_ir fan platform."""
+import asyncio
+from unittest.mock import patch
+
+from homeassistant.components.fan import (
+    ATTR_OSCILLATING,
+    ATTR_PERCENTAGE,
+    ATTR_PRESET_MODE,
+)
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.button import DysonIRButton
+from custom_components.dyson_ir.const import CONF_ACTIONS, CONF_BLASTER_ACTION, DOMAIN
+from custom_components.dyson_ir.hub import async_get_hub
+
+from .fake_remote import FakeRemote, blaster_action
+
+ACTIONS = {
+    "Power On": "code_on",
+    "Power Off": "code_off",
+    "Speed Up": "code_up",
+    "Speed Down": "code_down",
+    "Speed 7": "code_speed_7",
+    "Oscillate Toggle": "code_oscillate",
+    "Heat On": "code_heat_on",
+    "Heat Off": "code_heat_off",
+}
+
+
+async def _setup_fan(hass: HomeAssistant, coalesce_window: int = 0) -> MockConfigEntry:
+    """Add and set up a fan entry."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            "device_type": "fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [
+                {"name": name, "ir_code": code} for name, code in ACTIONS.items()
+            ],
+        },
+        options={"min_frame_gap": 0, "coalesce_window": coalesce_window},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def _call(hass: HomeAssistant, service: str, **data) -> None:
+    """Call a fan service on the test fan."""
+    await hass.services.async_call(
+        "fan", service, {"entity_id": "fan.test_fan", **data}, blocking=True
+    )
+
+
+async def test_fan_plans_speed_changes(hass: HomeAssistant):
+    """Test that speed changes send the shortest sequence of actions."""
+    remote = FakeRemote().register(hass)
+    entry = await _setup_fan(hass)
+
+    await _call(hass, "turn_on", **{ATTR_PERCENTAGE: 70})
+    assert [call["command"] for call in remote.calls] == [["code_on", "code_speed_7"]]
+    state = hass.states.get("fan.test_fan")
+    assert state.state == "on"
+    assert state.attributes[ATTR_PERCENTAGE] == 70
+
+    remote.calls.clear()
+    await _call(hass, "set_percentage", **{ATTR_PERCENTAGE: 90})
+    assert [call["command"] for call in remote.calls] == [["code_up", "code_up"]]
+    assert async_get_hub(hass).device_states[entry.entry_id]["speed"] == 9
+
+    remote.calls.clear()
+    await _call(hass, "set_percentage", **{ATTR_PERCENTAGE: 90})
+    assert remote.calls == []
+
+
+async def test_fan_oscillation_heat_and_off(hass: HomeAssistant):
+    """Test oscillation, heat mode and turning off."""
+    remote = FakeRemote().register(hass)
+    await _setup_fan(hass)
+
+    await _call(hass, "oscillate", **{ATTR_OSCILLATING: True})
+    await _call(hass, "set_preset_mode", **{ATTR_PRESET_MODE: "heat"})
+    await _call(hass, "turn_off")
+    assert [call["command"] for call in remote.calls] == [
+        ["code_on", "code_oscillate"],
+        ["code_heat_on"],
+        ["code_off"],
+    ]
+
+    state = hass.states.get("fan.test_fan")
+    assert state.state == "off"
+    assert state.attributes[ATTR_OSCILLATING] is True
+    assert state.attributes[ATTR_PRESET_MODE] == "heat"
+
+
+async def test_fan_coalesces_bursts(hass: HomeAssistant):
+    """Test that targets set within the window are sent as one net change."""
+    remote = FakeRemote().register(hass)
+    entry = await _setup_fan(hass, coalesce_window=50)
+
+    # Superseded targets cancel out and nothing is sent
+    await asyncio.gather(_call(hass, "turn_on"), _call(hass, "turn_off"))
+    assert remote.calls == []
+
+    # Only the final speed of a slider drag is reached
+    await asyncio.gather(
+        *(
+            _call(hass, "set_percentage", **{ATTR_PERCENTAGE: percentage})
+            for percentage in (30, 40, 50, 70)
+        )
+    )
+    assert [call["command"] for call in remote.calls] == [["code_on", "code_speed_7"]]
+    assert async_get_hub(hass).device_states[entry.entry_id]["speed"] == 7
+
+
+async def test_only_entities_of_changed_keys_write_state(hass: HomeAssistant):
+    """Test that state changes only reach the entities showing those keys."""
+    entry = await _setup_fan(hass)
+    coordinator = async_get_hub(hass).coordinators[entry.entry_id]
+    fan = hass.states.get("fan.test_fan")
+
+    # An unchanged value notifies nobody
+    coordinator.set_device_state({"oscillating": False})
+    await hass.async_block_till_done()
+    assert hass.states.get("fan.test_fan").last_updated == fan.last_updated
+
+    with patch.object(DysonIRButton, "async_write_ha_state") as button_write:
+        coordinator.set_device_state({"oscillating": True})
+        await hass.async_block_till_done()
+    assert hass.states.get("fan.test_fan").attributes[ATTR_OSCILLATING] is True
+    button_write.assert_not_called()
@@ -0,0 +1,221 @@
+"""Test dyson_ir delivery feedback."""
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.const import (
+    CONF_ACTIONS,
+    CONF_BLASTER_ACTION,
+    CONF_SUPPRESS_TTL,
+    DOMAIN,
+)
+from custom_components.dyson_ir.feedback import (
+    DECAY_AFTER,
+    MAX_ATTEMPTS,
+    DeliveryStats,
+)
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.library import code_ref
+
+from .fake_remote import FakeRemote, blaster_action
+
+FEEDBACK_ENTITY = "binary_sensor.fan_power"
+
+
+def test_delivery_stats_learn_repeats():
+    """Test that repeats grow on retries and decay while delivery is reliable."""
+    stats = DeliveryStats()
+    assert stats.repeats == 1
+
+    stats.record(2, 0.4)
+    assert stats.repeats == 2
+    assert stats.timeout == 0.8
+
+    for _ in range(DECAY_AFTER):
+        stats.record(1, 0.4)
+    assert stats.repeats == 1
+
+    stats.record(3, None)
+    assert stats.repeats == 2
+    assert (stats.sent, stats.confirmed, stats.retried, stats.missed) == (7, 6, 2, 1)
+
+
+async def test_power_button_is_confirmed_and_retried(hass: HomeAssistant):
+    """Test that an unconfirmed power command is resent and learned from."""
+    hass.states.async_set(FEEDBACK_ENTITY, "off")
+    calls = []
+
+    async def handle(call: ServiceCall) -> None:
+        # The first frame is lost, the second one turns the fan on
+        calls.append(call.data["command"])
+        if len(calls) == 2:
+            hass.states.async_set(FEEDBACK_ENTITY, "on")
+
+    hass.services.async_register("remote", "send_command", handle)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+        options={"min_frame_gap": 0, "feedback_entity": FEEDBACK_ENTITY},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    with patch("custom_components.dyson_ir.feedback.DEFAULT_CONFIRM_TIMEOUT", 0.05):
+        await hass.services.async_call(
+            "button",
+            "press",
+            {"entity_id": "button.test_fan_power_on"},
+            blocking=True,
+        )
+
+    assert calls == [["code_on"], ["code_on"]]
+    hub = async_get_hub(hass)
+    assert hub.device_states[entry.entry_id]["power"] is True
+    stats = hub.delivery.get(
+        hub.coordinators[entry.entry_id].blaster_key, code_ref("code_on")
+    )
+    assert stats.retried == 1
+    assert stats.repeats == 2
+
+    # Feedback from the physical remote is taken as the device state
+    hass.states.async_set(FEEDBACK_ENTITY, "off")
+    await hass.async_block_till_done()
+    assert hub.device_states[entry.entry_id]["power"] is False
+
+
+async def test_unconfirmed_power_command_is_not_assumed(hass: HomeAssistant):
+    """Test that a power command the feedback never confirmed can be retried."""
+    hass.states.async_set(FEEDBACK_ENTITY, "off")
+    remote = FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+        options={
+            "min_frame_gap": 0,
+            "feedback_entity": FEEDBACK_ENTITY,
+            CONF_SUPPRESS_TTL: 60,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    async def press() -> None:
+        await hass.services.async_call(
+            "button",
+            "press",
+            {"entity_id": "button.test_fan_power_on"},
+            blocking=True,
+        )
+
+    with patch("custom_components.dyson_ir.feedback.DEFAULT_CONFIRM_TIMEOUT", 0.01):
+        await press()
+        assert len(remote.calls) == MAX_ATTEMPTS
+        assert async_get_hub(hass).device_states[entry.entry_id]["power"] is False
+        # The fan is still off, so pressing again is not suppressed
+        await press()
+    assert len(remote.calls) == 2 * MAX_ATTEMPTS
+
+
+async def test_send_many_confirms_power_commands(hass: HomeAssistant):
+    """Test that a power action sent by the service is confirmed like a press."""
+    hass.states.async_set(FEEDBACK_ENTITY, "on")
+    calls = []
+
+    async def handle(call: ServiceCall) -> None:
+        # The first frame is lost, the second one turns the fan off
+        calls.append(call.data["command"])
+        if len(calls) == 2:
+            hass.states.async_set(FEEDBACK_ENTITY, "off")
+
+    hass.services.async_register("remote", "send_command", handle)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power Off", "ir_code": "code_off"}],
+        },
+        options={"min_frame_gap": 0, "feedback_entity": FEEDBACK_ENTITY},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    with patch("custom_components.dyson_ir.feedback.DEFAULT_CONFIRM_TIMEOUT", 0.05):
+        response = await hass.services.async_call(
+            DOMAIN,
+            "send_many",
+            {"entry_id": entry.entry_id, "action": "Power Off"},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert calls == [["code_off"], ["code_off"]]
+    assert response["results"][0]["blaster_calls"] == 2
+    assert async_get_hub(hass).device_states[entry.entry_id]["power"] is False
+
+
+async def test_fan_power_is_confirmed_before_other_changes(hass: HomeAssistant):
+    """Test that the fan only sends the rest of a change once power is confirmed."""
+    hass.states.async_set(FEEDBACK_ENTITY, "off")
+    calls = []
+
+    async def handle(call: ServiceCall) -> None:
+        calls.append(call.data["command"])
+        if call.data["command"] == ["code_on"]:
+            hass.states.async_set(FEEDBACK_ENTITY, "on")
+
+    hass.services.async_register("remote", "send_command", handle)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            "device_type": "fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [
+                {"name": "Power On", "ir_code": "code_on"},
+                {"name": "Power Off", "ir_code": "code_off"},
+                {"name": "Oscillate On", "ir_code": "code_oscillate_on"},
+            ],
+        },
+        options={
+            "min_frame_gap": 0,
+            "coalesce_window": 0,
+            "feedback_entity": FEEDBACK_ENTITY,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    with patch("custom_components.dyson_ir.feedback.DEFAULT_CONFIRM_TIMEOUT", 0.05):
+        await hass.services.async_call(
+            "fan",
+            "oscillate",
+            {"entity_id": "fan.test_fan", "oscillating": True},
+            blocking=True,
+        )
+
+    assert calls == [["code_on"], ["code_oscillate_on"]]
+    state = async_get_hub(hass).device_states[entry.entry_id]
+    assert state["power"] is True
+    assert state["oscillating"] is True
@@ -0,0 +1,97 @@
+"""Test dyson_ir code set import."""
+import json
+from array import array
+
+import pytest
+
+from custom_components.dyson_ir.codec import FORMAT_BROADLINK, IRSignal, encode
+from custom_components.dyson_ir.importer import (
+    InvalidCodeSet,
+    load_code_set,
+    parse_code_set,
+)
+
+
+def _code(bit: int) -> str:
+    """Return a distinct valid Broadlink code."""
+    timings = [9000, 4500] + [560, 560 + 1130 * bit] * 8 + [560, 40000]
+    return encode(IRSignal(array("I", timings)), FORMAT_BROADLINK)
+
+
+def test_smartir_device_file():
+    """Test that nested SmartIR commands become named actions."""
+    result = parse_code_set(
+        json.dumps(
+            {
+                "manufacturer": "Dyson",
+                "commandsEncoding": "Base64",
+                "commands": {
+                    "off": _code(0),
+                    "cool": {"low": {"16": _code(1)}, "high": {"16": _code(1)}},
+                    "fan_only": {"auto": "not a code"},
+                },
+            }
+        )
+    )
+    assert result.actions == {"Off": _code(0), "Cool Low 16": _code(1)}
+    assert result.aliases == {"Cool Low 16": ["Cool High 16"]}
+    assert result.invalid == ["Fan Only Auto"]
+
+
+def test_broadlink_storage_dump():
+    """Test that learned codes, including toggles, are read from a dump."""
+    result = parse_code_set(
+        json.dumps(
+            {
+                "version": 1,
+                "key": "broadlink_remote_34ea34000000_codes",
+                "data": {
+                    "fan": {
+                        "power_on": _code(0),
+                        "light": [_code(1), _code(2)],
+                        "raw": [9000, 4500, 560, 40000],
+                    }
+                },
+            }
+        )
+    )
+    assert result.actions == {
+        "Power On": _code(0),
+        "Light 1": _code(1),
+        "Light 2": _code(2),
+        "Raw": "9000,4500,560,40000",
+    }
+
+
+def test_duplicates_and_devices():
+    """Test that several devices are prefixed and repeated names are reported."""
+    text = '{"tv": {"power": "%s"}, "fan": {"power": "%s"}}' % (_code(0), _code(1))
+    result = parse_code_set(text)
+    assert list(result.actions) == ["Tv Power", "Fan Power"]
+
+    text = '{"power": "%s", "Power": "%s"}' % (_code(0), _code(0))
+    result = parse_code_set(text)
+    assert result.actions == {"Power": _code(0)}
+    assert result.duplicates == 1
+
+    text = '{"power": "%s", "Power": "%s"}' % (_code(0), _code(1))
+    result = parse_code_set(text)
+    assert result.actions == {"Power": _code(0)}
+    assert result.duplicates == 0
+    assert result.conflicts == ["Power"]
+
+
+def test_invalid_code_sets(tmp_path):
+    """Test that unreadable code sets are rejected."""
+    with pytest.raises(InvalidCodeSet):
+        parse_code_set("{not json")
+    with pytest.raises(InvalidCodeSet):
+        parse_code_set("[1, 2, 3]")
+    with pytest.raises(InvalidCodeSet):
+        load_code_set()
+    with pytest.raises(OSError):
+        load_code_set(str(tmp_path / "missing.json"))
+
+    path = tmp_path / "codes.json"
+    path.write_text(json.dumps({"power": _code(0)}))
+    assert load_code_set(str(path)).actions == {"Power": _code(0)}
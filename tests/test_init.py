@@ -1,10 +1,205 @@
 """Test component setup."""
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
 from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.dyson_ir.const import DOMAIN
+from custom_components.dyson_ir.const import (
+    CONF_ACTION_CODE_REF,
+    CONF_ACTIONS,
+    CONF_BLASTER_ACTION,
+    DOMAIN,
+)
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.library import code_ref
+from custom_components.dyson_ir.state import STORAGE_KEY
 
 
 async def test_async_setup(hass):
     """Test the component gets setup."""
     setup = await async_setup_component(hass, DOMAIN, {})
     assert setup is True
+
+
+async def test_setup_entry_is_push_only(hass):
+    """Test that entries share the hub and do not schedule polling."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: [
+                {
+                    "service": "remote.send_command",
+                    "data": {"device_id": "blaster_device", "command": "IR_CODE"},
+                }
+            ],
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+    )
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[entry.entry_id]
+    assert coordinator.update_interval is None
+    assert coordinator.data is hub.device_states[entry.entry_id]
+    assert set(hub.setup_timings[entry.entry_id]) == {
+        "storage_ms",
+        "coordinator_ms",
+        "platforms_ms",
+        "total_ms",
+    }
+
+    coordinator.set_device_state({"power": True})
+    assert hub.device_states[entry.entry_id]["power"] is True
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert entry.entry_id not in hub.coordinators
+    assert entry.entry_id not in hub.setup_timings
+
+
+async def test_migrate_v2_moves_codes_to_library(hass, hass_storage):
+    """Test that version 2 entries are migrated to code references."""
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            title=f"Fan {index}",
+            data={
+                "name": f"Fan {index}",
+                CONF_BLASTER_ACTION: [{"service": "remote.send_command"}],
+                CONF_ACTIONS: [{"name": "Power On", "ir_code": "shared_code"}],
+            },
+        )
+        for index in range(2)
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    ref = code_ref("shared_code")
+    for entry in entries:
+        assert entry.version == 3
+        assert entry.data[CONF_ACTIONS] == [
+            {"name": "Power On", CONF_ACTION_CODE_REF: ref}
+        ]
+
+    hub = async_get_hub(hass)
+    codes = [
+        hub.coordinators[entry.entry_id].action_codes["Power On"] for entry in entries
+    ]
+    assert codes == ["shared_code", "shared_code"]
+    assert codes[0] is codes[1]
+    # The codes were written before the entries referring to them
+    assert list(hass_storage[f"{DOMAIN}.codes"]["data"]["codes"]) == [ref]
+
+
+async def test_device_state_is_persisted(hass, hass_storage):
+    """Test that estimated state is restored at setup and saved after changes."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: [{"service": "remote.send_command"}],
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+    )
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": STORAGE_KEY,
+        "data": {"states": {entry.entry_id: {"power": True, "speed": 4}}},
+    }
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    hub = async_get_hub(hass)
+    assert hub.device_states[entry.entry_id] == {
+        "power": True,
+        "speed": 4,
+        "oscillating": False,
+        "heat": False,
+    }
+
+    coordinator = hub.coordinators[entry.entry_id]
+    coordinator.set_device_state({"speed": 6})
+    coordinator.set_device_state({"power": False})
+    # Each save moves the delayed write back, so flush it the way Home
+    # Assistant does on shutdown
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+    saved = hass_storage[STORAGE_KEY]["data"]["states"][entry.entry_id]
+    assert saved["power"] is False
+    assert saved["speed"] == 6
+
+    # Unloading keeps the state for the next setup, removing drops it
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert hub.device_states[entry.entry_id]["speed"] == 6
+    await hass.config_entries.async_remove(entry.entry_id)
+    assert entry.entry_id not in hub.device_states
+
+
+async def test_reconfigure_in_place(hass):
+    """Test that changed actions and options are applied without a reload."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: [{"service": "remote.send_command"}],
+            CONF_ACTIONS: [
+                {"name": "Power On", "ir_code": "code_on"},
+                {"name": "Speed Up", "ir_code": "code_up"},
+            ],
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[entry.entry_id]
+    power_on = hass.states.get("button.test_fan_power_on")
+    assert hass.states.get("fan.test_fan") is not None
+
+    hass.config_entries.async_update_entry(
+        entry,
+        data={
+            **entry.data,
+            CONF_ACTIONS: [
+                {"name": "Power On", "ir_code": "code_on"},
+                {"name": "Speed Down", "ir_code": "code_down"},
+            ],
+        },
+        options={"min_frame_gap": 50},
+    )
+    await hass.async_block_till_done()
+
+    # Same coordinator, and untouched buttons are not rewritten
+    assert hub.coordinators[entry.entry_id] is coordinator
+    assert coordinator.min_gap == 0.05
+    state = hass.states.get("button.test_fan_power_on")
+    assert state.last_updated == power_on.last_updated
+    assert hass.states.get("button.test_fan_speed_up") is None
+    assert hass.states.get("button.test_fan_speed_down") is not None
+    assert coordinator.action_codes == {
+        "Power On": "code_on",
+        "Speed Down": "code_down",
+    }
+
+    # Without power actions there is nothing for the fan to control
+    hass.config_entries.async_update_entry(
+        entry,
+        data={**entry.data, CONF_ACTIONS: [{"name": "Speed Down", "ir_code": "x"}]},
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("fan.test_fan") is None
+    assert hass.states.get("button.test_fan_power_on") is None
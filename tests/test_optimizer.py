@@ -0,0 +1,121 @@
+"""Test dyson_ir IR code optimizer."""
+import random
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.codec import decode, encode
+from custom_components.dyson_ir.const import CONF_ACTIONS, CONF_BLASTER_ACTION, DOMAIN
+from custom_components.dyson_ir.optimizer import LEAD_OUT, optimize
+
+from .fake_remote import FakeRemote, blaster_action
+
+
+def learned_nec(command: int, frames: int = 3, seed: int = 0) -> str:
+    """Return an NEC code as learned: noisy, repeated and with a long tail."""
+    rng = random.Random(seed)
+    frame = [9000, 4500]
+    for bit in range(32):
+        frame += [560, 1690 if (command >> bit) & 1 else 560]
+    frame.append(560)
+    timings = []
+    for _ in range(frames):
+        timings += [*frame, 40000]
+    timings += [9000, 2250, 560, 100000]
+    return ",".join(
+        str(round(value * (1 + rng.uniform(-0.1, 0.1))) * (-1 if index % 2 else 1))
+        for index, value in enumerate(timings)
+    )
+
+
+def learned_sony(command: int) -> str:
+    """Return a 12-bit Sony code as learned: three frames 45 ms apart."""
+    frame = [2400, 600]
+    for bit in range(12):
+        frame += [1200 if (command >> bit) & 1 else 600, 600]
+    timings = []
+    for _ in range(3):
+        timings += [*frame[:-1], 45000 - sum(frame[:-1])]
+    timings[-1] = 100000
+    return ",".join(
+        str(value * (-1 if index % 2 else 1)) for index, value in enumerate(timings)
+    )
+
+
+def test_optimize_keeps_repeats_by_default():
+    """Test that frames a protocol needs repeated are only cut on request."""
+    result = optimize(learned_sony(0xA90))
+    assert result.frames == 3
+    assert result.frames_dropped == 0
+    timings = list(decode(result.code).timings)
+    assert len(timings) == 3 * 26
+    assert timings[:2] == [2400, 600]
+    assert result.saved == 100000 - LEAD_OUT
+
+    result = optimize(learned_nec(0x40BF00FF))
+    assert result.frames_dropped == 0
+    assert 0 < result.saved < 100000
+
+
+def test_optimize_drops_repeats_and_tail():
+    """Test that one clean frame is kept, in the format the code came in."""
+    result = optimize(learned_nec(0x40BF00FF), drop_repeats=True)
+    assert result.frames == 4
+    assert result.frames_dropped == 3
+    timings = list(decode(result.code).timings)
+    assert timings[:4] == [9000, 4500, 560, 1690]
+    assert set(timings[2:-1]) == {560, 1690}
+    assert timings[-1] == LEAD_OUT
+    assert result.saved == result.original_airtime - sum(timings)
+    assert result.saved > 300_000
+
+    # Broadlink codes stay Broadlink, and optimizing twice changes nothing
+    broadlink = encode(decode(learned_nec(0x40BF00FF)), "broadlink")
+    result = optimize(broadlink, drop_repeats=True)
+    assert result.code.startswith("b64:")
+    assert optimize(result.code, drop_repeats=True).saved == 0
+
+
+async def test_optimize_codes_service(hass: HomeAssistant):
+    """Test that the service reports the savings and stores the shorter codes."""
+    remote = FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [
+                {"name": "Power On", "ir_code": learned_nec(0x40BF00FF)},
+                {"name": "Learned", "ir_code": "power_on"},
+            ],
+        },
+        options={"min_frame_gap": 0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    async def optimize_codes(**data):
+        return await hass.services.async_call(
+            DOMAIN, "optimize_codes", data, blocking=True, return_response=True
+        )
+
+    response = await optimize_codes(dry_run=True, drop_repeats=True)
+    report = response["entries"][entry.entry_id]
+    assert list(report["codes"]) == ["Power On"]
+    assert report["saved_ms"] > 300
+    assert "ir_code" in entry.data[CONF_ACTIONS][0]
+
+    await optimize_codes(entry_id=entry.entry_id, drop_repeats=True)
+    await hass.async_block_till_done()
+    assert "ir_code" not in entry.data[CONF_ACTIONS][0]
+    response = await optimize_codes(drop_repeats=True)
+    assert response["entries"][entry.entry_id]["saved_ms"] == 0
+
+    await hass.services.async_call(
+        "button", "press", {"entity_id": "button.test_fan_power_on"}, blocking=True
+    )
+    code = remote.calls[0]["command"][0]
+    assert sum(decode(code).timings) < 100_000
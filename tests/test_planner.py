@@ -0,0 +1,89 @@
+"""Test the dyson_ir fan command planner."""
+import pytest
+
+from custom_components.dyson_ir.planner import (
+    FanPlanner,
+    FanState,
+    UnreachableState,
+    parse_action,
+)
+
+STEPPING = [
+    "Power On",
+    "Power Off",
+    "Speed Up",
+    "Speed Down",
+    "Oscillate Toggle",
+    "Heat On",
+    "Heat Off",
+]
+
+
+def test_parse_action():
+    """Test that action names are read as commands."""
+    assert parse_action("Power On") == ("power", "on")
+    assert parse_action("power_toggle") == ("power", "toggle")
+    assert parse_action("Power") == ("power", "toggle")
+    assert parse_action("Speed 7") == ("speed", "7")
+    assert parse_action("Fan Speed Up") == ("speed", "up")
+    assert parse_action("Oscillation") == ("oscillate", "toggle")
+    assert parse_action("Heating Off") == ("heat", "off")
+    assert parse_action("Speed") is None
+    assert parse_action("Speed 0") is None
+    assert parse_action("Night Mode") is None
+
+
+def test_plan_steps_from_a_known_speed():
+    """Test that speed is reached by stepping from the current speed."""
+    planner = FanPlanner(STEPPING)
+    plan = planner.plan(FanState(power=True, speed=3), {"speed": 6})
+    assert plan.actions == ("Speed Up",) * 3
+    assert plan.state == FanState(power=True, speed=6)
+
+
+def test_plan_prefers_direct_speed_codes():
+    """Test that a direct speed code beats stepping."""
+    planner = FanPlanner([*STEPPING, "Speed 7"])
+    plan = planner.plan(FanState(power=True, speed=1), {"speed": 10})
+    assert plan.actions == ("Speed 7", "Speed Up", "Speed Up", "Speed Up")
+
+    plan = planner.plan(FanState(), {"power": True, "speed": 7})
+    assert plan.actions == ("Power On", "Speed 7")
+
+
+def test_plan_finds_unknown_speed_at_the_end_stop():
+    """Test that an unknown speed is homed before stepping."""
+    planner = FanPlanner(STEPPING, speed_count=4)
+    plan = planner.plan(FanState(power=True), {"speed": 2})
+    assert plan.actions == ("Speed Down",) * 3 + ("Speed Up",)
+
+
+def test_plan_weights_by_airtime():
+    """Test that cheaper frames are preferred over fewer frames."""
+    costs = {"Speed Up": 10.0, "Speed 5": 100.0}
+    planner = FanPlanner(["Power On", "Speed Up", "Speed 5"], costs.get)
+    plan = planner.plan(FanState(power=True, speed=3), {"speed": 5})
+    assert plan.actions == ("Speed Up", "Speed Up")
+    assert plan.cost == 20.0
+
+
+def test_plan_turns_on_before_other_changes():
+    """Test that settings need the fan on and turning off ignores them."""
+    planner = FanPlanner(STEPPING)
+    plan = planner.plan(FanState(speed=4), {"oscillating": True, "heat": True})
+    assert plan.actions == ("Power On", "Oscillate Toggle", "Heat On")
+    assert plan.state == FanState(True, 4, True, True)
+
+    plan = planner.plan(plan.state, {"power": False, "speed": 1})
+    assert plan.actions == ("Power Off",)
+    assert planner.plan(plan.state, {"power": False}).actions == ()
+
+
+def test_plan_unreachable():
+    """Test that targets the actions cannot reach are rejected."""
+    planner = FanPlanner(["Power On", "Power Off"])
+    assert not planner.supports_speed
+    with pytest.raises(UnreachableState):
+        planner.plan(FanState(), {"power": True, "oscillating": True})
+    with pytest.raises(UnreachableState):
+        planner.plan(FanState(), {"speed": 11})
@@ -0,0 +1,80 @@
+"""Test dyson_ir state sync from IR receivers."""
+import random
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.const import CONF_ACTIONS, CONF_BLASTER_ACTION, DOMAIN
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.matcher import CodeMatcher
+
+from .fake_remote import FakeRemote, blaster_action
+
+RECEIVER_EVENT = "esphome.ir_received"
+
+
+def nec(command: int, jitter: float = 0.0, seed: int = 0) -> list[int]:
+    """Return signed NEC timings with a repeat frame, as a receiver reports them."""
+    rng = random.Random(seed)
+    timings = [9000, 4500]
+    for bit in range(32):
+        timings += [560, 1690 if (command >> bit) & 1 else 560]
+    timings += [560, 40000, 9000, 2250, 560]
+    return [
+        round(value * (1 + rng.uniform(-jitter, jitter))) * (-1 if index % 2 else 1)
+        for index, value in enumerate(timings)
+    ]
+
+
+def _code(command: int, **kwargs) -> str:
+    """Return NEC timings as a raw code."""
+    return ",".join(str(value) for value in nec(command, **kwargs))
+
+
+def test_matcher_tolerates_jitter():
+    """Test that jittered receptions match their code and nothing else."""
+    matcher: CodeMatcher[str] = CodeMatcher()
+    commands = {"Power On": 0x40BF00FF, "Power Off": 0x41BE00FF, "Heat On": 0x42BD}
+    for name, command in commands.items():
+        assert matcher.add(_code(command), name)
+    assert not matcher.add("not a code", "Learned")
+
+    for seed, (name, command) in enumerate(commands.items()):
+        assert matcher.match(_code(command, jitter=0.15, seed=seed)) == [name]
+    assert matcher.match(_code(0x43BC00FF, jitter=0.1)) == []
+    assert matcher.match("garbage") == []
+
+
+async def test_received_codes_update_state(hass: HomeAssistant):
+    """Test that codes from the physical remote update the device state."""
+    FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [
+                {"name": "Power On", "ir_code": _code(0x40BF00FF)},
+                {"name": "Power Off", "ir_code": _code(0x41BE00FF)},
+            ],
+        },
+        options={"min_frame_gap": 0, "receiver_event": RECEIVER_EVENT},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    state = async_get_hub(hass).device_states[entry.entry_id]
+
+    hass.bus.async_fire(RECEIVER_EVENT, {"code": nec(0x40BF00FF, jitter=0.1)})
+    await hass.async_block_till_done()
+    assert state["power"] is True
+
+    # The blaster's own frame, heard right after sending it, is not a press
+    await hass.services.async_call(
+        "button", "press", {"entity_id": "button.test_fan_power_off"}, blocking=True
+    )
+    hass.bus.async_fire(RECEIVER_EVENT, {"code": _code(0x41BE00FF, jitter=0.1)})
+    await hass.async_block_till_done()
+    assert state["power"] is True
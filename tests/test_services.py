@@ -0,0 +1,374 @@
+"""Test dyson_ir services."""
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.dyson_ir.const import (
+    CONF_ACTIONS,
+    CONF_BLASTER_ACTION,
+    DOMAIN,
+)
+from custom_components.dyson_ir.coordinator import DysonIRCoordinator
+from custom_components.dyson_ir.diagnostics import async_get_config_entry_diagnostics
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.jobs import MAX_ATTEMPTS, STORAGE_KEY
+from custom_components.dyson_ir.services import (
+    SEND_SEQUENCE_SCHEMA,
+    _expand_sequence,
+)
+
+from .fake_remote import FakeRemote, blaster_action
+
+
+def _coordinator(hass: HomeAssistant) -> DysonIRCoordinator:
+    """Return a coordinator for a fan with a remote.send_command blaster."""
+    config_entry = MagicMock()
+    config_entry.entry_id = "test_entry_id"
+    config_entry.title = "Test Device"
+    config_entry.options = {"min_frame_gap": 0}
+    config_entry.data = {
+        "name": "Test Device",
+        CONF_BLASTER_ACTION: [
+            {
+                "service": "remote.send_command",
+                "data": {"device_id": "blaster_device_id", "command": "IR_CODE"},
+            }
+        ],
+        CONF_ACTIONS: [
+            {"name": "Power On", "ir_code": "code_on"},
+            {"name": "Heat On", "ir_code": "code_heat"},
+            {"name": "Speed Up", "ir_code": "code_up"},
+        ],
+    }
+    coordinator = DysonIRCoordinator(hass, config_entry)
+    async_get_hub(hass).async_add_coordinator(coordinator)
+    return coordinator
+
+
+async def test_send_sequence_batches_codes(hass: HomeAssistant):
+    """Test that consecutive codes go out in one blaster call per batch."""
+    coordinator = _coordinator(hass)
+    data = SEND_SEQUENCE_SCHEMA(
+        {
+            "entry_id": "test_entry_id",
+            "sequence": [
+                "Power On",
+                {"action": "Heat On"},
+                {"delay": 0},
+                {"action": "Speed Up", "repeat": 2},
+                "raw_code",
+            ],
+        }
+    )
+    steps = _expand_sequence(coordinator, data["sequence"])
+    assert steps == ["code_on", "code_heat", 0.0, "code_up", "code_up", "raw_code"]
+
+    remote = FakeRemote().register(hass)
+    calls = await coordinator.async_send_sequence(steps, "Test Device")
+
+    assert calls == 2
+    assert remote.calls == [
+        {"device_id": "blaster_device_id", "command": ["code_on", "code_heat"]},
+        {
+            "device_id": "blaster_device_id",
+            "command": ["code_up", "code_up", "raw_code"],
+        },
+    ]
+
+
+async def test_send_many_fans_out_across_blasters(hass: HomeAssistant):
+    """Test that blasters send in parallel and each blaster sends in order."""
+    remote = FakeRemote(latency=0.05).register(hass)
+    entries = []
+    for index, blaster in enumerate(("blaster_a", "blaster_a", "blaster_b")):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=3,
+            title=f"Fan {index}",
+            data={
+                "name": f"Fan {index}",
+                CONF_BLASTER_ACTION: blaster_action(blaster),
+                CONF_ACTIONS: [{"name": "Power Off", "ir_code": f"code_off_{index}"}],
+            },
+            options={"min_frame_gap": 0},
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "send_many",
+        {
+            "entry_id": [entry.entry_id for entry in entries],
+            "action": "Power Off",
+            "commands": [{"entry_id": "missing", "code": "raw_code"}],
+        },
+        blocking=True,
+        return_response=True,
+    )
+
+    results = response["results"]
+    assert [result["success"] for result in results] == [True, True, True, False]
+    assert results[0]["blaster"] == [["device_id", "blaster_a"]]
+    assert "missing" in results[3]["error"]
+
+    # Both blasters start at once, the shared one sends its fans in order
+    commands = [(call["device_id"], call["command"]) for call in remote.calls]
+    assert {device for device, _ in commands[:2]} == {"blaster_a", "blaster_b"}
+    assert [command for device, command in commands if device == "blaster_a"] == [
+        ["code_off_0"],
+        ["code_off_1"],
+    ]
+
+
+async def test_targetless_blaster_is_reported_by_service(hass: HomeAssistant):
+    """Test that blasters without a target are keyed by (kind, id) pairs."""
+    FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: [
+                {"service": "remote.send_command", "data": {"command": "IR_CODE"}}
+            ],
+            CONF_ACTIONS: [{"name": "Power Off", "ir_code": "code_off"}],
+        },
+        options={"min_frame_gap": 0, "trace": True},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "send_many",
+        {"entry_id": entry.entry_id, "action": "Power Off"},
+        blocking=True,
+        return_response=True,
+    )
+    target = [["service", "remote.send_command"]]
+    assert response["results"][0]["blaster"] == target
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["blaster"]["target"] == target
+    assert diagnostics["blasters"][0]["target"] == target
+    assert diagnostics["last_blaster"] == target
+    assert diagnostics["traces"][0]["blaster"] == target
+
+
+async def test_schedule_replace_and_cancel(hass: HomeAssistant, hass_storage):
+    """Test that scheduled jobs are saved, replaced, cancelled and run when due."""
+    remote = FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [
+                {"name": "Heat Off", "ir_code": "code_heat_off"},
+                {"name": "Power Off", "ir_code": "code_off"},
+            ],
+        },
+        options={"min_frame_gap": 0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    async def schedule(**data):
+        return await hass.services.async_call(
+            DOMAIN,
+            "schedule",
+            {"entry_id": entry.entry_id, **data},
+            blocking=True,
+            return_response=True,
+        )
+
+    await schedule(action="Heat Off", delay={"minutes": 30}, job_id="heat")
+    # Scheduling the same job again moves it rather than adding another
+    await schedule(action="Heat Off", delay={"minutes": 10}, job_id="heat")
+    response = await schedule(action="Power Off", delay={"minutes": 20})
+    jobs = async_get_hub(hass).jobs
+    assert len(jobs.jobs) == 2
+
+    # Each save moves the delayed write back, so flush it the way Home
+    # Assistant does on shutdown
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    saved = hass_storage[STORAGE_KEY]["data"]["jobs"]
+    assert {job["job_id"] for job in saved} == {"heat", response["job_id"]}
+
+    now = dt_util.utcnow()
+    async_fire_time_changed(hass, now + timedelta(minutes=11))
+    await hass.async_block_till_done()
+    assert [call["command"] for call in remote.calls] == [["code_heat_off"]]
+    assert [job.job_id for job in jobs.jobs.values()] == [response["job_id"]]
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "cancel_schedule",
+        {"entry_id": entry.entry_id},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {"cancelled": 1}
+    async_fire_time_changed(hass, now + timedelta(minutes=31))
+    await hass.async_block_till_done()
+    assert len(remote.calls) == 1
+
+
+async def test_scheduled_job_waits_for_its_entry(hass: HomeAssistant):
+    """Test that a job falling due while its entry is unloaded is kept."""
+    remote = FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power Off", "ir_code": "code_off"}],
+        },
+        options={"min_frame_gap": 0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        "schedule",
+        {"entry_id": entry.entry_id, "action": "Power Off", "delay": {"minutes": 5}},
+        blocking=True,
+        return_response=True,
+    )
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    due = dt_util.utcnow() + timedelta(minutes=6)
+    async_fire_time_changed(hass, due)
+    await hass.async_block_till_done()
+    jobs = async_get_hub(hass).jobs
+    assert not remote.calls
+    assert len(jobs.jobs) == 1
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    async_fire_time_changed(hass, due)
+    await hass.async_block_till_done()
+    assert [call["command"] for call in remote.calls] == [["code_off"]]
+    assert not jobs.jobs
+
+
+async def test_failed_job_is_retried_then_dropped(hass: HomeAssistant):
+    """Test that a job failing while its entry is loaded is retried with backoff."""
+    remote = FakeRemote(failures=1).register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power Off", "ir_code": "code_off"}],
+        },
+        options={"min_frame_gap": 0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    jobs = async_get_hub(hass).jobs
+
+    async def schedule_and_fail() -> None:
+        await hass.services.async_call(
+            DOMAIN,
+            "schedule",
+            {
+                "entry_id": entry.entry_id,
+                "action": "Power Off",
+                "delay": {"minutes": 5},
+            },
+            blocking=True,
+            return_response=True,
+        )
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=6))
+        await hass.async_block_till_done()
+
+    await schedule_and_fail()
+    assert not remote.calls
+    [job] = jobs.jobs.values()
+    assert job.attempts == 1
+
+    async_fire_time_changed(hass, dt_util.utc_from_timestamp(job.due + 1))
+    await hass.async_block_till_done()
+    assert [call["command"] for call in remote.calls] == [["code_off"]]
+    assert not jobs.jobs
+
+    # A blaster that keeps failing gives up after the last attempt
+    remote.failures = MAX_ATTEMPTS
+    await schedule_and_fail()
+    for _ in range(MAX_ATTEMPTS - 1):
+        [job] = jobs.jobs.values()
+        async_fire_time_changed(hass, dt_util.utc_from_timestamp(job.due + 1))
+        await hass.async_block_till_done()
+    assert remote.failures == 0
+    assert len(remote.calls) == 1
+    assert not jobs.jobs
+
+
+async def test_unchanged_state_commands_are_suppressed(hass: HomeAssistant):
+    """Test that commands repeating a recently set state are skipped unless forced."""
+    remote = FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [
+                {"name": "Power On", "ir_code": "code_on"},
+                {"name": "Power Off", "ir_code": "code_off"},
+            ],
+        },
+        options={"min_frame_gap": 0, "suppress_ttl": 60},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    for _ in range(2):
+        await hass.services.async_call(
+            "button",
+            "press",
+            {"entity_id": "button.test_fan_power_on"},
+            blocking=True,
+        )
+    assert [call["command"] for call in remote.calls] == [["code_on"]]
+
+    async def send_many(**data):
+        response = await hass.services.async_call(
+            DOMAIN,
+            "send_many",
+            {"entry_id": [entry.entry_id], "action": "Power On", **data},
+            blocking=True,
+            return_response=True,
+        )
+        return response["results"][0]
+
+    assert (await send_many())["suppressed"] is True
+    assert "suppressed" not in await send_many(force=True)
+    assert len(remote.calls) == 2
+    stats = async_get_hub(hass).telemetry.entry_stats(entry.entry_id)
+    assert stats.suppressed == 2
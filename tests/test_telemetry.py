@@ -0,0 +1,152 @@
+"""Test dyson_ir press telemetry."""
+import asyncio
+
+from homeassistant.core import Context, HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.const import CONF_ACTIONS, CONF_BLASTER_ACTION, DOMAIN
+from custom_components.dyson_ir.diagnostics import async_get_config_entry_diagnostics
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.library import code_ref
+from custom_components.dyson_ir.telemetry import TRACE_SIZE, RollingHistogram
+
+from .fake_remote import FakeRemote, blaster_action
+
+
+def test_rolling_histogram_keeps_recent_samples():
+    """Test that the histogram holds a fixed number of samples."""
+    histogram = RollingHistogram(size=4)
+    assert histogram.percentile(0.5) is None
+
+    for value in range(10):
+        histogram.add(float(value))
+
+    assert len(histogram) == 4
+    assert histogram.percentile(0.0) == 6.0
+    assert histogram.percentile(0.99) == 9.0
+    assert histogram.as_dict()["mean"] == 7.5
+
+
+async def test_press_is_recorded(hass: HomeAssistant):
+    """Test that a press records stage timings, counters and diagnostics."""
+    remote = FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = async_get_hub(hass).coordinators[entry.entry_id]
+    await coordinator.async_send("code_on", "Test Fan Power On")
+    assert remote.calls == [{"device_id": "blaster_device", "command": ["code_on"]}]
+
+    state = hass.states.get("sensor.test_fan_commands_sent")
+    assert state is not None
+    assert state.state == "1"
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    telemetry = diagnostics["telemetry"]
+    assert telemetry["sent"] == 1
+    assert telemetry["failed"] == 0
+    for stage in ("prepare", "queue", "script", "service", "total"):
+        assert telemetry["latency_ms"][stage]["samples"] == 1
+    assert diagnostics["blaster"]["telemetry"]["sent"] == 1
+
+
+async def test_press_traces(hass: HomeAssistant):
+    """Test that presses are traced into a bounded buffer only when enabled."""
+    FakeRemote().register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+        options={"min_frame_gap": 0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[entry.entry_id]
+
+    await coordinator.async_send("code_on", "Power On")
+    assert hub.telemetry.entry_traces(entry.entry_id) is None
+
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, "trace": True}
+    )
+    await hass.async_block_till_done()
+    for _ in range(TRACE_SIZE + 1):
+        await coordinator.async_send("code_on", "Power On")
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "get_traces",
+        {"entry_id": entry.entry_id},
+        blocking=True,
+        return_response=True,
+    )
+    traces = response["traces"]
+    assert len(traces) == TRACE_SIZE
+    trace = traces[-1]
+    assert trace["codes"] == [code_ref("code_on")]
+    assert trace["blaster"] == [["device_id", "blaster_device"]]
+    assert (
+        trace["prepared_ms"]
+        <= trace["script_started_ms"]
+        <= trace["service_called_ms"]
+        <= trace["finished_ms"]
+    )
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert len(diagnostics["traces"]) == TRACE_SIZE
+
+
+async def test_presses_sharing_a_context(hass: HomeAssistant):
+    """Test that presses of one script are timed apart and never leak."""
+    FakeRemote(latency=0.01).register(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+        options={"min_frame_gap": 0, "trace": True},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[entry.entry_id]
+
+    context = Context()
+    await asyncio.gather(
+        *(coordinator.async_send("code_on", "Power On", context) for _ in range(2))
+    )
+    traces = hub.telemetry.entry_traces(entry.entry_id)
+    assert [trace["context_id"] for trace in traces] == [context.id] * 2
+    for trace in traces:
+        assert trace["script_started_ms"] <= trace["service_called_ms"]
+
+    # A press cancelled while it waits for the blaster is forgotten
+    first = asyncio.create_task(coordinator.async_send("code_on", "Power On"))
+    second = asyncio.create_task(coordinator.async_send("code_on", "Power On"))
+    await asyncio.sleep(0)
+    second.cancel()
+    await first
+    assert not hub.telemetry._inflight
@@ -0,0 +1,122 @@
+"""Test dyson_ir transmit scheduling."""
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.const import (
+    CONF_ACTIONS,
+    CONF_BLASTER_ACTION,
+    CONF_EXTRA_BLASTERS,
+    DOMAIN,
+)
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.transmit import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    BlasterQueue,
+    TransmitQueueFull,
+)
+
+from .fake_remote import FakeRemote, blaster_action
+
+
+async def test_queue_serializes_and_prioritizes(hass: HomeAssistant):
+    """Test that one blaster sends one frame at a time, interactive first."""
+    queue = BlasterQueue(hass, "blaster")
+    release = asyncio.Event()
+    sent: list[str] = []
+
+    def sender(name: str):
+        async def send() -> None:
+            if name == "first":
+                await release.wait()
+            sent.append(name)
+
+        return send
+
+    first = asyncio.create_task(queue.async_transmit(sender("first"), PRIORITY_BULK, 0))
+    await asyncio.sleep(0)
+    bulk = asyncio.create_task(queue.async_transmit(sender("bulk"), PRIORITY_BULK, 0))
+    interactive = asyncio.create_task(
+        queue.async_transmit(sender("interactive"), PRIORITY_INTERACTIVE, 0)
+    )
+    await asyncio.sleep(0)
+    assert queue.depth == 2
+
+    release.set()
+    await asyncio.gather(first, bulk, interactive)
+    assert sent == ["first", "interactive", "bulk"]
+    assert not queue.busy
+
+
+async def test_queue_overflow(hass: HomeAssistant):
+    """Test that a full queue rejects bulk work and evicts it for presses."""
+    queue = BlasterQueue(hass, "blaster", max_depth=1)
+    release = asyncio.Event()
+
+    async def blocked() -> None:
+        await release.wait()
+
+    async def send() -> None:
+        return None
+
+    running = asyncio.create_task(queue.async_transmit(blocked, PRIORITY_BULK, 0))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(queue.async_transmit(send, PRIORITY_BULK, 0))
+    await asyncio.sleep(0)
+
+    with pytest.raises(TransmitQueueFull):
+        await queue.async_transmit(send, PRIORITY_BULK, 0)
+
+    pressed = asyncio.create_task(queue.async_transmit(send, PRIORITY_INTERACTIVE, 0))
+    await asyncio.sleep(0)
+    with pytest.raises(TransmitQueueFull):
+        await queued
+
+    release.set()
+    await asyncio.gather(running, pressed)
+
+
+async def test_failover_to_another_blaster(hass: HomeAssistant):
+    """Test that presses move on from a failing blaster, then avoid it."""
+    remote = FakeRemote()
+    dead_calls = 0
+
+    async def handle(call: ServiceCall) -> None:
+        nonlocal dead_calls
+        if call.data["device_id"] == "dead_blaster":
+            dead_calls += 1
+            raise HomeAssistantError("Blaster is offline")
+        await remote.async_handle(call)
+
+    hass.services.async_register("remote", "send_command", handle)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action("dead_blaster"),
+            CONF_EXTRA_BLASTERS: [{CONF_BLASTER_ACTION: blaster_action()}],
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "power_on"}],
+        },
+        options={"min_frame_gap": 0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    for _ in range(3):
+        await hass.services.async_call(
+            "button", "press", {"entity_id": "button.test_fan_power_on"}, blocking=True
+        )
+    # Two failures mark the first blaster unhealthy, the third press skips it
+    assert len(remote.calls) == 3
+    assert dead_calls == 2
+    hub = async_get_hub(hass)
+    assert not hub.balancer.health((("device_id", "dead_blaster"),)).healthy
+    coordinator = hub.coordinators[entry.entry_id]
+    assert coordinator.last_blaster == (("device_id", "blaster_device"),)
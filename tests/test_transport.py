@@ -0,0 +1,288 @@
+"""Test dyson_ir direct transports."""
+import base64
+from array import array
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.dyson_ir.codec import (
+    BROADLINK_PREFIX,
+    FORMAT_BROADLINK,
+    FORMAT_PRONTO,
+    IRSignal,
+    encode,
+)
+from custom_components.dyson_ir.const import (
+    CONF_ACTIONS,
+    CONF_BLASTER_ACTION,
+    CONF_MQTT_PAYLOAD,
+    CONF_MQTT_TOPIC,
+    CONF_TRANSPORT,
+    CONF_TRANSPORT_HOST,
+    CONF_TRANSPORT_MAC,
+    DOMAIN,
+    TRANSPORT_BROADLINK,
+    TRANSPORT_BROADLINK_RM4,
+    TRANSPORT_MQTT,
+)
+from custom_components.dyson_ir.diagnostics import async_get_config_entry_diagnostics
+from custom_components.dyson_ir.hub import async_get_hub
+from custom_components.dyson_ir.transport import (
+    BroadlinkSession,
+    BroadlinkTransport,
+    TransportError,
+)
+
+from .fake_broadlink import async_start_fake_broadlink
+from .fake_remote import FakeRemote, blaster_action
+
+MAC = "34:ea:34:00:00:01"
+
+
+def _signal(bit: int) -> IRSignal:
+    """Return a distinct IR signal."""
+    return IRSignal(array("I", [9000, 4500] + [560, 560 + 1130 * bit] * 8 + [560]))
+
+
+def _packet(code: str) -> bytes:
+    """Return the Broadlink packet of a Broadlink code."""
+    return base64.b64decode(code[len(BROADLINK_PREFIX) :])
+
+
+@pytest.mark.usefixtures("socket_enabled")
+async def test_broadlink_session_is_reused(hass: HomeAssistant):
+    """Test that a session authenticates once and again only when rejected."""
+    device = await async_start_fake_broadlink(rm4=True)
+    session = BroadlinkSession("127.0.0.1", MAC, rm4=True, port=device.port)
+    transport = BroadlinkTransport(session)
+    on_code = encode(_signal(1), FORMAT_BROADLINK)
+    try:
+        # Codes in any format are converted to Broadlink packets
+        await transport.async_send([on_code, encode(_signal(0), FORMAT_PRONTO)], 0)
+        await transport.async_send([on_code], 0)
+        assert device.auths == 1
+        assert device.sent[0] == _packet(on_code)
+        assert len(device.sent) == 3
+
+        device.expire = True
+        await transport.async_send([on_code], 0)
+        assert device.auths == 2
+        assert len(device.sent) == 4
+    finally:
+        session.async_close()
+        device.transport.close()
+
+
+@pytest.mark.usefixtures("socket_enabled")
+async def test_broadlink_rm_payload(hass: HomeAssistant):
+    """Test that older RM devices get the packet without a length prefix."""
+    device = await async_start_fake_broadlink()
+    session = BroadlinkSession("127.0.0.1", MAC, rm4=False, port=device.port)
+    code = encode(_signal(1), FORMAT_BROADLINK)
+    try:
+        await BroadlinkTransport(session).async_send([code], 0)
+        assert device.sent == [_packet(code).rstrip(b"\0")]
+    finally:
+        session.async_close()
+        device.transport.close()
+
+
+@pytest.mark.usefixtures("socket_enabled")
+async def test_broadlink_falls_back_to_blaster_actions(hass: HomeAssistant):
+    """Test that codes go over UDP and through the script engine when it fails."""
+    remote = FakeRemote().register(hass)
+    device = await async_start_fake_broadlink(rm4=True)
+    code = encode(_signal(1), FORMAT_BROADLINK)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": code}],
+        },
+        options={
+            "min_frame_gap": 0,
+            CONF_TRANSPORT: TRANSPORT_BROADLINK_RM4,
+            CONF_TRANSPORT_HOST: "127.0.0.1",
+            CONF_TRANSPORT_MAC: MAC,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = async_get_hub(hass)
+    hub.transports.broadlink("127.0.0.1", MAC, True).port = device.port
+    coordinator = hub.coordinators[entry.entry_id]
+    assert coordinator.blaster_key == ((TRANSPORT_BROADLINK, "127.0.0.1"),)
+
+    await coordinator.async_send(code, "Power On")
+    assert device.sent == [_packet(code)]
+    assert remote.calls == []
+
+    # The device goes away; the blaster actions take over
+    device.transport.close()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            "custom_components.dyson_ir.transport.BROADLINK_TIMEOUT", 0.05
+        )
+        await coordinator.async_send(code, "Power On")
+    assert [call["command"] for call in remote.calls] == [[code]]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.usefixtures("socket_enabled")
+async def test_transport_only_button_press(hass: HomeAssistant):
+    """Test that buttons of an entry without blaster actions use the transport."""
+    device = await async_start_fake_broadlink(rm4=True)
+    code = encode(_signal(1), FORMAT_BROADLINK)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: [],
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": code}],
+        },
+        options={
+            "min_frame_gap": 0,
+            CONF_TRANSPORT: TRANSPORT_BROADLINK_RM4,
+            CONF_TRANSPORT_HOST: "127.0.0.1",
+            CONF_TRANSPORT_MAC: MAC,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    async_get_hub(hass).transports.broadlink("127.0.0.1", MAC, True).port = device.port
+
+    await hass.services.async_call(
+        "button", "press", {"entity_id": "button.test_fan_power_on"}, blocking=True
+    )
+    assert device.sent == [_packet(code)]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    device.transport.close()
+
+
+async def test_transport_and_actions_share_the_blaster(hass: HomeAssistant):
+    """Test that entries reaching one device by transport and script share a key."""
+    broadlink_entry = MockConfigEntry(domain="broadlink")
+    broadlink_entry.add_to_hass(hass)
+    device = dr.async_get(hass).async_get_or_create(
+        config_entry_id=broadlink_entry.entry_id,
+        connections={(dr.CONNECTION_NETWORK_MAC, MAC)},
+    )
+    remote = er.async_get(hass).async_get_or_create(
+        "remote", "broadlink", MAC, device_id=device.id
+    )
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            version=3,
+            title="Transport Fan",
+            data={
+                "name": "Transport Fan",
+                CONF_BLASTER_ACTION: [],
+                CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+            },
+            options={
+                CONF_TRANSPORT: TRANSPORT_BROADLINK_RM4,
+                CONF_TRANSPORT_HOST: "127.0.0.1",
+                CONF_TRANSPORT_MAC: MAC.upper(),
+            },
+        ),
+        MockConfigEntry(
+            domain=DOMAIN,
+            version=3,
+            title="Script Fan",
+            data={
+                "name": "Script Fan",
+                CONF_BLASTER_ACTION: [
+                    {
+                        "service": "remote.send_command",
+                        "target": {"entity_id": remote.entity_id},
+                        "data": {"command": "IR_CODE"},
+                    }
+                ],
+                CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+            },
+        ),
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinators = async_get_hub(hass).coordinators
+    keys = {coordinators[entry.entry_id].blaster_key for entry in entries}
+    assert keys == {(("device_id", device.id),)}
+
+
+async def test_transport_error_without_blaster_actions(hass: HomeAssistant):
+    """Test that a failing transport is reported when there is no fallback."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: [],
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "not a code"}],
+        },
+        options={
+            "min_frame_gap": 0,
+            CONF_TRANSPORT: TRANSPORT_BROADLINK,
+            CONF_TRANSPORT_HOST: "127.0.0.1",
+            CONF_TRANSPORT_MAC: MAC,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = async_get_hub(hass).coordinators[entry.entry_id]
+
+    with pytest.raises(TransportError):
+        await coordinator.async_send("not a code", "Power On")
+
+    # Diagnostics leave out where the blaster is
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["entry"]["options"][CONF_TRANSPORT_HOST] == "**REDACTED**"
+    assert diagnostics["entry"]["options"][CONF_TRANSPORT_MAC] == "**REDACTED**"
+    assert diagnostics["blaster"]["target"] == [[TRANSPORT_BROADLINK, "**REDACTED**"]]
+
+
+async def test_mqtt_transport(hass: HomeAssistant, mqtt_mock):
+    """Test that codes are published with the payload template."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        title="Test Fan",
+        data={
+            "name": "Test Fan",
+            CONF_BLASTER_ACTION: blaster_action(),
+            CONF_ACTIONS: [{"name": "Power On", "ir_code": "code_on"}],
+        },
+        options={
+            "min_frame_gap": 0,
+            CONF_TRANSPORT: TRANSPORT_MQTT,
+            CONF_MQTT_TOPIC: "cmnd/blaster/IRSend",
+            CONF_MQTT_PAYLOAD: '{"Protocol": "RAW", "Data": "IR_CODE"}',
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = async_get_hub(hass).coordinators[entry.entry_id]
+
+    await coordinator.async_send_sequence(["code_on", "code_on"], "Power On")
+    assert mqtt_mock.async_publish.call_count == 2
+    mqtt_mock.async_publish.assert_called_with(
+        "cmnd/blaster/IRSend", '{"Protocol": "RAW", "Data": "code_on"}', 0, False
+    )